@@ -1,8 +1,54 @@
 import argparse
+import importlib
 import logging
+from typing import List
 
-from .cluster import delete_cluster_cli, update_cluster_cli
-from .scope import delete_scope_cli, update_scope_cli
+# The module and function handling each sub command, imported only once the sub command is dispatched so the
+# workspace client libraries are not loaded to print help or parse arguments
+COMMANDS = {
+    'cluster_update': ('.cluster', 'update_cluster_cli'),
+    'cluster_delete': ('.cluster', 'delete_cluster_cli'),
+    'cluster_advise': ('.cluster', 'advise_cluster_cli'),
+    'scope_update': ('.scope', 'update_scope_cli'),
+    'scope_delete': ('.scope', 'delete_scope_cli'),
+    'apply': ('.apply', 'apply_cli'),
+    'inventory_export': ('.inventory', 'export_inventory_cli'),
+    'gc': ('.gc', 'gc_cli'),
+    'watch': ('.watch', 'watch_cli'),
+}
+
+# The backend types, the keys of utils._backend.BACKENDS
+BACKEND_TYPES = ['rest', 'cli']
+
+# The sub commands asking for confirmation, which have to be quiet or debug when run against several workspaces
+FANOUT_CONFIRMED_COMMANDS = ['cluster_delete', 'scope_delete', 'gc']
+
+
+def _load_command(which: str):
+    """Import the function handling a sub command
+
+    :param str which: The sub command, one of COMMANDS
+
+    :return: The function handling the sub command
+    """
+    module_name, function_name = COMMANDS[which]
+    return getattr(importlib.import_module(module_name, __package__), function_name)
+
+
+def _fan_out(args: argparse.Namespace, profiles: List[str]):
+    """Run a sub command against several workspaces concurrently, printing the outcome of every workspace
+
+    :param argparse.Namespace args: The arguments from the cli
+    :param List[str] profiles: The profiles configured for the workspaces
+    """
+    from .utils._fanout import format_summary, run_for_profiles
+
+    results = run_for_profiles(_load_command(args.which), args, profiles, max_workers=args.profile_workers)
+    print(format_summary(results))
+
+    failed = [result['profile'] for result in results if result['status'] != 'ok']
+    if failed:
+        raise RuntimeError(f'{len(failed)} of {len(profiles)} workspaces failed: {failed}')
 
 
 def cli():
@@ -18,6 +64,21 @@ def cli():
 
     # Optional arguments
     parser.add_argument('--profile', type=str, help='The databricks cli profile to use')
+    parser.add_argument('--backend', type=str, choices=BACKEND_TYPES,
+                        help='The backend used for workspace calls, rest by default, cli spawns the databricks cli')
+    parser.add_argument('--no-cache', action='store_true', help='Do not use the cached workspace state')
+    parser.add_argument('--timings', type=str, nargs='?', const='-', metavar='PATH',
+                        help='Report the duration of every workspace operation as json, to stdout or PATH')
+    parser.add_argument('--profiles', type=str, metavar='A,B,C',
+                        help='Run the command against the workspaces of several comma separated profiles')
+    parser.add_argument('--all-profiles', action='store_true',
+                        help='Run the command against the workspaces of every configured profile')
+    parser.add_argument('--profile-workers', type=int,
+                        help='The number of workspaces handled concurrently, every workspace by default')
+    parser.add_argument('--rate-limit', type=float,
+                        help='The number of calls per second made to each workspace, unlimited by default')
+    parser.add_argument('--max-retries', type=int,
+                        help='The number of retries of a throttled or failed workspace call, 6 by default')
 
     # cluster level commands
     cluster_parser = subparsers.add_parser(
@@ -43,10 +104,32 @@ def cli():
     cluster_update_parser.add_argument('--profile', type=str, help='The databricks cli profile to use')
     cluster_update_parser.add_argument('-r', action='store_true', help='Allow cluster to run after creation')
     cluster_update_parser.add_argument('-e', action='store_true', help='Force cluster reconfiguration, cluster must be terminated first')
+    cluster_update_parser.add_argument('--spark-version', type=str, default='latest',
+                        help='The spark runtime, latest, lts, a release like 13.x or 13.3, lts:13.x, or a runtime key')
+    cluster_update_parser.add_argument('--spark-variant', type=str, default='standard',
+                        choices=['standard', 'ml', 'gpu-ml', 'photon'], help='The spark runtime variant')
+    cluster_update_parser.add_argument('-d', action='store_true', help='Debug, prints the plan without applying it')
+    cluster_update_parser.add_argument('--workers', type=int, default=8, help='The number of clusters updated concurrently')
+    cluster_update_parser.add_argument('--wait-timeout', type=float, default=1200.0,
+                        help='The maximum seconds to wait for a terminating cluster before editing it')
+    cluster_update_parser.add_argument('--pool', type=str, metavar='NAME',
+                                       help='Take the nodes of the clusters from an instance pool, created or updated '
+                                            'as needed, existing clusters are only attached with -e')
+    cluster_update_parser.add_argument('--pool-min-idle', type=int, default=1,
+                                       help='The number of idle instances the pool keeps ready')
+    cluster_update_parser.add_argument('--pool-max-capacity', type=int, default=10,
+                                       help='The maximum number of instances of the pool')
+    cluster_update_parser.add_argument('--pool-idle-minutes', type=int, default=30,
+                                       help='The minutes an idle instance above the minimum is kept')
+    cluster_update_parser.add_argument('--pool-availability', type=str, default='on-demand',
+                                       choices=['on-demand', 'spot'], help='The spot policy of the pool instances')
+    cluster_update_parser.add_argument('--verify', action='store_true',
+                        help='Compare the acls and configuration of clusters tagged with a matching fingerprint')
 
     # Required arguments
     required_args = cluster_update_parser.add_argument_group('required arguments')
-    required_args.add_argument('--name', type=str, help='The cluster name', required=True)
+    required_args.add_argument('--name', type=str, action='append', required=True,
+                               help='The cluster name, a glob like team-* or a regex like re:team-\\d+, repeatable')
 
     # cluster delete commands
     cluster_delete_parser = cluster_subparsers.add_parser(
@@ -64,10 +147,35 @@ def cli():
     cluster_delete_parser.add_argument('-g', action='store_true', help='Delete groups')
     cluster_delete_parser.add_argument('-q', action='store_true', help='Quiet')
     cluster_delete_parser.add_argument('-s', action='store_true', help='Delete cluster')
+    cluster_delete_parser.add_argument('--workers', type=int, default=8, help='The number of concurrent reads')
 
     # Required arguments
     required_args = cluster_delete_parser.add_argument_group('required arguments')
-    required_args.add_argument('--name', type=str, help='Name override for cluster, case insensitive')
+    required_args.add_argument('--name', type=str, action='append', required=True,
+                               help='The cluster name, case insensitive, a glob like team-* or a regex like '
+                                    're:team-\\d+, repeatable')
+
+    # cluster advise commands
+    cluster_advise_parser = cluster_subparsers.add_parser(
+        'advise',
+        help='Cluster sizing commands',
+        description="Recommend the workers, node type and autotermination of clusters from their event history"
+    )
+    cluster_advise_parser.set_defaults(which='cluster_advise')
+
+    # Optional arguments
+    cluster_advise_parser.add_argument('--profile', type=str, help='The databricks cli profile to use')
+    cluster_advise_parser.add_argument('--name', type=str, action='append', default=None,
+                                       help='The cluster name, case insensitive, a glob like team-* or a regex like '
+                                            're:team-\\d+, repeatable, every cluster by default')
+    cluster_advise_parser.add_argument('--days', type=int, default=30, help='The days of event history to read')
+    cluster_advise_parser.add_argument('--max-workers-cap', type=int, default=20,
+                                       help='The highest maximum workers recommended')
+    cluster_advise_parser.add_argument('--apply', action='store_true',
+                                       help='Resize the terminated clusters through the cluster update')
+    cluster_advise_parser.add_argument('-d', action='store_true', help='Debug, prints the plans of --apply')
+    cluster_advise_parser.add_argument('-q', action='store_true', help='Quiet, applies without confirmation')
+    cluster_advise_parser.add_argument('--workers', type=int, default=8, help='The number of clusters read concurrently')
 
     # scope level commands
     scope_parser = subparsers.add_parser(
@@ -93,6 +201,10 @@ def cli():
     scope_update_parser.add_argument('--profile', type=str, help='The databricks cli profile to use')
     scope_update_parser.add_argument('--scope-name', type=str, help='Name override for the secret scope')
     scope_update_parser.add_argument('-f', action='store_true', help='Force deletion of existing secret scope')
+    scope_update_parser.add_argument('--acl-workers', type=int, default=8, help='The number of concurrent acl calls')
+    scope_update_parser.add_argument('-d', action='store_true', help='Debug, prints the plan without applying it')
+    scope_update_parser.add_argument('--verify', action='store_true',
+                        help='Compare the acls of a scope with a matching fingerprint')
 
     # Required arguments
     required_args = scope_update_parser.add_argument_group('required arguments')
@@ -115,23 +227,149 @@ def cli():
     scope_delete_parser.add_argument('-g', action='store_true', help='Delete groups')
     scope_delete_parser.add_argument('-q', action='store_true', help='Quiet')
     scope_delete_parser.add_argument('-s', action='store_true', help='Delete scope')
+    scope_delete_parser.add_argument('--workers', type=int, default=8, help='The number of concurrent reads')
 
     # Required arguments
     required_args = scope_delete_parser.add_argument_group('required arguments')
-    required_args.add_argument('--scope-name', type=str, help='Name override for the secret scope')
+    required_args.add_argument('--scope-name', type=str, action='append', required=True,
+                               help='The secret scope name, a glob like team-* or a regex like re:team-\\d+, '
+                                    'repeatable')
+
+    # apply commands
+    apply_parser = subparsers.add_parser(
+        'apply',
+        help='Manifest commands',
+        description='Create and/or update every cluster and secret scope listed in a workspace manifest'
+    )
+    apply_parser.set_defaults(which='apply')
+
+    # Optional arguments
+    apply_parser.add_argument('--profile', type=str, help='The databricks cli profile to use, overrides the manifest')
+    apply_parser.add_argument('--workers', type=int, default=8, help='The number of resources reconciled concurrently')
+
+    # Required arguments
+    required_args = apply_parser.add_argument_group('required arguments')
+    required_args.add_argument('-f', type=str, help='The workspace manifest yaml file', required=True)
+
+    # inventory level commands
+    inventory_parser = subparsers.add_parser(
+        'inventory',
+        help='Inventory commands',
+        description='Inventory commands'
+    )
+    inventory_parser.set_defaults(which='inventory')
+    inventory_subparsers = inventory_parser.add_subparsers(help='Sub commands')
+
+    # inventory export commands
+    inventory_export_parser = inventory_subparsers.add_parser(
+        'export',
+        help='Workspace inventory export commands',
+        description='Export the clusters, secret scopes and groups with their acls as newline delimited json'
+    )
+    inventory_export_parser.set_defaults(which='inventory_export')
+
+    # Optional arguments
+    inventory_export_parser.add_argument('--profile', type=str, help='The databricks cli profile to use')
+    inventory_export_parser.add_argument('-o', type=str, default='-', metavar='PATH',
+                                         help='The file to write to, stdout by default, {profile} is replaced by the '
+                                              'profile')
+    inventory_export_parser.add_argument('--include', type=str, default='clusters,scopes,groups',
+                                         help='The comma separated resource types to export')
+    inventory_export_parser.add_argument('--workers', type=int, default=16,
+                                         help='The number of concurrent acl, secret and member reads')
+
+    # gc commands
+    gc_parser = subparsers.add_parser(
+        'gc',
+        help='Access group clean up commands',
+        description='Delete the access groups of clusters and secret scopes that no longer exist'
+    )
+    gc_parser.set_defaults(which='gc')
+
+    # Optional arguments
+    gc_parser.add_argument('--profile', type=str, help='The databricks cli profile to use')
+    gc_parser.add_argument('-d', action='store_true', help='Debug, reports the orphaned groups without deleting them')
+    gc_parser.add_argument('-q', action='store_true', help='Quiet')
+    gc_parser.add_argument('--include', type=str, default='clusters,scopes',
+                           help='The comma separated target types whose access groups are collected')
+    gc_parser.add_argument('--workers', type=int, default=4, help='The number of batches of groups deleted concurrently')
+    gc_parser.add_argument('--batch-size', type=int, default=100,
+                           help='The number of groups per batch, deleted with one bulk request where supported')
+
+    # watch commands
+    watch_parser = subparsers.add_parser(
+        'watch',
+        help='Manifest watch commands',
+        description='Keep every cluster and secret scope listed in a workspace manifest in its desired state'
+    )
+    watch_parser.set_defaults(which='watch')
+
+    # Optional arguments
+    watch_parser.add_argument('--profile', type=str, help='The databricks cli profile to use, overrides the manifest')
+    watch_parser.add_argument('--interval', type=float, default=60.0, help='The seconds between polls')
+    watch_parser.add_argument('--jitter', type=float, default=0.1,
+                              help='The fraction of the interval polls are randomly shifted by')
+    watch_parser.add_argument('--cycles', type=int, default=0,
+                              help='The number of polls before exiting, runs until interrupted by default')
+    watch_parser.add_argument('--workers', type=int, default=8, help='The number of resources read concurrently')
+
+    # Required arguments
+    required_args = watch_parser.add_argument_group('required arguments')
+    required_args.add_argument('-f', type=str, help='The workspace manifest yaml file', required=True)
 
     # Initialize the cli
     args = parser.parse_args()
-    print(args)
-
-    if args.which == 'scope_update':
-        update_scope_cli(args)
-    elif args.which == 'scope_delete':
-        delete_scope_cli(args)
-    elif args.which == 'cluster_update':
-        update_cluster_cli(args)
-    elif args.which == 'cluster_delete':
-        delete_cluster_cli(args)
+    logging.debug(f'Arguments {args}')
+
+    if args.which not in COMMANDS:
+        return
+
+    # Select the backend
+    if args.backend is not None:
+        from .utils._backend import set_backend_type
+        set_backend_type(args.backend)
+
+    # Disable the workspace cache
+    if args.no_cache:
+        from .utils._cache import set_cache_enabled
+        set_cache_enabled(False)
+
+    # Limit and retry the workspace calls
+    if args.rate_limit is not None or args.max_retries is not None:
+        from .utils._governor import configure_governors
+        configure_governors(rate=args.rate_limit, max_retries=args.max_retries)
+
+    # Record the duration of every workspace operation
+    if args.timings is not None:
+        from .utils._timing import enable_timings
+        enable_timings()
+
+    # Select the workspaces
+    profiles = None
+    if args.profiles is not None or args.all_profiles:
+        if args.profile is not None:
+            parser.error('--profile can not be combined with --profiles or --all-profiles')
+        if args.which in FANOUT_CONFIRMED_COMMANDS and not (args.q or args.d):
+            parser.error('Deleting across workspaces is not confirmed per workspace, review with -d and rerun with -q')
+        if args.which == 'cluster_advise' and args.apply and not (args.q or args.d):
+            parser.error('Resizing across workspaces is not confirmed per workspace, review with -d and rerun with -q')
+        if args.which == 'inventory_export' and '{profile}' not in args.o:
+            parser.error('Exporting across workspaces writes a file per workspace, pass -o with {profile} in the path')
+
+        from .utils._profile import list_profiles
+        profiles = list_profiles() if args.all_profiles else [p.strip() for p in args.profiles.split(',') if p.strip()]
+        if not profiles:
+            parser.error('No profiles selected')
+
+    try:
+        if profiles is None:
+            _load_command(args.which)(args)
+        else:
+            _fan_out(args, profiles)
+    finally:
+        if args.timings is not None:
+            from .utils._timing import write_timing_report
+            write_timing_report(args.timings)
 
 
 if __name__ == '__main__':
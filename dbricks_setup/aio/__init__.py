@@ -0,0 +1,9 @@
+"""Asynchronous counterparts of the workspace helpers and cli flows, requires the async extra (httpx)"""
+from ._backend import AsyncRestBackend, close_backends, get_async_backend, get_async_rest_backend
+from ._cluster import (AsyncClusterWaiter, create_cluster, edit_cluster, extract_clusters, extract_spark,
+                       get_async_cluster_waiter, get_cluster_config, terminate_cluster, add_acls as add_cluster_acls,
+                       get_acls as get_cluster_acls, set_acls as set_cluster_acls, wait_for_clusters)
+from ._flows import delete_cluster, delete_scope, update_cluster, update_scope
+from ._groups import create_group, create_groups, delete_group, get_groups
+from ._scope import (add_acl, create_scope, delete_acl, extract_scopes, get_acls as get_scope_acls,
+                     set_acls as set_scope_acls)
@@ -0,0 +1,217 @@
+import asyncio
+import weakref
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+import logging
+from databricks_cli.configure.provider import DatabricksConfig
+
+from ..utils._backend import (API_VERSION, CLUSTERS_API_VERSION, PAGE_SIZE, parse_acls, parse_clusters, parse_scopes,
+                              scope_create_request)
+from ..utils._aad import get_aad_token
+from ..utils._governor import get_governor
+from ..utils._profile import get_profile_config
+from ..utils._timing import call_span, record_payload
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncRestBackend:
+    """Asynchronous backend calling the workspace rest api over one pooled client
+
+    The client is bound to the event loop it was created in.
+
+    :param DatabricksConfig config: The configuration of the workspace
+    :param int max_connections: The maximum number of concurrent connections to the workspace
+    """
+
+    def __init__(self, config: DatabricksConfig, max_connections: int = 100):
+        self.host = config.host.rstrip('/')
+        self.governor = get_governor(self.host)
+        self.client = httpx.AsyncClient(
+            base_url=self.host,
+            headers={'Authorization': f'Bearer {config.token}'},
+            verify=not config.insecure,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            timeout=httpx.Timeout(60.0),
+        )
+
+    async def request(
+            self,
+            method: str,
+            api_command: str,
+            data: Dict = None,
+            params: Dict = None,
+            api_version: str = API_VERSION) -> Dict:
+        """Perform a request against the workspace api
+
+        :param str method: The http method
+        :param str api_command: The api command, i.e. /clusters/list
+        :param Dict data: The json body of the request
+        :param Dict params: The query parameters of the request
+        :param str api_version: The api base path
+
+        :return: The json response
+        :rtype: Dict
+        """
+        # Run and enforce success
+        async def attempt() -> httpx.Response:
+            with call_span(f'{method} {api_command}') as record:
+                r = await self.client.request(method, f'{api_version}{api_command}', json=data, params=params)
+                record_payload(record, len(r.request.content), len(r.content))
+                if r.is_error:
+                    logger.error(f'{method} {api_command} failed with {r.status_code}: {r.text}')
+                r.raise_for_status()
+            return r
+
+        # Only creations are not safe to repeat after a lost response
+        r = await self.governor.acall(attempt, idempotent=method != 'POST')
+
+        return r.json() if r.content else {}
+
+    async def aclose(self):
+        await self.client.aclose()
+
+    async def list_groups(self) -> List[str]:
+        return (await self.request('GET', '/groups/list')).get('group_names', [])
+
+    async def create_group(self, group: str):
+        await self.request('POST', '/groups/create', {'group_name': group})
+
+    async def delete_group(self, group: str):
+        await self.request('POST', '/groups/delete', {'group_name': group})
+
+    async def list_clusters(self) -> List[Dict[str, str]]:
+        clusters = []
+        params = {'page_size': PAGE_SIZE}
+        while True:
+            response = await self.request('GET', '/clusters/list', params=params, api_version=CLUSTERS_API_VERSION)
+            clusters.extend(parse_clusters(response))
+
+            # Continue with the next page
+            if not response.get('next_page_token'):
+                return clusters
+            params = {'page_size': PAGE_SIZE, 'page_token': response['next_page_token']}
+
+    async def get_cluster(self, cluster_id: str) -> Optional[Dict[str, str]]:
+        try:
+            response = await self.request('GET', '/clusters/get', params={'cluster_id': cluster_id})
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code in (400, 404):
+                return None
+            raise
+        return next(parse_clusters({'clusters': [response]}))
+
+    async def get_cluster_config(self, cluster_id: str) -> Dict:
+        return await self.request('GET', '/clusters/get', params={'cluster_id': cluster_id})
+
+    async def list_spark_versions(self) -> List[Dict[str, str]]:
+        return (await self.request('GET', '/clusters/spark-versions'))['versions']
+
+    async def create_cluster(self, cluster_config: Dict) -> str:
+        return (await self.request('POST', '/clusters/create', cluster_config))['cluster_id']
+
+    async def edit_cluster(self, cluster_config: Dict):
+        await self.request('POST', '/clusters/edit', cluster_config)
+
+    async def terminate_cluster(self, cluster_id: str):
+        await self.request('POST', '/clusters/delete', {'cluster_id': cluster_id})
+
+    async def delete_cluster(self, cluster_id: str):
+        await self.request('POST', '/clusters/permanent-delete', {'cluster_id': cluster_id})
+
+    async def list_scopes(self) -> List[Dict[str, str]]:
+        return list(parse_scopes(await self.request('GET', '/secrets/scopes/list')))
+
+    async def create_scope(self, scope: str, resource_id: str, dns_name: str):
+        await self.request('POST', '/secrets/scopes/create', scope_create_request(scope, resource_id, dns_name))
+
+    async def delete_scope(self, scope: str):
+        await self.request('POST', '/secrets/scopes/delete', {'scope': scope})
+
+    async def list_acls(self, scope: str) -> Dict[str, str]:
+        return parse_acls(await self.request('GET', '/secrets/acls/list', params={'scope': scope}))
+
+    async def put_acl(self, scope: str, principal: str, permission: str):
+        await self.request('POST', '/secrets/acls/put', {'scope': scope, 'principal': principal, 'permission': permission})
+
+    async def delete_acl(self, scope: str, principal: str):
+        await self.request('POST', '/secrets/acls/delete', {'scope': scope, 'principal': principal})
+
+    async def get_permissions(self, object_type: str, object_id: str) -> Dict:
+        return await self.request('GET', f'/permissions/{object_type}/{object_id}')
+
+    async def set_permissions(self, object_type: str, object_id: str, permissions: Dict) -> Dict:
+        return await self.request('PUT', f'/permissions/{object_type}/{object_id}', permissions)
+
+    async def update_permissions(self, object_type: str, object_id: str, permissions: Dict) -> Dict:
+        return await self.request('PATCH', f'/permissions/{object_type}/{object_id}', permissions)
+
+
+# The backends by host and token and the azure ad token by host of every event loop, weakly keyed by the loop since
+# the id of a collected loop is reused
+_backends: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+_aad_tokens: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+_configs: Dict[str, DatabricksConfig] = {}
+
+
+def get_async_rest_backend(config: DatabricksConfig) -> AsyncRestBackend:
+    """Get the shared asynchronous backend of a workspace configuration for the running event loop
+
+    :param DatabricksConfig config: The configuration of the workspace
+
+    :return: The backend holding the pooled client of the workspace
+    :rtype: AsyncRestBackend
+    """
+    backends = _backends.setdefault(asyncio.get_running_loop(), {})
+    key = (config.host, config.token)
+    if key not in backends:
+        backends[key] = AsyncRestBackend(config)
+    return backends[key]
+
+
+def get_async_backend(profile: str) -> AsyncRestBackend:
+    """Get the shared asynchronous backend of a profile for the running event loop
+
+    :param str profile: The profile configured for the workspace
+
+    :return: The backend for the profile
+    :rtype: AsyncRestBackend
+    """
+    if profile not in _configs:
+        _configs[profile] = get_profile_config(profile)
+    return get_async_rest_backend(_configs[profile])
+
+
+async def get_async_aad_backend(profile: str) -> AsyncRestBackend:
+    """Get the asynchronous backend of a profile authenticated with the azure ad token of the current identity
+
+    :param str profile: The profile configured for the workspace
+
+    :return: The backend for the profile
+    :rtype: AsyncRestBackend
+    """
+    if profile not in _configs:
+        _configs[profile] = get_profile_config(profile)
+    config = _configs[profile]
+    token = await asyncio.to_thread(get_aad_token)
+
+    # The client of an expired token is closed
+    loop = asyncio.get_running_loop()
+    backends, tokens = _backends.setdefault(loop, {}), _aad_tokens.setdefault(loop, {})
+    previous = tokens.get(config.host)
+    if previous is not None and previous != token and (config.host, previous) in backends:
+        await backends.pop((config.host, previous)).aclose()
+    tokens[config.host] = token
+
+    return get_async_rest_backend(
+        DatabricksConfig(host=config.host, username=None, password=None, token=token, insecure=config.insecure)
+    )
+
+
+async def close_backends():
+    """Close the pooled clients opened in the running event loop"""
+    loop = asyncio.get_running_loop()
+    _aad_tokens.pop(loop, None)
+    for backend in _backends.pop(loop, {}).values():
+        await backend.aclose()
@@ -0,0 +1,45 @@
+import asyncio
+from typing import Any, Callable
+
+from ..utils._cache import get_cache
+
+
+async def cache_get(profile: str, object_type: str) -> Any:
+    """Get a cached object of a workspace, reading the cache file off the event loop
+
+    :param str profile: The profile configured for the workspace
+    :param str object_type: The object type, one of TTLS
+
+    :return: The cached value, None if missing, expired or the cache is disabled
+    :rtype: Any
+    """
+    return await asyncio.to_thread(lambda: get_cache(profile).get(object_type))
+
+
+async def cache_set(profile: str, object_type: str, value: Any):
+    """Cache a freshly extracted object of a workspace, writing the cache file off the event loop
+
+    :param str profile: The profile configured for the workspace
+    :param str object_type: The object type, one of TTLS
+    :param Any value: The json serializable value
+    """
+    await asyncio.to_thread(lambda: get_cache(profile).set(object_type, value))
+
+
+async def cache_update(profile: str, object_type: str, func: Callable[[Any], Any]):
+    """Write a change made by this tool through to a cached object of a workspace, off the event loop
+
+    :param str profile: The profile configured for the workspace
+    :param str object_type: The object type, one of TTLS
+    :param Callable[[Any], Any] func: Function returning the updated value from the cached value
+    """
+    await asyncio.to_thread(lambda: get_cache(profile).update(object_type, func))
+
+
+async def cache_invalidate(profile: str, object_type: str):
+    """Remove a cached object of a workspace, off the event loop
+
+    :param str profile: The profile configured for the workspace
+    :param str object_type: The object type, one of TTLS
+    """
+    await asyncio.to_thread(lambda: get_cache(profile).invalidate(object_type))
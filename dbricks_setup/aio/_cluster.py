@@ -0,0 +1,344 @@
+import asyncio
+import json
+import time
+import weakref
+from typing import Dict, Iterable, List
+
+import logging
+from databricks_cli.configure.provider import DatabricksConfig
+
+from ._backend import get_async_backend, get_async_rest_backend
+from ._cache import cache_get, cache_invalidate, cache_set, cache_update
+from ..utils._timing import span
+from ..utils.cluster._spark import SparkCatalog
+from ..utils.cluster._wait import FINAL_STATES, MISSING_STATE
+
+logger = logging.getLogger(__name__)
+
+# The cluster waiters of every profile, per event loop since their condition is bound to it
+_waiters: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+async def extract_clusters(profile: str) -> List[Dict[str, str]]:
+    """Get the list of clusters from the configured workspace
+
+    :param str profile: The profile configured for the workspace
+
+    :return: The list of clusters in the workspace
+    :rtype: List[Dict[str, str]]
+    """
+    # Use the cached clusters if fresh
+    existing_clusters = await cache_get(profile, 'clusters')
+
+    # Query what clusters exists
+    if existing_clusters is None:
+        logger.info('Extracting cluster information')
+        existing_clusters = await get_async_backend(profile).list_clusters()
+        await cache_set(profile, 'clusters', existing_clusters)
+
+    return existing_clusters
+
+
+async def extract_spark(profile: str, query: str = 'latest', variant: str = 'standard') -> Dict[str, str]:
+    """Get the spark version for new clusters from the configured workspace
+
+    :param str profile: The profile configured for the workspace
+    :param str query: latest, lts, a pinned release like 13.x or 13.3, lts:13.x, or the exact runtime key
+    :param str variant: The runtime variant, one of standard, ml, gpu-ml or photon
+
+    :return: The spark version
+    :rtype: Dict[str, str]
+    """
+    # Get the current spark versions
+    spark_versions = await cache_get(profile, 'spark_versions')
+    if spark_versions is None:
+        spark_versions = await get_async_backend(profile).list_spark_versions()
+        await cache_set(profile, 'spark_versions', spark_versions)
+
+    return SparkCatalog(spark_versions).select(query, variant)
+
+
+async def create_cluster(profile: str, cluster_config: Dict) -> str:
+    """Function for creating a cluster
+
+    :param str profile: The profile configured for the workspace
+    :param Dict cluster_config: The config of the cluster
+
+    :returns: The cluster id of the new cluster
+    :rtype: str
+    """
+    # Create the cluster
+    logger.info(f'Creating cluster {cluster_config["cluster_name"]}')
+    cluster_id = await get_async_backend(profile).create_cluster(cluster_config)
+    await cache_update(
+        profile,
+        'clusters',
+        lambda clusters: clusters + [
+            {'cluster_id': cluster_id, 'name': cluster_config['cluster_name'], 'status': 'PENDING'}
+        ]
+    )
+
+    return cluster_id
+
+
+async def edit_cluster(profile: str, cluster_config: Dict):
+    """Function for editing a cluster
+
+    :param str profile: The profile configured for the workspace
+    :param Dict cluster_config: The config of the cluster
+    """
+    # Edit the cluster
+    logger.info(f'Editing cluster {cluster_config["cluster_name"]}')
+    await get_async_backend(profile).edit_cluster(cluster_config)
+
+
+async def get_cluster_config(cluster_id: str, profile: str) -> Dict:
+    """Get the configuration of a cluster as returned by the workspace
+
+    :param str cluster_id: The id of the cluster
+    :param str profile: The profile configured for the workspace
+
+    :return: The cluster configuration, with the fields set by the workspace
+    :rtype: Dict
+    """
+    with span('get_cluster_config', cluster_id):
+        return await get_async_backend(profile).get_cluster_config(cluster_id)
+
+
+async def terminate_cluster(cluster_id: str, cluster_name: str, profile: str):
+    """Function for terminating a cluster
+
+    :param str cluster_id: The id of the cluster
+    :param str cluster_name: The name of the cluster
+    :param str profile: The profile configured for the workspace
+    """
+    # Terminate the cluster
+    logger.warning(f'Terminating cluster {cluster_name} with id {cluster_id}')
+    await get_async_backend(profile).terminate_cluster(cluster_id)
+    await cache_invalidate(profile, 'clusters')
+
+
+class AsyncClusterWaiter:
+    """Tracks the state of many clusters of a workspace from a single poll, the counterpart of
+    utils.cluster._wait.ClusterWaiter
+
+    Every coroutine waiting on clusters shares one poll, a get for a single tracked cluster and a list otherwise. The
+    interval between polls starts at min_interval and doubles up to max_interval, it is reset whenever a coroutine
+    starts waiting on new clusters.
+
+    :param str profile: The profile configured for the workspace
+    :param float min_interval: The first interval between polls in seconds
+    :param float max_interval: The upper bound of the interval between polls in seconds
+    """
+
+    def __init__(self, profile: str, min_interval: float = 1.0, max_interval: float = 30.0):
+        self.profile = profile
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.states: Dict[str, str] = {}
+        self._tracked: Dict[str, int] = {}
+        self._interval = min_interval
+        self._next_poll = 0.0
+        self._polling = False
+        self._condition = asyncio.Condition()
+
+    async def _poll(self, cluster_ids: List[str]) -> Dict[str, str]:
+        backend = get_async_backend(self.profile)
+        if len(cluster_ids) == 1:
+            cluster = await backend.get_cluster(cluster_ids[0])
+            return {cluster_ids[0]: cluster['status'] if cluster is not None else MISSING_STATE}
+
+        states = {cluster_id: MISSING_STATE for cluster_id in cluster_ids}
+        for cluster in await backend.list_clusters():
+            if cluster['cluster_id'] in states:
+                states[cluster['cluster_id']] = cluster['status']
+        return states
+
+    async def _wait(self, timeout: float):
+        # Wait for a notification, the condition is held again once the timeout passes
+        try:
+            await asyncio.wait_for(self._condition.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def wait(self, cluster_ids: Iterable[str], states: Iterable[str], timeout: float = 1200.0) -> Dict[str, str]:
+        """Wait until every cluster reached one of the target states
+
+        :param Iterable[str] cluster_ids: The ids of the clusters
+        :param Iterable[str] states: The target states, i.e. TERMINATED
+        :param float timeout: The maximum time to wait in seconds
+
+        :return: The state of each cluster
+        :rtype: Dict[str, str]
+        """
+        cluster_ids = list(cluster_ids)
+        states = set(states)
+        deadline = time.monotonic() + timeout
+
+        async with self._condition:
+            # Track the clusters, polling right away for clusters not seen before
+            for cluster_id in cluster_ids:
+                self._tracked[cluster_id] = self._tracked.get(cluster_id, 0) + 1
+                if cluster_id not in self.states:
+                    self._interval = self.min_interval
+                    self._next_poll = 0.0
+            self._condition.notify_all()
+
+        try:
+            while True:
+                async with self._condition:
+                    current = {cluster_id: self.states.get(cluster_id) for cluster_id in cluster_ids}
+                    if all(state in states for state in current.values()):
+                        return current
+
+                    # A cluster that ended up in another final state will never reach the target
+                    stuck = {
+                        cluster_id: state
+                        for cluster_id, state
+                        in current.items()
+                        if state in FINAL_STATES + [MISSING_STATE] and state not in states
+                    }
+                    if stuck:
+                        raise RuntimeError(f'Clusters {stuck} will not reach {sorted(states)}')
+
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise TimeoutError(f'Clusters {current} did not reach {sorted(states)} within {timeout}s')
+
+                    # Wait for the poll of another coroutine, or the next poll
+                    if self._polling:
+                        await self._wait(remaining)
+                        continue
+                    delay = self._next_poll - time.monotonic()
+                    if delay > 0:
+                        await self._wait(min(delay, remaining))
+                        continue
+                    self._polling = True
+                    tracked = list(self._tracked)
+
+                # Poll once for every tracked cluster
+                polled = {}
+                try:
+                    polled = await self._poll(tracked)
+                finally:
+                    async with self._condition:
+                        self.states.update(polled)
+                        self._polling = False
+                        self._next_poll = time.monotonic() + self._interval
+                        self._interval = min(self.max_interval, self._interval * 2)
+                        self._condition.notify_all()
+        finally:
+            async with self._condition:
+                for cluster_id in cluster_ids:
+                    self._tracked[cluster_id] -= 1
+                    if not self._tracked[cluster_id]:
+                        del self._tracked[cluster_id]
+                        self.states.pop(cluster_id, None)
+
+
+def get_async_cluster_waiter(profile: str) -> AsyncClusterWaiter:
+    """Get the cluster waiter shared by every coroutine of a profile in the running event loop
+
+    :param str profile: The profile configured for the workspace
+
+    :return: The cluster waiter
+    :rtype: AsyncClusterWaiter
+    """
+    waiters = _waiters.setdefault(asyncio.get_running_loop(), {})
+    if profile not in waiters:
+        waiters[profile] = AsyncClusterWaiter(profile)
+    return waiters[profile]
+
+
+async def wait_for_clusters(
+        cluster_ids: Iterable[str],
+        states: Iterable[str],
+        profile: str,
+        timeout: float = 1200.0) -> Dict[str, str]:
+    """Wait until clusters reached one of the target states, the counterpart of utils.cluster._wait.wait_for_clusters
+
+    :param Iterable[str] cluster_ids: The ids of the clusters
+    :param Iterable[str] states: The target states, i.e. TERMINATED
+    :param str profile: The profile configured for the workspace
+    :param float timeout: The maximum time to wait in seconds
+
+    :return: The state of each cluster
+    :rtype: Dict[str, str]
+    """
+    cluster_ids = list(cluster_ids)
+    states = list(states)
+    logger.info(f'Waiting for {len(cluster_ids)} clusters to reach {sorted(states)}')
+    with span('wait_clusters', ','.join(cluster_ids)):
+        return await get_async_cluster_waiter(profile).wait(cluster_ids, states, timeout)
+
+
+async def delete_cluster(cluster_id: str, cluster_name: str, profile: str):
+    """Function for delete a cluster
+
+    :param str cluster_id: The id of the cluster
+    :param str cluster_name: The name of the cluster
+    :param str profile: The profile configured for the workspace
+    """
+    # Delete the cluster
+    logger.warning(f'Deleting cluster {cluster_name} with id {cluster_id}')
+    await get_async_backend(profile).delete_cluster(cluster_id)
+    await cache_update(
+        profile,
+        'clusters',
+        lambda clusters: [cluster for cluster in clusters if cluster['cluster_id'] != cluster_id]
+    )
+
+
+async def get_acls(cluster_id: str, base_config: DatabricksConfig) -> Dict:
+    """Get the list of acls for the supplied cluster
+
+    :param str cluster_id: The id of the cluster in question
+    :param DatabricksConfig base_config: The profile configured for the workspace
+    """
+    # Get the acls
+    return await get_async_rest_backend(base_config).get_permissions('clusters', cluster_id)
+
+
+async def set_acls(desired_acls: Dict[str, str], cluster_id: str, base_config: DatabricksConfig):
+    """Enforce the list of acls for the supplied cluster
+
+    :param Dict[str, str] desired_acls: The acls to add to the cluster
+    :param str cluster_id: The id of the cluster in question
+    :param DatabricksConfig base_config: The profile configured for the workspace
+    """
+    # Set the permissions
+    permissions = {
+        'access_control_list': [
+            {
+                'group_name': group,
+                'permission_level': permission
+            }
+            for group, permission
+            in desired_acls.items()
+        ]
+    }
+
+    # Update the acls
+    response = await get_async_rest_backend(base_config).set_permissions('clusters', cluster_id, permissions)
+    logger.info(f'Permissions updated to {json.dumps(response, indent=2)}')
+
+
+async def add_acls(acls: Dict[str, str], cluster_id: str, base_config: DatabricksConfig):
+    """Grant permissions on a cluster, keeping the existing permissions
+
+    :param Dict[str, str] acls: The acls to add to the cluster
+    :param str cluster_id: The id of the cluster in question
+    :param DatabricksConfig base_config: The profile configured for the workspace
+    """
+    logger.info(f'Adding permissions {acls} to {cluster_id}')
+    permissions = {
+        'access_control_list': [
+            {
+                'group_name': group,
+                'permission_level': permission
+            }
+            for group, permission
+            in acls.items()
+        ]
+    }
+    await get_async_rest_backend(base_config).update_permissions('clusters', cluster_id, permissions)
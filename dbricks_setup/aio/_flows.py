@@ -0,0 +1,282 @@
+import asyncio
+from typing import Dict, List
+
+import logging
+
+from ._cluster import (add_acls as add_cluster_acls, create_cluster, delete_cluster as delete_cluster_by_id,
+                       edit_cluster, extract_clusters, extract_spark, get_acls as get_cluster_acls, get_cluster_config,
+                       set_acls as set_cluster_acls, terminate_cluster, wait_for_clusters)
+from ._groups import create_groups, delete_group, get_groups
+from ._scope import (create_scope, delete_acl, delete_scope as delete_scope_by_name, extract_scopes,
+                     get_acls as get_scope_acls, set_acls as set_scope_acls)
+from ..scope._update import get_access_groups as get_scope_access_groups
+from ..utils._aad import get_aad_token
+from ..utils._fingerprint import FINGERPRINT_TAG
+from ..utils._profile import get_profile_config
+from ..utils.cluster._acl import parse_acls, plan_acls
+from ..utils.cluster._config import (create_config, diff_config, find_sizing,
+                                     get_access_groups as get_cluster_access_groups, tag_config)
+
+logger = logging.getLogger(__name__)
+
+
+async def update_cluster(
+        cluster_name: str,
+        profile: str,
+        run: bool = False,
+        edit: bool = False,
+        wait_timeout: float = 1200.0) -> List[Dict[str, str]]:
+    """Updates the cluster configuration of a workspace, equivalent to cluster update
+
+    :param str cluster_name: The name of the cluster
+    :param str profile: The profile configured for the workspace
+    :param bool run: Allow the cluster to run after creation
+    :param bool edit: Force the cluster reconfiguration, the cluster must be terminated
+    :param float wait_timeout: The maximum time in seconds to wait for terminating clusters before editing them
+
+    :return: The clusters matching the name
+    :rtype: List[Dict[str, str]]
+    """
+    cluster_name = cluster_name.lower()
+    base_config = await asyncio.to_thread(get_profile_config, profile)
+
+    # Get the workspace state
+    groups, clusters, spark_version = await asyncio.gather(
+        get_groups(profile),
+        extract_clusters(profile),
+        extract_spark(profile),
+    )
+
+    # Get the clusters matching the desired name
+    matching_clusters = [cluster for cluster in clusters if cluster['name'].lower() == cluster_name]
+
+    # Create the cluster configuration, keeping the sizing the clusters were tagged with
+    access_groups = get_cluster_access_groups(cluster_name)
+    cluster_config = tag_config(
+        create_config(cluster_name, profile, spark_version, sizing=find_sizing(matching_clusters)), access_groups
+    )
+
+    # Create the cluster, the fingerprint is only tagged by its next edit
+    created = None
+    if not matching_clusters:
+        untagged_config = {
+            **cluster_config,
+            'custom_tags': {k: v for k, v in cluster_config['custom_tags'].items() if k != FINGERPRINT_TAG}
+        }
+        cluster_id = created = await create_cluster(profile, untagged_config)
+        cluster_status = 'PENDING'
+
+        # Terminate the newly started cluster
+        if not run:
+            await terminate_cluster(cluster_id, cluster_name, profile)
+            cluster_status = 'TERMINATING'
+
+        matching_clusters.append({'name': cluster_name, 'cluster_id': cluster_id, 'status': cluster_status})
+
+    # Filter and create the missing groups
+    await create_groups([group for group in access_groups if group not in groups], profile)
+
+    # Update the clusters
+    async def update(cluster: Dict[str, str]):
+        cluster_id = cluster['cluster_id']
+
+        # Only write the acls that changed, a new cluster gets every acl
+        if cluster_id == created:
+            write = {'action': 'set', 'acls': access_groups}
+        else:
+            write = plan_acls(parse_acls(await get_cluster_acls(cluster_id, base_config)), access_groups)
+        if write['action'] == 'set':
+            await set_cluster_acls(write['acls'], cluster_id, base_config)
+        elif write['action'] == 'add':
+            await add_cluster_acls(write['acls'], cluster_id, base_config)
+        else:
+            logger.info(f'Acls of {cluster_name} ({cluster_id}) are up to date')
+
+        # Edit the terminated clusters once they finished terminating, a new cluster already has the configuration
+        if not edit or cluster_id == created or cluster['status'] not in ('TERMINATED', 'TERMINATING'):
+            return
+        if cluster['status'] == 'TERMINATING':
+            await wait_for_clusters([cluster_id], ['TERMINATED'], profile, wait_timeout)
+
+        # Keep the custom tags set outside of this tool, and only edit a cluster still terminated
+        existing_config = await get_cluster_config(cluster_id, profile)
+        if existing_config.get('state', 'TERMINATED') != 'TERMINATED':
+            logger.warning(f'Cluster {cluster_name} ({cluster_id}) is {existing_config["state"]}, not editing it')
+            return
+        edit_config = {
+            **cluster_config,
+            'custom_tags': {**existing_config.get('custom_tags', {}), **cluster_config['custom_tags']}
+        }
+        changed = diff_config(existing_config, edit_config)
+        if not changed:
+            logger.info(f'Configuration of {cluster_name} ({cluster_id}) is up to date')
+            return
+        logger.info(f'Configuration of {cluster_name} ({cluster_id}) differs in {sorted(changed)}')
+        await edit_cluster(profile, {**edit_config, 'cluster_id': cluster_id})
+
+    await asyncio.gather(*(update(cluster) for cluster in matching_clusters))
+
+    return matching_clusters
+
+
+async def delete_cluster(
+        cluster_name: str,
+        profile: str,
+        clusters: bool = True,
+        groups: bool = True,
+        acls: bool = True,
+        dry_run: bool = False) -> Dict:
+    """Deletes a cluster and connected items, equivalent to cluster delete without confirmation
+
+    :param str cluster_name: The name of the cluster, case insensitive
+    :param str profile: The profile configured for the workspace
+    :param bool clusters: Delete the matching clusters
+    :param bool groups: Delete the access groups
+    :param bool acls: Delete the control lists
+    :param bool dry_run: Only return the resources that would be deleted
+
+    :return: The resources deleted
+    :rtype: Dict
+    """
+    cluster_name = cluster_name.lower()
+    base_config = await asyncio.to_thread(get_profile_config, profile)
+
+    # Get the workspace state
+    workspace_groups, workspace_clusters = await asyncio.gather(get_groups(profile), extract_clusters(profile))
+    matching_clusters = [cluster for cluster in workspace_clusters if cluster['name'].lower() == cluster_name]
+    existing_groups = [group for group in get_cluster_access_groups(cluster_name) if group in workspace_groups]
+
+    # Get the existing permissions
+    cluster_permissions = await asyncio.gather(
+        *(get_cluster_acls(cluster['cluster_id'], base_config) for cluster in matching_clusters)
+    )
+    permissions = {}
+    for cluster, cluster_permission in zip(matching_clusters, cluster_permissions):
+        for acl in cluster_permission.get('access_control_list', []):
+            acl_permissions = set(
+                permission['permission_level']
+                for permission
+                in acl['all_permissions']
+                if not permission['inherited']
+            )
+            if acl_permissions:
+                permissions.setdefault(cluster['cluster_id'], []).append(
+                    {
+                        'principal': acl.get('group_name', acl.get('user_name', 'UNKOWN')),
+                        'permissions': sorted(acl_permissions)
+                    }
+                )
+
+    # Set deletions
+    to_delete = {}
+    if clusters and matching_clusters:
+        to_delete['clusters'] = matching_clusters
+    if groups and existing_groups:
+        to_delete['groups'] = existing_groups
+    if acls and permissions:
+        to_delete['permissions'] = permissions
+
+    if dry_run:
+        return to_delete
+
+    # Delete items
+    await asyncio.gather(*(set_cluster_acls({}, cluster_id, base_config) for cluster_id in to_delete.get('permissions', {})))
+    await asyncio.gather(*(delete_group(group, profile) for group in to_delete.get('groups', [])))
+    await asyncio.gather(*(
+        delete_cluster_by_id(cluster['cluster_id'], cluster['name'], profile)
+        for cluster in to_delete.get('clusters', [])
+    ))
+
+    return to_delete
+
+
+async def update_scope(
+        key_vault: str,
+        resource_id: str,
+        profile: str,
+        scope_name: str = None,
+        force: bool = False) -> List[Dict]:
+    """Updates a key vault backed secret scope, equivalent to scope update
+
+    :param str key_vault: The key vault name
+    :param str resource_id: The key vault resource id
+    :param str profile: The profile configured for the workspace
+    :param str scope_name: Name override for the secret scope
+    :param bool force: Force the recreation of an existing scope
+
+    :return: The applied acl changes
+    :rtype: List[Dict]
+    """
+    scope_name = scope_name or key_vault
+
+    # Get the workspace state
+    groups, scopes = await asyncio.gather(get_groups(profile), extract_scopes(profile))
+    scopes = {scope['name'] for scope in scopes}
+
+    # Check scope existence
+    if scope_name in scopes and not force:
+        logger.warning(
+            f'Scope {scope_name} already exists. Please remove if misconfigured, consider using force to update.')
+    else:
+        # Get an azure ad token before deleting an existing scope
+        await asyncio.to_thread(get_aad_token)
+
+        # Delete if exists
+        if scope_name in scopes:
+            await delete_scope_by_name(scope_name, profile)
+
+        await create_scope(scope=scope_name, resource_id=resource_id, key_vault_name=key_vault, profile=profile)
+
+    # Filter and create the missing groups
+    access_groups = get_scope_access_groups(scope_name)
+    await create_groups([group for group in access_groups if group not in groups], profile)
+
+    # Update the acls
+    acls = await get_scope_acls(scope_name, profile)
+    return await set_scope_acls(acls, access_groups, scope_name, profile)
+
+
+async def delete_scope(
+        scope_name: str,
+        profile: str,
+        scope: bool = True,
+        groups: bool = True,
+        acls: bool = True,
+        dry_run: bool = False) -> Dict:
+    """Deletes a secret scope and connected items, equivalent to scope delete without confirmation
+
+    :param str scope_name: The name of the secret scope
+    :param str profile: The profile configured for the workspace
+    :param bool scope: Delete the scope
+    :param bool groups: Delete the access groups
+    :param bool acls: Delete the control lists
+    :param bool dry_run: Only return the resources that would be deleted
+
+    :return: The resources deleted
+    :rtype: Dict
+    """
+    # Get the workspace state
+    workspace_groups, scopes = await asyncio.gather(get_groups(profile), extract_scopes(profile))
+    scope_exists = any(scope['name'] == scope_name for scope in scopes)
+    existing_groups = [group for group in get_scope_access_groups(scope_name) if group in workspace_groups]
+    existing_acls = await get_scope_acls(scope_name, profile) if scope_exists else {}
+
+    # Set deletions
+    to_delete = {}
+    if scope and scope_exists:
+        to_delete['scope'] = scope_name
+    if groups and existing_groups:
+        to_delete['groups'] = existing_groups
+    if acls and existing_acls:
+        to_delete['acls'] = existing_acls
+
+    if dry_run:
+        return to_delete
+
+    # Delete items
+    await asyncio.gather(*(delete_acl(principal, scope_name, profile) for principal in to_delete.get('acls', {})))
+    await asyncio.gather(*(delete_group(group, profile) for group in to_delete.get('groups', [])))
+    if 'scope' in to_delete:
+        await delete_scope_by_name(scope_name, profile)
+
+    return to_delete
@@ -0,0 +1,63 @@
+import asyncio
+from typing import List
+
+import logging
+
+from ._backend import get_async_backend
+from ._cache import cache_get, cache_set, cache_update
+
+logger = logging.getLogger(__name__)
+
+
+async def get_groups(profile: str) -> List[str]:
+    """Get the list of groups from the configured workspace
+
+    :param str profile: The profile configured for the workspace
+
+    :return: The available groups
+    :rtype: List[str]
+    """
+    # Use the cached groups if fresh
+    groups = await cache_get(profile, 'groups')
+
+    # Query what groups are available
+    if groups is None:
+        logger.info('Extracting group information')
+        groups = await get_async_backend(profile).list_groups()
+        await cache_set(profile, 'groups', groups)
+
+    return groups
+
+
+async def create_groups(groups: List[str], profile: str):
+    """Create a set of groups in the configured workspace concurrently
+
+    :param List[str] groups: The list of groups to create
+    :param str profile: The profile configured for the workspace
+    """
+    if groups:
+        logger.info(f'Creating groups: {groups}')
+    await asyncio.gather(*(create_group(group, profile) for group in groups))
+
+
+async def create_group(group: str, profile: str):
+    """Create a group in the configured workspace
+
+    :param str group: The group to create
+    :param str profile: The profile configured for the workspace
+    """
+    logger.info(f'Creating Group: {group}')
+    await get_async_backend(profile).create_group(group)
+    await cache_update(profile, 'groups', lambda groups: groups + [group])
+
+
+async def delete_group(group: str, profile: str):
+    """Delete a group in the configured workspace
+
+    :param str group: The group to delete
+    :param str profile: The profile configured for the workspace
+    """
+    # Remove the existing group
+    logger.warning(f'Removing group {group}')
+    await get_async_backend(profile).delete_group(group)
+    await cache_update(profile, 'groups', lambda groups: [g for g in groups if g != group])
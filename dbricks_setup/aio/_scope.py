@@ -0,0 +1,142 @@
+import asyncio
+import time
+from typing import Dict, List
+
+import logging
+
+from ._backend import get_async_aad_backend, get_async_backend
+from ._cache import cache_get, cache_set, cache_update
+from ..utils._governor import count_retries
+from ..utils.scope._acl import diff_acls
+
+logger = logging.getLogger(__name__)
+
+
+async def extract_scopes(profile: str) -> List[Dict[str, str]]:
+    """Get the list of secret scopes from the configured workspace
+
+    :param str profile: The profile configured for the workspace
+
+    :return: The available secret scopes with their name, backend and url
+    :rtype: List[Dict[str, str]]
+    """
+    # Use the cached scopes if fresh
+    existing_scopes = await cache_get(profile, 'scopes')
+
+    # Query what scopes exists
+    if existing_scopes is None:
+        logger.info('Extracting scope information')
+        existing_scopes = await get_async_backend(profile).list_scopes()
+        await cache_set(profile, 'scopes', existing_scopes)
+
+    return existing_scopes
+
+
+async def create_scope(scope: str, resource_id: str, key_vault_name: str, profile: str):
+    """Function for creating a secret scope from databricks
+
+    :param str scope: The scope to create
+    :param str resource_id: The resource id of the key vault
+    :param str key_vault_name: The key vault to add
+    :param str profile: The profile configured for the workspace
+    """
+    dns_name = f'https://{key_vault_name}.vault.azure.net/'
+
+    # Create the scope with the azure ad token of the current identity
+    logger.info(f'Creating secret scope: {scope}')
+    backend = await get_async_aad_backend(profile)
+    await backend.create_scope(scope=scope, resource_id=resource_id, dns_name=dns_name)
+
+    # Add the scope to the cached scopes
+    await cache_update(
+        profile,
+        'scopes',
+        lambda scopes: scopes + [{'name': scope, 'backend': 'AZURE_KEYVAULT', 'url': dns_name}]
+    )
+
+
+async def delete_scope(scope: str, profile: str):
+    """Function for deleting a secret scope from databricks
+
+    :param str scope: The scope to create
+    :param str profile: The profile configured for the workspace
+    """
+    # Delete the scope
+    logger.warning(f'Deleting secret scope: {scope}')
+    await get_async_backend(profile).delete_scope(scope)
+    await cache_update(profile, 'scopes', lambda scopes: [s for s in scopes if s['name'] != scope])
+
+
+async def get_acls(scope: str, profile: str) -> Dict[str, str]:
+    """Get the list of acls from the supplied secret scope
+
+    :param str scope: The scope to extract from
+    :param str profile: The profile configured for the workspace
+
+    :return: The available groups
+    :rtype: Dict[str, str]
+    """
+    # Get the acls for the scope
+    return await get_async_backend(profile).list_acls(scope)
+
+
+async def add_acl(group: str, permission: str, scope: str, profile: str):
+    """Add an acl to the supplied secret scope, overwriting any existing permission of the group
+
+    :param str group: The group for which to add the permission
+    :param str permission: The permission to add
+    :param str scope: The scope to extract from
+    :param str profile: The profile configured for the workspace
+    """
+    # Add the acl
+    logger.info(f'Adding {permission} to {scope} for {group}')
+    await get_async_backend(profile).put_acl(scope, group, permission)
+
+
+async def delete_acl(group: str, scope: str, profile: str):
+    """Remove an acl to the supplied secret scope
+
+    :param str group: The group for which to remove the permission
+    :param str scope: The scope to extract from
+    :param str profile: The profile configured for the workspace
+    """
+    # Remove the existing acl
+    logger.warning(f'Removing existing acl to {scope} for {group}')
+    await get_async_backend(profile).delete_acl(scope, group)
+
+
+async def set_acls(
+        existing_acls: Dict[str, str],
+        desired_acls: Dict[str, str],
+        scope: str,
+        profile: str,
+        max_concurrency: int = 8) -> List[Dict]:
+    """Enforce the list of acls for the supplied secret scope
+
+    :param Dict[str, str] existing_acls: The acls in the scope
+    :param Dict[str, str] desired_acls: The acls to add to the scope
+    :param str scope: The scope to extract from
+    :param str profile: The profile configured for the workspace
+    :param int max_concurrency: The maximum number of concurrent acl calls
+
+    :return: The applied changes with their duration and retries
+    :rtype: List[Dict]
+    """
+    changes = diff_acls(existing_acls, desired_acls)
+
+    # Apply the changes
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def apply_change(change: Dict) -> Dict:
+        async with semaphore:
+            start = time.perf_counter()
+            with count_retries() as counter:
+                if change['action'] == 'delete':
+                    await delete_acl(change['principal'], scope, profile)
+                else:
+                    await add_acl(change['principal'], change['permission'], scope, profile)
+            change['duration'] = time.perf_counter() - start
+            change['retries'] = counter['retries']
+        return change
+
+    return list(await asyncio.gather(*(apply_change(change) for change in changes)))
@@ -0,0 +1 @@
+from ._apply import apply_cli
@@ -0,0 +1,78 @@
+from argparse import Namespace
+from concurrent.futures import as_completed
+
+import logging
+
+from ._manifest import load_manifest
+from ..cluster import update_cluster
+from ..scope import update_scope
+from ..utils._groups import get_groups
+from ..utils._pool import ContextThreadPoolExecutor
+from ..utils._profile import extract_profile
+from ..utils.cluster._extract import extract_clusters
+from ..utils.scope._extract import extract_scopes
+
+logger = logging.getLogger(__name__)
+
+
+def apply_cli(args: Namespace):
+    """Reconciles every cluster and secret scope listed in a workspace manifest
+
+    :param Namespace args: The arguments from the cli
+    :return:
+    """
+    # Load the manifest
+    manifest = load_manifest(args.f)
+
+    # Get the base profile, the cli argument takes precedence over the manifest
+    if args.profile is None:
+        args.profile = manifest['profile']
+    profile, base_config = extract_profile(args)
+
+    # Get the shared workspace state once
+    groups = get_groups(profile)
+    clusters = list(extract_clusters(profile)) if manifest['clusters'] else []
+    scopes = {scope['name']: scope for scope in extract_scopes(profile)} if manifest['scopes'] else {}
+
+    # Reconcile the resources concurrently
+    failures = {}
+    with ContextThreadPoolExecutor(max_workers=args.workers) as executor:
+        futures = {}
+        for cluster in manifest['clusters']:
+            future = executor.submit(
+                update_cluster,
+                cluster['name'],
+                profile,
+                base_config,
+                groups,
+                clusters,
+                run=cluster['run'],
+                edit=cluster['edit'],
+                spark_query=cluster['spark_version'],
+                spark_variant=cluster['spark_variant']
+            )
+            futures[future] = f'cluster {cluster["name"]}'
+        for scope in manifest['scopes']:
+            future = executor.submit(
+                update_scope,
+                scope['scope_name'],
+                scope['key_vault'],
+                scope['resource_id'],
+                profile,
+                base_config,
+                groups,
+                scopes,
+                force=scope['force']
+            )
+            futures[future] = f'scope {scope["scope_name"]}'
+
+        for future in as_completed(futures):
+            try:
+                future.result()
+                logger.info(f'Reconciled {futures[future]}')
+            except Exception as e:
+                logger.error(f'Failed to reconcile {futures[future]}: {e}')
+                failures[futures[future]] = e
+
+    if failures:
+        raise RuntimeError(f'{len(failures)} of {len(futures)} resources failed to reconcile: {sorted(failures)}')
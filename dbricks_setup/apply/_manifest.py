@@ -0,0 +1,69 @@
+from typing import Dict, List
+
+import yaml
+
+from ..utils.cluster._spark import VARIANTS
+
+
+def load_manifest(path: str) -> Dict[str, List[Dict]]:
+    """Load and validate a workspace manifest
+
+    A manifest lists the clusters and key vault backed scopes of a workspace, the spark variant is one of standard, ml,
+    gpu-ml or photon:
+
+        profile: DEFAULT
+        clusters:
+          - name: my-cluster
+            run: false
+            edit: false
+            spark_version: lts
+            spark_variant: standard
+        scopes:
+          - key_vault: my-key-vault
+            resource_id: /subscriptions/.../vaults/my-key-vault
+            scope_name: my-scope
+            force: false
+
+    :param str path: The path of the manifest file
+
+    :return: The manifest with defaults applied and duplicates removed
+    :rtype: Dict[str, List[Dict]]
+    """
+    with open(path, 'r') as f:
+        manifest = yaml.safe_load(f) or {}
+
+    # Normalize the clusters, the last entry for a name wins
+    clusters = {}
+    for cluster in manifest.get('clusters') or []:
+        if 'name' not in cluster:
+            raise ValueError(f'Cluster entry {cluster} in {path} is missing a name')
+        name = str(cluster['name']).lower()
+        spark_variant = str(cluster.get('spark_variant', 'standard'))
+        if spark_variant not in VARIANTS:
+            raise ValueError(f'Cluster {name} in {path} has the spark variant {spark_variant}, expected one of {VARIANTS}')
+        clusters[name] = {
+            'name': name,
+            'run': bool(cluster.get('run', False)),
+            'edit': bool(cluster.get('edit', False)),
+            'spark_version': str(cluster.get('spark_version', 'latest')),
+            'spark_variant': spark_variant,
+        }
+
+    # Normalize the scopes, the last entry for a name wins
+    scopes = {}
+    for scope in manifest.get('scopes') or []:
+        if 'key_vault' not in scope or 'resource_id' not in scope:
+            raise ValueError(f'Scope entry {scope} in {path} requires a key_vault and a resource_id')
+        name = scope.get('scope_name') or scope['key_vault']
+        scopes[name] = {
+            'scope_name': name,
+            'key_vault': scope['key_vault'],
+            'resource_id': scope['resource_id'],
+            'force': bool(scope.get('force', False)),
+        }
+
+    return {
+        'profile': manifest.get('profile'),
+        'clusters': list(clusters.values()),
+        'scopes': list(scopes.values()),
+    }
@@ -1,2 +1,3 @@
+from ._advise import advise_cluster, advise_cluster_cli
 from ._delete import delete_cluster_cli
-from ._update import update_cluster_cli
+from ._update import update_cluster, update_cluster_cli
@@ -0,0 +1,175 @@
+import time
+from argparse import Namespace
+from typing import Dict, Iterable, List, Optional
+
+import logging
+from databricks_cli.configure.provider import DatabricksConfig
+
+from ._update import update_cluster
+from ..utils._backend import get_backend
+from ..utils._groups import find_groups_with_prefixes
+from ..utils._pool import ContextThreadPoolExecutor
+from ..utils._profile import extract_profile
+from ..utils._targets import match_names, run_for_targets
+from ..utils._timing import span
+from ..utils.cluster._extract import extract_clusters, get_cluster_config
+from ..utils.cluster._usage import USAGE_EVENTS, get_sizing, recommend, summarize_events
+
+logger = logging.getLogger(__name__)
+
+# The sizing fields recommended for every cluster
+SIZING_FIELDS = ['min_workers', 'max_workers', 'node_type_id', 'autotermination_minutes']
+
+
+def advise_cluster(
+        cluster_name: str,
+        profile: str,
+        clusters: Iterable[Dict[str, str]],
+        days: int = 30,
+        max_workers_cap: int = 20) -> Optional[Dict]:
+    """Recommend the sizing of a cluster from its event history
+
+    Clusters sharing a name are sized from the history of the first of them.
+
+    :param str cluster_name: The name of the cluster
+    :param str profile: The profile configured for the workspace
+    :param Iterable[Dict[str, str]] clusters: The existing clusters
+    :param int days: The days of event history to read
+    :param int max_workers_cap: The highest maximum workers recommended
+
+    :return: The current configuration, utilization statistics and recommended sizing, None if the cluster is missing
+    :rtype: Optional[Dict]
+    """
+    cluster = next((cluster for cluster in clusters if cluster['name'].lower() == cluster_name), None)
+    if cluster is None:
+        logger.warning(f'Cluster {cluster_name} does not exist')
+        return None
+
+    # Read the events, page by page
+    until = int(time.time() * 1000)
+    with span('get_cluster_events', cluster['cluster_id']):
+        events = get_backend(profile).get_cluster_events(cluster['cluster_id'], until - days * 86400000, USAGE_EVENTS)
+    if events is None:
+        logger.warning(f'Cluster {cluster_name} was deleted')
+        return None
+
+    cluster_config = get_cluster_config(cluster['cluster_id'], profile)
+    stats = summarize_events(events, until)
+    sizing = get_sizing(cluster_config)
+    return {
+        'config': cluster_config,
+        'stats': stats,
+        'sizing': sizing,
+        'recommendation': recommend(stats, sizing, max_workers_cap),
+    }
+
+
+def format_advice(advice: Dict[str, Dict]) -> str:
+    """Format the recommendations of the clusters as a report
+
+    :param Dict[str, Dict] advice: The advice of every cluster from advise_cluster
+
+    :return: The report
+    :rtype: str
+    """
+    report = ''
+    for cluster_name, cluster_advice in sorted(advice.items()):
+        stats, sizing, recommendation = cluster_advice['stats'], cluster_advice['sizing'], cluster_advice['recommendation']
+        report += (
+            f'Cluster {cluster_name}: {stats["running_hours"]:.1f} running hours, {stats["starts"]} starts, '
+            f'{stats["idle_terminations"]} idle terminations, {stats["driver_failures"]} driver failures'
+        )
+        for field in SIZING_FIELDS:
+            if recommendation[field] != sizing[field]:
+                report += f'\n\t{field}: {sizing[field]} -> {recommendation[field]}'
+        for reason in recommendation['reasons']:
+            report += f'\n\t# {reason}'
+        report += '\n'
+    return report.rstrip('\n')
+
+
+def apply_advice(
+        cluster_name: str,
+        profile: str,
+        base_config: DatabricksConfig,
+        groups: Iterable[str],
+        clusters: Iterable[Dict[str, str]],
+        advice: Dict[str, Dict],
+        debug: bool = False):
+    """Write the recommended sizing of a cluster back through the cluster update, keeping its runtime and pool
+
+    :param str cluster_name: The name of the cluster
+    :param str profile: The profile configured for the workspace
+    :param DatabricksConfig base_config: The config of the profile
+    :param Iterable[str] groups: The existing workspace groups, at least the access groups of the cluster
+    :param Iterable[Dict[str, str]] clusters: The existing clusters
+    :param Dict[str, Dict] advice: The advice of every cluster from advise_cluster
+    :param bool debug: Print the plan instead of executing it
+    """
+    for cluster in clusters:
+        if cluster['name'].lower() == cluster_name and cluster['status'] not in ('TERMINATED', 'TERMINATING'):
+            logger.warning(f'Cluster {cluster_name} is {cluster["status"]}, only terminated clusters are resized')
+
+    cluster_config = advice[cluster_name]['config']
+    update_cluster(
+        cluster_name,
+        profile,
+        base_config,
+        groups,
+        clusters,
+        edit=True,
+        spark_version={'key': cluster_config['spark_version']},
+        verify=True,
+        instance_pool_id=cluster_config.get('instance_pool_id'),
+        sizing={field: advice[cluster_name]['recommendation'][field] for field in SIZING_FIELDS},
+        debug=debug
+    )
+
+
+def advise_cluster_cli(args: Namespace):
+    """Recommends the sizing of the clusters of the databricks instance defined in the current profile from their event
+    history, and optionally applies it
+
+    :param Namespace args: The arguments from the cli
+    :return:
+    """
+    # Get the base profile
+    profile, base_config = extract_profile(args)
+
+    # Get the existing clusters once
+    clusters = list(extract_clusters(profile))
+    cluster_names = match_names(args.name or ['*'], [cluster['name'] for cluster in clusters], case_sensitive=False)
+
+    # Read the history of the clusters concurrently
+    with ContextThreadPoolExecutor(max_workers=max(1, args.workers)) as executor:
+        results = executor.map(
+            lambda name: advise_cluster(name, profile, clusters, args.days, args.max_workers_cap), cluster_names
+        )
+        advice = {name: result for name, result in zip(cluster_names, results) if result is not None}
+
+    print(format_advice(advice))
+
+    # Only write back the changed clusters
+    changed: List[str] = [
+        name
+        for name, cluster_advice
+        in advice.items()
+        if any(cluster_advice['recommendation'][f] != cluster_advice['sizing'][f] for f in SIZING_FIELDS)
+    ]
+    if not args.apply or not changed:
+        return
+
+    # Check for confirmation
+    if args.d or args.q or input(f'Apply the sizing of {len(changed)} clusters? (Y/N):').upper() == 'Y':
+        groups = find_groups_with_prefixes([f'cluster-{name}-' for name in changed], profile)
+        run_for_targets(
+            apply_advice,
+            changed,
+            max_workers=1 if args.d else args.workers,
+            profile=profile,
+            base_config=base_config,
+            groups=groups,
+            clusters=clusters,
+            advice=advice,
+            debug=args.d
+        )
@@ -1,9 +1,14 @@
 from argparse import Namespace
+from typing import Dict, List
 
 import logging
+from databricks_cli.configure.provider import DatabricksConfig
 
-from ..utils._groups import delete_group, get_groups
+from ..utils._groups import delete_groups, find_groups_with_prefixes
+from ..utils._plan import Plan
+from ..utils._pool import ContextThreadPoolExecutor
 from ..utils._profile import extract_profile
+from ..utils._targets import match_names
 from ..utils.cluster._acl import get_acls, set_acls
 from ..utils.cluster._delete import terminate_cluster, delete_cluster
 from ..utils.cluster._extract import extract_clusters
@@ -12,70 +17,54 @@ logger = logging.getLogger(__name__)
 
 
 def delete_cluster_cli(args: Namespace):
-    """Updates the secret scope configuration of the databricks instance defined in the current profile
+    """Deletes clusters and connected items of the databricks instance defined in the current profile
 
     :param Namespace args: The arguments from the cli
     :return:
     """
-    # Set the name
-    cluster_name = args.name.lower()
-
     # Get the base profile
     profile, base_config = extract_profile(args)
 
-    # Get the workspace groups
-    groups = get_groups(profile)
+    # Get the existing clusters once
+    clusters = list(extract_clusters(profile))
+
+    # Set the names, patterns only select existing clusters
+    cluster_names = match_names(args.name, [cluster['name'] for cluster in clusters], case_sensitive=False)
 
-    # Get the existing cluster
-    clusters = extract_clusters(profile)
+    # Get the access groups of the clusters
+    groups = find_groups_with_prefixes([f'cluster-{name}-' for name in cluster_names], profile)
 
-    # Get the clusters matching the desired name
+    # Get the clusters matching the desired names
     matching_clusters = [
         cluster
         for cluster
         in clusters
-        if cluster['name'].lower() == cluster_name
+        if cluster['name'].lower() in cluster_names
     ]
 
     # Set access groups
-    access_groups = {
-        f'cluster-{cluster_name}-manage': 'CAN_MANAGE',
-        f'cluster-{cluster_name}-restart': 'CAN_RESTART',
-        f'cluster-{cluster_name}-attach': 'CAN_ATTACH_TO',
-    }
+    access_groups = [
+        f'cluster-{cluster_name}-{access}'
+        for cluster_name
+        in cluster_names
+        for access
+        in ['manage', 'restart', 'attach']
+    ]
 
     # Filter the existing groups
     existing_groups = [group for group in access_groups if group in groups]
 
-    # Set the permission structure
-    permissions = {
-    }
+    # Get the existing permissions of every cluster concurrently
+    with ContextThreadPoolExecutor(max_workers=max(1, min(args.workers, len(matching_clusters)))) as executor:
+        cluster_acls = executor.map(lambda cluster: get_acls(cluster['cluster_id'], base_config), matching_clusters)
+        permissions = {
+            cluster['cluster_id']: extract_permissions(cluster_permissions)
+            for cluster, cluster_permissions
+            in zip(matching_clusters, cluster_acls)
+        }
 
-    # Get the existing permissions
-    for cluster in matching_clusters:
-        cluster_id = cluster['cluster_id']
-        permissions[cluster_id] = []
-
-        # Get the permissions for the cluster
-        cluster_permissions = get_acls(cluster_id, base_config)
-        for acl in cluster_permissions.get('access_control_list', []):
-            principal = acl.get('group_name', acl.get('user_name', 'UNKOWN'))
-            acl_permissions = set(
-                permission['permission_level']
-                for permission
-                in acl['all_permissions']
-                if not permission['inherited']
-            )
-            if acl_permissions:
-                permissions[cluster_id].append(
-                    {
-                        'principal': principal,
-                        'permissions': sorted(acl_permissions)
-                    }
-                )
-        # Remove empty lists
-        if not permissions[cluster_id]:
-            permissions.pop(cluster_id)
+    # Remove empty lists
+    permissions = {cluster_id: acls for cluster_id, acls in permissions.items() if acls}
 
     # Set deletions
     to_delete = {
@@ -107,19 +96,78 @@ def delete_cluster_cli(args: Namespace):
             for permission in permission_list:
                 deletion_warning += f'\n\t\t{(permission["principal"]+":").ljust(30)}{permission["permissions"]}'
     deletion_warning = 'The following resources will be deleted:' + deletion_warning
+    plan = plan_cluster_deletion(to_delete, profile, base_config)
     if args.d:
         print(deletion_warning)
+        print(plan.describe())
 
     # Delete items
     elif to_delete and (args.q or input(deletion_warning + '\n(Y/N):').upper() == 'Y'):
-        for cluster_id in to_delete.get('permissions', {}):
-            # Remove permissions
-            set_acls({}, cluster_id, base_config)
-        for group in to_delete.get('groups', []):
-            # Remove the existing group
-            delete_group(group, profile)
-        for cluster in to_delete.get('clusters', []):
-            # Delete the cluster
-            cluster_id = cluster['cluster_id']
-            cluster_name = cluster['name']
-            delete_cluster(cluster_id, cluster_name, profile)
+        plan.execute()
+
+
+def extract_permissions(cluster_permissions: Dict) -> List[Dict]:
+    """Get the explicitly granted permissions of a cluster
+
+    :param Dict cluster_permissions: The permissions of the cluster as returned by the permissions api
+
+    :return: The principals with their permissions
+    :rtype: List[Dict]
+    """
+    permissions = []
+    for acl in cluster_permissions.get('access_control_list', []):
+        principal = acl.get('group_name', acl.get('user_name', 'UNKOWN'))
+        acl_permissions = set(
+            permission['permission_level']
+            for permission
+            in acl['all_permissions']
+            if not permission['inherited']
+        )
+        if acl_permissions:
+            permissions.append(
+                {
+                    'principal': principal,
+                    'permissions': sorted(acl_permissions)
+                }
+            )
+    return permissions
+
+
+def plan_cluster_deletion(to_delete: Dict, profile: str, base_config: DatabricksConfig) -> Plan:
+    """Plans the deletion of clusters and connected items, acls are revoked before their groups and clusters are deleted
+
+    :param Dict to_delete: The clusters, groups and permissions to delete
+    :param str profile: The profile configured for the workspace
+    :param DatabricksConfig base_config: The config of the profile
+
+    :return: The plan
+    :rtype: Plan
+    """
+    plan = Plan()
+
+    # Remove permissions
+    acl_keys = {
+        cluster_id: plan.add('revoke_cluster_acls', cluster_id, set_acls, {}, cluster_id, base_config)
+        for cluster_id
+        in to_delete.get('permissions', {})
+    }
+
+    # Remove the existing groups
+    groups = to_delete.get('groups', [])
+    if groups:
+        plan.add('delete_groups', ', '.join(groups), delete_groups, groups, profile, depends_on=acl_keys.values())
+
+    # Delete the clusters
+    for cluster in to_delete.get('clusters', []):
+        cluster_id = cluster['cluster_id']
+        plan.add(
+            'delete_cluster',
+            f'{cluster["name"]} ({cluster_id})',
+            delete_cluster,
+            cluster_id,
+            cluster['name'],
+            profile,
+            depends_on=[acl_keys[cluster_id]] if cluster_id in acl_keys else []
+        )
+
+    return plan
@@ -0,0 +1,114 @@
+from typing import Dict, Iterable, Tuple, Union
+
+import logging
+from databricks_cli.configure.provider import DatabricksConfig
+
+from ..utils._groups import create_groups
+from ..utils._plan import Plan, Ref
+from ..utils.cluster._acl import plan_acls
+from ..utils.cluster._config import diff_config
+from ..utils.instance_pool._acl import add_acls, get_acls, set_acls
+from ..utils.instance_pool._config import EDITABLE_FIELDS, get_access_groups
+from ..utils.instance_pool._create import create_pool, edit_pool, find_pool
+
+logger = logging.getLogger(__name__)
+
+
+def plan_pool_update(
+        pool_name: str,
+        profile: str,
+        base_config: DatabricksConfig,
+        groups: Iterable[str],
+        pool_config: Dict) -> Tuple[Plan, Union[str, Ref]]:
+    """Plans the changes creating or updating an instance pool with its access groups
+
+    :param str pool_name: The name of the instance pool
+    :param str profile: The profile configured for the workspace
+    :param DatabricksConfig base_config: The config of the profile
+    :param Iterable[str] groups: The existing workspace groups, at least the access groups of the pool
+    :param Dict pool_config: The desired configuration of the pool
+
+    :return: The plan, and the id of the pool or a reference to the id of the pool once created
+    :rtype: Tuple[Plan, Union[str, Ref]]
+    """
+    plan = Plan()
+    access_groups = get_access_groups(pool_name)
+    existing_pool = find_pool(pool_name, profile)
+
+    # Create the pool
+    pool_keys = []
+    if existing_pool is None:
+        create_key = plan.add('create_pool', pool_name, create_pool, profile, pool_config)
+        pool_id = Ref(create_key)
+        pool_keys.append(create_key)
+        write = {'action': 'set', 'acls': access_groups}
+
+    # Update the pool, only the capacity can change once it exists
+    else:
+        pool_id = existing_pool['instance_pool_id']
+        editable_config = {key: pool_config[key] for key in EDITABLE_FIELDS}
+        changed = diff_config(existing_pool, editable_config)
+        if changed:
+            logger.info(f'Configuration of pool {pool_name} differs in {sorted(changed)}')
+            edit_config = {
+                'instance_pool_id': pool_id,
+                'instance_pool_name': pool_name,
+                'node_type_id': existing_pool['node_type_id'],
+                **editable_config
+            }
+            plan.add('edit_pool', pool_name, edit_pool, profile, edit_config)
+        else:
+            logger.info(f'Configuration of pool {pool_name} is up to date')
+
+        fixed = diff_config(existing_pool, {k: v for k, v in pool_config.items() if k not in EDITABLE_FIELDS})
+        if fixed:
+            logger.warning(f'Pool {pool_name} differs in {sorted(fixed)}, which only changes when it is recreated')
+
+        write = plan_acls(get_acls(pool_id, base_config), access_groups)
+
+    # Filter and create the missing groups
+    group_keys = []
+    missing_groups = [group for group in access_groups if group not in groups]
+    if missing_groups:
+        group_keys.append(plan.add('create_groups', ', '.join(missing_groups), create_groups, missing_groups, profile))
+
+    # Only write the acls that changed, a new pool gets every acl
+    if write['action'] == 'set':
+        plan.add('set_pool_acls', pool_name, set_acls, write['acls'], pool_id, base_config,
+                 depends_on=group_keys + pool_keys)
+    elif write['action'] == 'add':
+        plan.add('add_pool_acls', pool_name, add_acls, write['acls'], pool_id, base_config, depends_on=group_keys)
+    else:
+        logger.info(f'Acls of pool {pool_name} are up to date')
+
+    return plan, pool_id
+
+
+def update_pool(
+        pool_name: str,
+        profile: str,
+        base_config: DatabricksConfig,
+        groups: Iterable[str],
+        pool_config: Dict,
+        debug: bool = False) -> str:
+    """Creates or updates an instance pool with its access groups
+
+    :param str pool_name: The name of the instance pool
+    :param str profile: The profile configured for the workspace
+    :param DatabricksConfig base_config: The config of the profile
+    :param Iterable[str] groups: The existing workspace groups, at least the access groups of the pool
+    :param Dict pool_config: The desired configuration of the pool
+    :param bool debug: Print the plan instead of executing it
+
+    :return: The id of the pool, a placeholder when a new pool is only planned
+    :rtype: str
+    """
+    plan, pool_id = plan_pool_update(pool_name, profile, base_config, groups, pool_config)
+
+    # Provide the debug output
+    if debug:
+        print(plan.describe())
+        return repr(pool_id) if isinstance(pool_id, Ref) else pool_id
+
+    results = plan.execute()
+    return results[pool_id.key] if isinstance(pool_id, Ref) else pool_id
@@ -1,14 +1,22 @@
 from argparse import Namespace
+from typing import Dict, Iterable
 
 import logging
+from databricks_cli.configure.provider import DatabricksConfig
 
-from ..utils._groups import create_groups, get_groups
+from ._instance_pool import update_pool
+from ..utils._groups import create_groups, find_groups, find_groups_with_prefixes
+from ..utils._plan import Plan, Ref
+from ..utils._fingerprint import FINGERPRINT_TAG
 from ..utils._profile import extract_profile
-from ..utils.cluster._acl import set_acls
-from ..utils.cluster._config import create_config
+from ..utils._targets import match_names, run_for_targets
+from ..utils.cluster._acl import add_acls, get_acls, parse_acls, plan_acls, set_acls
+from ..utils.cluster._config import create_config, diff_config, find_sizing, get_access_groups, tag_config
 from ..utils.cluster._create import create_cluster, edit_cluster
 from ..utils.cluster._delete import terminate_cluster
-from ..utils.cluster._extract import extract_clusters
+from ..utils.cluster._extract import extract_clusters, extract_spark, get_cluster_config
+from ..utils.cluster._wait import wait_for_clusters
+from ..utils.instance_pool._config import create_pool_config
 
 logger = logging.getLogger(__name__)
 
@@ -19,17 +27,162 @@ def update_cluster_cli(args: Namespace):
     :param Namespace args: The arguments from the cli
     :return:
     """
-    # Set the name
-    cluster_name = args.name.lower()
-
     # Get the base profile
     profile, base_config = extract_profile(args)
 
-    # Get the workspace groups
-    groups = get_groups(profile)
+    # Get the existing clusters once
+    clusters = list(extract_clusters(profile))
+
+    # Set the names, patterns only select existing clusters
+    cluster_names = match_names(args.name, [cluster['name'] for cluster in clusters], case_sensitive=False)
+
+    # Create or update the instance pool of the clusters first
+    instance_pool_id = None
+    if args.pool is not None:
+        pool_config = create_pool_config(
+            args.pool,
+            extract_spark(profile, args.spark_version, args.spark_variant),
+            min_idle=args.pool_min_idle,
+            max_capacity=args.pool_max_capacity,
+            idle_minutes=args.pool_idle_minutes,
+            availability=args.pool_availability
+        )
+        pool_groups = find_groups(f'pool-{args.pool}-', profile)
+        instance_pool_id = update_pool(args.pool, profile, base_config, pool_groups, pool_config, debug=args.d)
+
+    # Skip the clusters tagged with the fingerprint of their desired state
+    if not args.verify:
+        cluster_names = [
+            name
+            for name
+            in cluster_names
+            if not is_current(name, clusters, profile, args.spark_version, args.spark_variant, instance_pool_id)
+        ]
+        if not cluster_names:
+            logger.info('Every cluster matches its desired state')
+            return
+
+    # Get the access groups of the clusters
+    groups = find_groups_with_prefixes([f'cluster-{name}-' for name in cluster_names], profile)
+
+    # Update the clusters, one at a time when printing the plans
+    run_for_targets(
+        update_cluster,
+        cluster_names,
+        max_workers=1 if args.d else args.workers,
+        profile=profile,
+        base_config=base_config,
+        groups=groups,
+        clusters=clusters,
+        run=args.r,
+        edit=args.e,
+        spark_query=args.spark_version,
+        spark_variant=args.spark_variant,
+        wait_timeout=args.wait_timeout,
+        verify=args.verify,
+        instance_pool_id=instance_pool_id,
+        debug=args.d
+    )
+
+
+def update_cluster(
+        cluster_name: str,
+        profile: str,
+        base_config: DatabricksConfig,
+        groups: Iterable[str],
+        clusters: Iterable[Dict[str, str]],
+        run: bool = False,
+        edit: bool = False,
+        spark_version: Dict[str, str] = None,
+        spark_query: str = 'latest',
+        spark_variant: str = 'standard',
+        wait_timeout: float = 1200.0,
+        verify: bool = False,
+        instance_pool_id: str = None,
+        sizing: Dict = None,
+        debug: bool = False,
+        max_workers: int = 8):
+    """Updates a single cluster against already extracted workspace state
+
+    :param str cluster_name: The name of the cluster
+    :param str profile: The profile configured for the workspace
+    :param DatabricksConfig base_config: The config of the profile
+    :param Iterable[str] groups: The existing workspace groups, at least the access groups of the cluster
+    :param Iterable[Dict[str, str]] clusters: The existing workspace clusters
+    :param bool run: Allow the cluster to run after creation
+    :param bool edit: Force the cluster reconfiguration
+    :param Dict[str, str] spark_version: The spark version to use, extracted from the workspace if not supplied
+    :param str spark_query: The spark version to extract, latest, lts, a release like 13.x, or a runtime key
+    :param str spark_variant: The spark runtime variant to extract, standard, ml, gpu-ml or photon
+    :param float wait_timeout: The maximum time in seconds to wait for terminating clusters before editing them
+    :param bool verify: Compare the acls and configuration of clusters tagged with a matching fingerprint
+    :param str instance_pool_id: The instance pool the clusters take their nodes from
+    :param Dict sizing: The minimum and maximum workers, node type and autotermination, the tagged sizing or the
+        defaults if not supplied
+    :param bool debug: Print the plan instead of executing it
+    :param int max_workers: The maximum number of concurrent operations
+    """
+    plan = plan_cluster_update(
+        cluster_name,
+        profile,
+        base_config,
+        groups,
+        clusters,
+        run=run,
+        edit=edit,
+        spark_version=spark_version,
+        spark_query=spark_query,
+        spark_variant=spark_variant,
+        wait_timeout=wait_timeout,
+        verify=verify,
+        instance_pool_id=instance_pool_id,
+        sizing=sizing
+    )
+
+    # Provide the debug output
+    if debug:
+        print(plan.describe())
+    else:
+        plan.execute(max_workers)
+
+
+def plan_cluster_update(
+        cluster_name: str,
+        profile: str,
+        base_config: DatabricksConfig,
+        groups: Iterable[str],
+        clusters: Iterable[Dict[str, str]],
+        run: bool = False,
+        edit: bool = False,
+        spark_version: Dict[str, str] = None,
+        spark_query: str = 'latest',
+        spark_variant: str = 'standard',
+        wait_timeout: float = 1200.0,
+        verify: bool = False,
+        instance_pool_id: str = None,
+        sizing: Dict = None) -> Plan:
+    """Plans the changes updating a single cluster against already extracted workspace state
+
+    :param str cluster_name: The name of the cluster
+    :param str profile: The profile configured for the workspace
+    :param DatabricksConfig base_config: The config of the profile
+    :param Iterable[str] groups: The existing workspace groups, at least the access groups of the cluster
+    :param Iterable[Dict[str, str]] clusters: The existing workspace clusters
+    :param bool run: Allow the cluster to run after creation
+    :param bool edit: Force the cluster reconfiguration
+    :param Dict[str, str] spark_version: The spark version to use, extracted from the workspace if not supplied
+    :param str spark_query: The spark version to extract, latest, lts, a release like 13.x, or a runtime key
+    :param str spark_variant: The spark runtime variant to extract, standard, ml, gpu-ml or photon
+    :param float wait_timeout: The maximum time in seconds to wait for terminating clusters before editing them
+    :param bool verify: Compare the acls and configuration of clusters tagged with a matching fingerprint
+    :param str instance_pool_id: The instance pool the clusters take their nodes from
+    :param Dict sizing: The minimum and maximum workers, node type and autotermination, the tagged sizing or the
+        defaults if not supplied
 
-    # Get the existing cluster
-    clusters = extract_clusters(profile)
+    :return: The plan
+    :rtype: Plan
+    """
+    plan = Plan()
 
     # Get the clusters matching the desired name
     matching_clusters = [
@@ -39,47 +192,207 @@ def update_cluster_cli(args: Namespace):
         if cluster['name'].lower() == cluster_name
     ]
 
-    # Create the cluster configuration
-    cluster_config = create_config(cluster_name, profile)
+    # Keep the sizing the clusters were tagged with, i.e. by the advise
+    if sizing is None:
+        sizing = find_sizing(matching_clusters)
+
+    # Set access groups
+    access_groups = get_access_groups(cluster_name)
+
+    # Create the cluster configuration, only resolving the spark version when the cluster is created, edited or tagged
+    cluster_config = None
+    fingerprinted = not verify and any(cluster.get('fingerprint') for cluster in matching_clusters)
+    if not matching_clusters or edit or fingerprinted:
+        if spark_version is None:
+            spark_version = extract_spark(profile, spark_query, spark_variant)
+        cluster_config = create_config(cluster_name, profile, spark_version, instance_pool_id, sizing)
+        cluster_config = tag_config(cluster_config, access_groups)
+
+    # Skip the clusters tagged with the fingerprint of their desired state
+    if fingerprinted:
+        desired_fingerprint = cluster_config['custom_tags'][FINGERPRINT_TAG]
+        current = [cluster for cluster in matching_clusters if cluster.get('fingerprint') == desired_fingerprint]
+        for cluster in current:
+            logger.info(f'Cluster {cluster_name} ({cluster["cluster_id"]}) matches its desired state')
+        matching_clusters = [cluster for cluster in matching_clusters if cluster not in current]
+        if not matching_clusters:
+            return plan
 
-    # Create the cluster
+    # Create the cluster, the fingerprint is only tagged once its acls are written
+    depends_on = {}
     if not matching_clusters:
-        cluster_id = create_cluster(profile, cluster_config)
-        cluster_status = 'PENDIING'
+        untagged_config = {
+            **cluster_config,
+            'custom_tags': {k: v for k, v in cluster_config['custom_tags'].items() if k != FINGERPRINT_TAG}
+        }
+        create_key = plan.add('create_cluster', cluster_name, create_cluster, profile, untagged_config)
+        cluster_status = 'PENDING'
+        depends_on[create_key] = [create_key]
 
         # Terminate the newly started cluster
-        if not args.r:
-            terminate_cluster(cluster_id, cluster_name, profile)
-            cluster_status = 'TERMINATED'
+        if not run:
+            terminate_key = plan.add(
+                'terminate_cluster',
+                cluster_name,
+                terminate_cluster,
+                Ref(create_key),
+                cluster_name,
+                profile,
+                depends_on=[create_key]
+            )
+            cluster_status = 'TERMINATING'
+            depends_on[create_key].append(terminate_key)
 
         # Add the new cluster to the configuration
         matching_clusters.append(
             {
                 'name': cluster_name,
-                'cluster_id': cluster_id,
+                'cluster_id': Ref(create_key),
                 'status': cluster_status
             }
         )
 
-    # Set access groups
-    access_groups = {
-        f'cluster-{cluster_name}-manage': 'CAN_MANAGE',
-        f'cluster-{cluster_name}-restart': 'CAN_RESTART',
-        f'cluster-{cluster_name}-attach': 'CAN_ATTACH_TO',
-    }
-
     # Filter and create the missing groups
+    group_keys = []
     missing_groups = [group for group in access_groups if group not in groups]
     if missing_groups:
-        create_groups(missing_groups, profile)
+        group_keys.append(plan.add('create_groups', ', '.join(missing_groups), create_groups, missing_groups, profile))
 
     # Update the clusters
     for cluster in matching_clusters:
-        set_acls(access_groups, cluster['cluster_id'], base_config)
+        cluster_id = cluster['cluster_id']
+        target = f'{cluster_name} ({cluster_id})' if len(matching_clusters) > 1 else cluster_name
+        cluster_keys = depends_on.get(getattr(cluster_id, 'key', None), [])
+
+        # Only write the acls that changed, a new cluster gets every acl
+        if isinstance(cluster_id, Ref):
+            write = {'action': 'set', 'acls': access_groups}
+        else:
+            write = plan_acls(parse_acls(get_acls(cluster_id, base_config)), access_groups)
+
+        acl_keys = []
+        if write['action'] == 'set':
+            acl_keys = [plan.add(
+                'set_cluster_acls',
+                target,
+                set_acls,
+                write['acls'],
+                cluster_id,
+                base_config,
+                depends_on=group_keys + cluster_keys[:1]
+            )]
+        elif write['action'] == 'add':
+            acl_keys = [plan.add(
+                'add_cluster_acls',
+                target,
+                add_acls,
+                write['acls'],
+                cluster_id,
+                base_config,
+                depends_on=group_keys
+            )]
+        else:
+            logger.info(f'Acls of {target} are up to date')
+
+        # Tag a new cluster with its fingerprint once terminated, a running cluster is tagged by its next edit
+        if isinstance(cluster_id, Ref):
+            if run:
+                logger.info(f'Cluster {target} is tagged with its fingerprint once edited')
+                continue
+            plan.add(
+                'tag_cluster',
+                target,
+                _edit_cluster,
+                cluster_id,
+                cluster['status'],
+                cluster_config,
+                profile,
+                wait_timeout,
+                depends_on=cluster_keys + acl_keys
+            )
+
+        # Update the cluster configuration once terminated, if it differs
+        if edit and cluster['status'] in ('TERMINATED', 'TERMINATING') and not isinstance(cluster_id, Ref):
+            # Only edit a cluster still terminated, the listed status may predate a restart
+            existing_config = get_cluster_config(cluster_id, profile)
+            status = existing_config.get('state', cluster['status'])
+            if status not in ('TERMINATED', 'TERMINATING'):
+                logger.warning(f'Cluster {target} is {status}, its configuration is updated once terminated')
+                continue
+
+            # Keep the custom tags set outside of this tool
+            edit_config = {
+                **cluster_config,
+                'custom_tags': {**existing_config.get('custom_tags', {}), **cluster_config['custom_tags']}
+            }
+            changed = diff_config(existing_config, edit_config)
+            if not changed:
+                logger.info(f'Configuration of {target} is up to date')
+                continue
+
+            logger.info(f'Configuration of {target} differs in {sorted(changed)}')
+            plan.add(
+                'edit_cluster',
+                target,
+                _edit_cluster,
+                cluster_id,
+                status,
+                edit_config,
+                profile,
+                wait_timeout,
+                depends_on=cluster_keys + acl_keys
+            )
+
+    return plan
 
-        # Update the cluster configuration
-        if cluster['status'] == 'TERMINATED' and args.e:
-            cluster_config['cluster_id'] = cluster['cluster_id']
-            edit_cluster(profile, cluster_config)
 
-    return
+def is_current(
+        cluster_name: str,
+        clusters: Iterable[Dict[str, str]],
+        profile: str,
+        spark_query: str = 'latest',
+        spark_variant: str = 'standard',
+        instance_pool_id: str = None,
+        sizing: Dict = None) -> bool:
+    """Check whether every cluster of a name is tagged with the fingerprint of its desired state
+
+    Only the cluster list is needed, the spark versions are read once the first tagged cluster is checked and the sizing
+    is read from the tags of the clusters when not supplied.
+
+    :param str cluster_name: The name of the cluster
+    :param Iterable[Dict[str, str]] clusters: The existing workspace clusters
+    :param str profile: The profile configured for the workspace
+    :param str spark_query: The spark version to extract, latest, lts, a release like 13.x, or a runtime key
+    :param str spark_variant: The spark runtime variant to extract, standard, ml, gpu-ml or photon
+    :param str instance_pool_id: The instance pool the clusters take their nodes from
+    :param Dict sizing: The minimum and maximum workers, node type and autotermination, the tagged sizing or the
+        defaults if not supplied
+
+    :return: Whether the clusters match their desired state
+    :rtype: bool
+    """
+    matching_clusters = [cluster for cluster in clusters if cluster['name'].lower() == cluster_name]
+    if not matching_clusters or not all(cluster.get('fingerprint') for cluster in matching_clusters):
+        return False
+
+    if sizing is None:
+        sizing = find_sizing(matching_clusters)
+    spark_version = extract_spark(profile, spark_query, spark_variant)
+    cluster_config = tag_config(
+        create_config(cluster_name, profile, spark_version, instance_pool_id, sizing), get_access_groups(cluster_name)
+    )
+    return all(cluster['fingerprint'] == cluster_config['custom_tags'][FINGERPRINT_TAG] for cluster in matching_clusters)
+
+
+def _edit_cluster(cluster_id: str, status: str, cluster_config: Dict, profile: str, wait_timeout: float):
+    """Edits a cluster, waiting for it to finish terminating first
+
+    :param str cluster_id: The id of the cluster
+    :param str status: The status of the cluster when planned
+    :param Dict cluster_config: The config of the cluster
+    :param str profile: The profile configured for the workspace
+    :param float wait_timeout: The maximum time in seconds to wait for the cluster to terminate
+    """
+    if status == 'TERMINATING':
+        wait_for_clusters([cluster_id], ['TERMINATED'], profile, wait_timeout)
+    edit_cluster(profile, {**cluster_config, 'cluster_id': cluster_id})
@@ -0,0 +1 @@
+from ._gc import find_orphaned_groups, gc_cli
@@ -0,0 +1,128 @@
+import re
+from argparse import Namespace
+from concurrent.futures import as_completed
+from typing import Dict, Iterable, List
+
+import logging
+
+from ..utils._backend import BULK_MAX_OPERATIONS, get_backend
+from ..utils._groups import delete_groups
+from ..utils._pool import ContextThreadPoolExecutor
+from ..utils._profile import extract_profile
+from ..utils._timing import span, timed_iter
+
+logger = logging.getLogger(__name__)
+
+# The access groups created for every cluster and secret scope, the name of the target is the middle part
+ACCESS_GROUP_PATTERNS = {
+    'clusters': re.compile(r'^cluster-(?P<name>.+)-(?:manage|restart|attach)$'),
+    'scopes': re.compile(r'^scope-(?P<name>.+)-(?:read|write|manage)$'),
+}
+
+
+def find_orphaned_groups(
+        groups: Iterable[str],
+        cluster_names: Iterable[str],
+        scope_names: Iterable[str],
+        kinds: Iterable[str] = tuple(ACCESS_GROUP_PATTERNS)) -> Dict[str, Dict[str, List[str]]]:
+    """Find the access groups whose cluster or secret scope no longer exists
+
+    Cluster names are matched case insensitively, like the cluster commands do, scope names exactly.
+
+    :param Iterable[str] groups: Every group of the workspace
+    :param Iterable[str] cluster_names: The names of the existing clusters
+    :param Iterable[str] scope_names: The names of the existing secret scopes
+    :param Iterable[str] kinds: The target types to collect for, of ACCESS_GROUP_PATTERNS
+
+    :return: The orphaned groups by target name, by target type
+    :rtype: Dict[str, Dict[str, List[str]]]
+    """
+    live = {
+        'clusters': {name.lower() for name in cluster_names},
+        'scopes': set(scope_names),
+    }
+
+    orphans = {kind: {} for kind in kinds}
+    for group in groups:
+        for kind in kinds:
+            match = ACCESS_GROUP_PATTERNS[kind].match(group)
+            if match is None:
+                continue
+            name = match.group('name')
+            if (name.lower() if kind == 'clusters' else name) not in live[kind]:
+                orphans[kind].setdefault(name, []).append(group)
+            break
+
+    return orphans
+
+
+def delete_in_batches(groups: List[str], profile: str, workers: int = 4, batch_size: int = BULK_MAX_OPERATIONS):
+    """Delete groups in concurrent batches, each batch a single bulk request where supported
+
+    :param List[str] groups: The groups to delete
+    :param str profile: The profile configured for the workspace
+    :param int workers: The number of concurrent batches
+    :param int batch_size: The number of groups per batch
+    """
+    batches = [groups[i:i + batch_size] for i in range(0, len(groups), batch_size)]
+    failures = 0
+    with ContextThreadPoolExecutor(max_workers=max(1, min(workers, len(batches)))) as executor:
+        futures = [executor.submit(delete_groups, batch, profile) for batch in batches]
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except Exception as e:
+                logger.error(f'Failed to delete a batch of groups: {e}')
+                failures += 1
+
+    if failures:
+        raise RuntimeError(f'{failures} of {len(batches)} batches of groups failed to delete')
+
+
+def gc_cli(args: Namespace):
+    """Deletes the access groups of clusters and secret scopes that no longer exist in the databricks instance defined
+    in the current profile
+
+    :param Namespace args: The arguments from the cli
+    :return:
+    """
+    # Get the base profile
+    profile, _ = extract_profile(args)
+    kinds = [kind.strip() for kind in args.include.split(',') if kind.strip()]
+    unknown = [kind for kind in kinds if kind not in ACCESS_GROUP_PATTERNS]
+    if unknown:
+        raise ValueError(f'Unknown target types {unknown}, expected some of {list(ACCESS_GROUP_PATTERNS)}')
+
+    # Get the live state of the workspace, bypassing the cache so a recently created target is never missed
+    backend = get_backend(profile)
+    cluster_names, scope_names = [], []
+    if 'clusters' in kinds:
+        cluster_names = [c['name'] for c in timed_iter('extract_clusters', profile, backend.list_clusters())]
+    if 'scopes' in kinds:
+        scope_names = [s['name'] for s in timed_iter('extract_scopes', profile, backend.list_scopes())]
+    with span('get_groups'):
+        groups = backend.list_groups()
+
+    # Find the orphaned access groups
+    orphans = find_orphaned_groups(groups, cluster_names, scope_names, kinds)
+    to_delete = sorted(group for targets in orphans.values() for names in targets.values() for group in names)
+    if not to_delete:
+        logger.info('No orphaned access groups')
+        return
+
+    # Set the report
+    report = f'The following {len(to_delete)} orphaned access groups will be deleted:'
+    for kind, targets in orphans.items():
+        for name, names in sorted(targets.items()):
+            report += f'\n{kind[:-1].capitalize()} {name}:'
+            for group in sorted(names):
+                report += f'\n\t{group}'
+
+    # Provide the debug output
+    if args.d:
+        print(report)
+
+    # Check for confirmation
+    elif args.q or input(report + '\n(Y/N):').upper() == 'Y':
+        delete_in_batches(to_delete, profile, args.workers, args.batch_size)
+        logger.info(f'Deleted {len(to_delete)} orphaned access groups')
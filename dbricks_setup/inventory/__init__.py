@@ -0,0 +1 @@
+from ._export import export_inventory, export_inventory_cli
@@ -0,0 +1,168 @@
+import json
+import sys
+from argparse import Namespace
+from typing import Callable, Dict, Iterable, Iterator, List, TextIO
+
+import logging
+from databricks_cli.configure.provider import DatabricksConfig
+
+from ..utils._backend import get_backend
+from ..utils._pool import bounded_map
+from ..utils._profile import extract_profile
+from ..utils._timing import span, timed_iter
+from ..utils.cluster._acl import get_acls as get_cluster_acls, parse_acls as parse_cluster_acls
+from ..utils.scope._acl import get_acls as get_scope_acls
+
+logger = logging.getLogger(__name__)
+
+# The resource types of the inventory, in the order they are exported
+INVENTORY_KINDS = ['clusters', 'scopes', 'groups']
+
+# The number of records written between flushes of the output
+FLUSH_EVERY = 100
+
+
+def _cluster_record(cluster: Dict[str, str], base_config: DatabricksConfig) -> Dict:
+    return {
+        'type': 'cluster',
+        'cluster_id': cluster['cluster_id'],
+        'name': cluster['name'],
+        'status': cluster['status'],
+        'acls': parse_cluster_acls(get_cluster_acls(cluster['cluster_id'], base_config)),
+    }
+
+
+def _scope_record(scope: Dict[str, str], profile: str) -> Dict:
+    with span('list_secrets', scope['name']):
+        secrets = get_backend(profile).list_secrets(scope['name'])
+    return {
+        'type': 'scope',
+        'name': scope['name'],
+        'backend': scope['backend'],
+        'url': scope['url'],
+        'acls': get_scope_acls(scope['name'], profile),
+        'secrets': secrets,
+    }
+
+
+def _group_record(group: str, profile: str) -> Dict:
+    with span('list_group_members', group):
+        members = get_backend(profile).list_group_members(group)
+    return {'type': 'group', 'name': group, 'members': members}
+
+
+def _safe(record: Callable[..., Dict], kind: str, *args) -> Callable[[Dict], Dict]:
+    """Wrap a record builder so a resource failing to export, i.e. deleted while listing, is reported in its record
+
+    :param Callable[..., Dict] record: The function building the record of a resource
+    :param str kind: The type of the resources
+    :param args: The trailing arguments of the function
+
+    :return: The function building the record, or an error record
+    :rtype: Callable[[Dict], Dict]
+    """
+    def build(resource) -> Dict:
+        try:
+            return record(resource, *args)
+        except Exception as e:
+            name = resource if isinstance(resource, str) else resource['name']
+            logger.warning(f'Could not export {kind} {name}: {e}')
+            return {'type': kind, 'name': name, 'error': f'{type(e).__name__}: {e}'}
+    return build
+
+
+def iter_inventory(
+        profile: str,
+        base_config: DatabricksConfig,
+        kinds: Iterable[str] = INVENTORY_KINDS,
+        workers: int = 16) -> Iterator[Dict]:
+    """Get the inventory of a workspace record by record, listing page by page as the records are consumed
+
+    The acls, secret names and group members are fetched concurrently for a bounded window of resources, so the
+    memory used does not grow with the size of the workspace. The workspace cache is bypassed.
+
+    :param str profile: The profile configured for the workspace
+    :param DatabricksConfig base_config: The profile configured for the workspace
+    :param Iterable[str] kinds: The resource types to export, of INVENTORY_KINDS
+    :param int workers: The number of concurrent per resource calls
+
+    :return: The records of the resources, in the order they are listed
+    :rtype: Iterator[Dict]
+    """
+    backend = get_backend(profile)
+    for kind in kinds:
+        logger.info(f'Exporting {kind}')
+        if kind == 'clusters':
+            resources = timed_iter('extract_clusters', profile, backend.list_clusters())
+            build = _safe(_cluster_record, 'cluster', base_config)
+        elif kind == 'scopes':
+            resources = timed_iter('extract_scopes', profile, backend.list_scopes())
+            build = _safe(_scope_record, 'scope', profile)
+        elif kind == 'groups':
+            resources = timed_iter('extract_groups', profile, backend.list_groups())
+            build = _safe(_group_record, 'group', profile)
+        else:
+            raise ValueError(f'Unknown inventory type {kind}, expected one of {INVENTORY_KINDS}')
+
+        yield from bounded_map(build, resources, workers)
+
+
+def export_inventory(
+        profile: str,
+        base_config: DatabricksConfig,
+        output: TextIO,
+        kinds: Iterable[str] = INVENTORY_KINDS,
+        workers: int = 16) -> Dict[str, int]:
+    """Write the inventory of a workspace as newline delimited json, one resource per line
+
+    :param str profile: The profile configured for the workspace
+    :param DatabricksConfig base_config: The profile configured for the workspace
+    :param TextIO output: The stream to write to
+    :param Iterable[str] kinds: The resource types to export, of INVENTORY_KINDS
+    :param int workers: The number of concurrent per resource calls
+
+    :return: The number of records written by type, and the number of resources that failed to export
+    :rtype: Dict[str, int]
+    """
+    counts = {'errors': 0}
+    for i, record in enumerate(iter_inventory(profile, base_config, kinds, workers), 1):
+        output.write(json.dumps(record, sort_keys=True) + '\n')
+        counts[record['type']] = counts.get(record['type'], 0) + 1
+        if 'error' in record:
+            counts['errors'] += 1
+        if i % FLUSH_EVERY == 0:
+            output.flush()
+    output.flush()
+    return counts
+
+
+def _parse_kinds(include: str) -> List[str]:
+    kinds = [kind.strip() for kind in include.split(',') if kind.strip()]
+    unknown = [kind for kind in kinds if kind not in INVENTORY_KINDS]
+    if unknown:
+        raise ValueError(f'Unknown inventory types {unknown}, expected some of {INVENTORY_KINDS}')
+    return kinds
+
+
+def export_inventory_cli(args: Namespace):
+    """Exports the clusters, secret scopes and groups of the databricks instance defined in the current profile
+
+    :param Namespace args: The arguments from the cli
+    :return:
+    """
+    # Get the base profile
+    profile, base_config = extract_profile(args)
+    kinds = _parse_kinds(args.include)
+
+    # Write to stdout, or to a file per profile
+    if args.o == '-':
+        counts = export_inventory(profile, base_config, sys.stdout, kinds, args.workers)
+    else:
+        path = args.o.format(profile=profile)
+        with open(path, 'w') as f:
+            counts = export_inventory(profile, base_config, f, kinds, args.workers)
+        logger.info(f'Inventory written to {path}')
+
+    logger.info(f'Exported {", ".join(f"{count} {kind}s" for kind, count in counts.items() if kind != "errors")}')
+    if counts['errors']:
+        raise RuntimeError(f'{counts["errors"]} resources could not be exported, see the error records')
@@ -1,2 +1,2 @@
 from ._delete import delete_scope_cli
-from ._update import update_scope_cli
+from ._update import update_scope, update_scope_cli
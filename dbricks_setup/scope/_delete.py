@@ -1,9 +1,13 @@
 from argparse import Namespace
+from typing import Dict, Iterable
 
 import logging
 
-from ..utils._groups import delete_group, get_groups
+from ..utils._groups import delete_groups, find_groups_with_prefixes
+from ..utils._plan import Plan
+from ..utils._pool import ContextThreadPoolExecutor
 from ..utils._profile import extract_profile
+from ..utils._targets import match_names
 from ..utils.scope._acl import get_acls, delete_acl
 from ..utils.scope._delete import delete_scope
 from ..utils.scope._extract import extract_scopes
@@ -12,7 +16,7 @@ logger = logging.getLogger(__name__)
 
 
 def delete_scope_cli(args: Namespace):
-    """Updates the secret scope configuration of the databricks instance defined in the current profile
+    """Deletes secret scopes and connected items of the databricks instance defined in the current profile
 
     :param Namespace args: The arguments from the cli
     :return:
@@ -21,15 +25,62 @@ def delete_scope_cli(args: Namespace):
     # Get the base profile
     profile, base_config = extract_profile(args)
 
-    # Get the workspace groups
-    groups = get_groups(profile)
+    # Check scope names, patterns only select existing scopes
+    existing_scopes = [scope['name'] for scope in extract_scopes(profile)]
+    scope_names = match_names(args.scope_name, existing_scopes)
 
-    # Get the existing scopes
-    scopes = extract_scopes(profile)
+    # Get the access groups of the scopes
+    groups = find_groups_with_prefixes([f'scope-{scope_name}-' for scope_name in scope_names], profile)
 
-    # Check scope name
-    scope_name = args.scope_name
-    scope_exists = scope_name in scopes
+    # Get the acls of the existing scopes concurrently
+    existing_names = [scope_name for scope_name in scope_names if scope_name in existing_scopes]
+    with ContextThreadPoolExecutor(max_workers=max(1, min(args.workers, len(existing_names)))) as executor:
+        scope_acls = dict(zip(existing_names, executor.map(lambda name: get_acls(name, profile), existing_names)))
+
+    # Set deletions
+    plan = Plan()
+    deletion_warning = ''
+    for scope_name in scope_names:
+        to_delete = plan_deletion(args, scope_name, scope_name in scope_acls, groups, scope_acls.get(scope_name, {}))
+        plan_scope_deletion(to_delete, scope_name, profile, plan)
+
+        # Set the deletion warning
+        if 'scope' in to_delete:
+            deletion_warning += '\nScope:'
+            deletion_warning += f'\n\t{to_delete["scope"]}'
+        if 'groups' in to_delete:
+            deletion_warning += '\nGroups:'
+            for group in to_delete['groups']:
+                deletion_warning += f'\n\t{group}'
+        if 'acls' in to_delete:
+            deletion_warning += '\nAcls:'
+            for acl, permission in to_delete['acls'].items():
+                deletion_warning += f'\n\t{(permission+":").ljust(8)}{acl}'
+
+    deletion_warning = 'The following resources will be deleted:' + deletion_warning
+
+    # Provide the debug output
+    if args.d:
+        print(deletion_warning)
+        print(plan.describe())
+
+    # Check for confirmation
+    elif len(plan) and (args.q or input(deletion_warning + '\n(Y/N):').upper() == 'Y'):
+        plan.execute()
+
+
+def plan_deletion(args: Namespace, scope_name: str, scope_exists: bool, groups: Iterable[str], acls: Dict) -> Dict:
+    """Select what to delete of a secret scope
+
+    :param Namespace args: The arguments from the cli
+    :param str scope_name: The name of the secret scope
+    :param bool scope_exists: Whether the secret scope exists
+    :param Iterable[str] groups: The existing workspace groups, at least the access groups of the scope
+    :param Dict acls: The acls of the secret scope
+
+    :return: The scope, groups and acls to delete
+    :rtype: Dict
+    """
 
     # Construct the access groups
     accesses = ['read', 'write', 'manage']
@@ -41,13 +92,6 @@ def delete_scope_cli(args: Namespace):
     # Filter the existing groups
     existing_groups = [group for group in access_groups if group in groups]
 
-    # Get the acls if the scope exists
-    if scope_exists:
-        # Get the acls for the scope
-        acls = get_acls(scope_name, profile)
-    else:
-        acls = {}
-
     # Set deletions
     to_delete = {
         'scope': scope_name,
@@ -63,34 +107,37 @@ def delete_scope_cli(args: Namespace):
     if (not args.a and not args.c) or not acls:
         to_delete.pop('acls')
 
-    # Set the deletion warning
-    deletion_warning = ''
-    if 'scope' in to_delete:
-        deletion_warning += '\nScope:'
-        deletion_warning += f'\n\t{to_delete["scope"]}'
-    if 'groups' in to_delete:
-        deletion_warning += '\nGroups:'
-        for group in to_delete['groups']:
-            deletion_warning += f'\n\t{group}'
-    if 'acls' in to_delete:
-        deletion_warning += '\nAcls:'
-        for acl, permission in to_delete['acls'].items():
-            deletion_warning += f'\n\t{(permission+":").ljust(8)}{acl}'
+    return to_delete
 
-    deletion_warning = 'The following resources will be deleted:' + deletion_warning
 
-    # Provide the debug output
-    if args.d:
-        print(deletion_warning)
+def plan_scope_deletion(to_delete: Dict, scope_name: str, profile: str, plan: Plan = None) -> Plan:
+    """Plans the deletion of a secret scope and connected items, acls are revoked before their groups are deleted
 
-    # Check for confirmation
-    elif to_delete and (args.q or input(deletion_warning + '\n(Y/N):').upper() == 'Y'):
-        for principal in to_delete.get('acls', []):
-            # Remove the existing acl
-            delete_acl(principal, scope_name, profile)
-        for group in to_delete.get('groups', []):
-            # Remove the existing group
-            delete_group(group, profile)
-        if 'scope' in to_delete:
-            # Delete the scope
-            delete_scope(scope_name, profile)
+    :param Dict to_delete: The scope, groups and acls to delete
+    :param str scope_name: The name of the secret scope
+    :param str profile: The profile configured for the workspace
+    :param Plan plan: The plan to add the operations to, a new plan if not supplied
+
+    :return: The plan
+    :rtype: Plan
+    """
+    if plan is None:
+        plan = Plan()
+
+    # Remove the existing acls
+    acl_keys = [
+        plan.add('delete_scope_acl', f'{scope_name}/{principal}', delete_acl, principal, scope_name, profile)
+        for principal
+        in to_delete.get('acls', {})
+    ]
+
+    # Remove the existing groups
+    groups = to_delete.get('groups', [])
+    if groups:
+        plan.add('delete_groups', ', '.join(groups), delete_groups, groups, profile, depends_on=acl_keys)
+
+    # Delete the scope
+    if 'scope' in to_delete:
+        plan.add('delete_scope', scope_name, delete_scope, scope_name, profile, depends_on=acl_keys)
+
+    return plan
@@ -1,13 +1,18 @@
 from argparse import Namespace
+from typing import Dict, Iterable
 
 import logging
+from databricks_cli.configure.provider import DatabricksConfig
 
-from ..utils._groups import create_groups, get_groups
-from ..utils._profile import extract_profile, set_aad_scope
-from ..utils.scope._acl import get_acls, set_acls
-from ..utils.scope._create import create_scope
+from ..utils._aad import get_aad_token
+from ..utils._fingerprint import fingerprint, get_fingerprints
+from ..utils._groups import create_groups, find_groups
+from ..utils._plan import Plan
+from ..utils._profile import extract_profile
+from ..utils.scope._acl import add_acl, delete_acl, diff_acls, get_acls, sync_acls
+from ..utils.scope._create import create_scope, key_vault_dns_name
 from ..utils.scope._delete import delete_scope
-from ..utils.scope._extract import extract_scopes
+from ..utils.scope._extract import find_scope
 
 logger = logging.getLogger(__name__)
 
@@ -22,54 +27,250 @@ def update_scope_cli(args: Namespace):
     # Get the base profile
     profile, base_config = extract_profile(args)
 
-    # Get the workspace groups
-    groups = get_groups(profile)
-
-    # Get the existing scopes
-    scopes = extract_scopes(profile)
-
     # Check scope name
     scope_name = args.scope_name
     if not scope_name:
         scope_name = args.key_vault
 
+    # Get the existing scope
+    scope = find_scope(scope_name, profile)
+    scopes = {scope_name: scope} if scope else {}
+
+    # Skip the scope if it matches its recorded fingerprint
+    if not (args.f or args.verify) and is_current(scope_name, args.key_vault, args.resource_id, profile, scopes):
+        logger.info(f'Scope {scope_name} matches its desired state')
+        return
+
+    # Get the access groups of the scope
+    groups = find_groups(f'scope-{scope_name}-', profile)
+
+    # Update the scope
+    update_scope(
+        scope_name,
+        args.key_vault,
+        args.resource_id,
+        profile,
+        base_config,
+        groups,
+        scopes,
+        force=args.f,
+        acl_workers=args.acl_workers,
+        verify=args.verify,
+        debug=args.d
+    )
+
+
+def update_scope(
+        scope_name: str,
+        key_vault: str,
+        resource_id: str,
+        profile: str,
+        base_config: DatabricksConfig,
+        groups: Iterable[str],
+        scopes: Dict[str, Dict[str, str]],
+        force: bool = False,
+        acl_workers: int = 8,
+        verify: bool = False,
+        debug: bool = False):
+    """Updates a single key vault backed secret scope against already extracted workspace state
+
+    A scope matching the fingerprint recorded when it was last updated is skipped, unless forced or verified.
+
+    :param str scope_name: The name of the secret scope
+    :param str key_vault: The key vault name
+    :param str resource_id: The key vault resource id
+    :param str profile: The profile configured for the workspace
+    :param DatabricksConfig base_config: The config of the profile
+    :param Iterable[str] groups: The existing workspace groups, at least the access groups of the scope
+    :param Dict[str, Dict[str, str]] scopes: The existing workspace scopes
+    :param bool force: Force the recreation of an existing scope
+    :param int acl_workers: The maximum number of concurrent acl calls
+    :param bool verify: Compare the acls of a scope matching its fingerprint
+    :param bool debug: Print the plan instead of executing it
+    """
+    if not (force or verify) and is_current(scope_name, key_vault, resource_id, profile, scopes):
+        logger.info(f'Scope {scope_name} matches its desired state')
+        return
+
+    plan = plan_scope_update(
+        scope_name,
+        key_vault,
+        resource_id,
+        profile,
+        base_config,
+        groups,
+        scopes,
+        force=force,
+        acl_workers=acl_workers
+    )
+
+    # Provide the debug output
+    if debug:
+        print(plan.describe())
+        return
+    plan.execute(acl_workers)
+
+    # Record the fingerprint of a scope backed by the desired key vault
+    if force or scope_name not in scopes or scopes[scope_name].get('url') == key_vault_dns_name(key_vault):
+        get_fingerprints(profile).set('scopes', scope_name, scope_fingerprint(scope_name, key_vault, resource_id))
+
+
+def get_access_groups(scope_name: str) -> Dict[str, str]:
+    """Get the access groups of a secret scope with their permission
+
+    :param str scope_name: The name of the secret scope
+
+    :return: The permission keyed by group
+    :rtype: Dict[str, str]
+    """
+    accesses = ['read', 'write', 'manage']
+    return {
+        f'scope-{scope_name}-{access}': access.upper()
+        for access in accesses
+    }
+
+
+def scope_fingerprint(scope_name: str, key_vault: str, resource_id: str) -> str:
+    """Get the fingerprint of the desired state of a secret scope, its key vault and acls
+
+    :param str scope_name: The name of the secret scope
+    :param str key_vault: The key vault name
+    :param str resource_id: The key vault resource id
+
+    :return: The fingerprint
+    :rtype: str
+    """
+    return fingerprint(
+        {'scope': scope_name, 'key_vault': key_vault, 'resource_id': resource_id},
+        get_access_groups(scope_name)
+    )
+
+
+def is_current(
+        scope_name: str,
+        key_vault: str,
+        resource_id: str,
+        profile: str,
+        scopes: Dict[str, Dict[str, str]]) -> bool:
+    """Check whether an existing secret scope matches the fingerprint recorded in the local sidecar
+
+    :param str scope_name: The name of the secret scope
+    :param str key_vault: The key vault name
+    :param str resource_id: The key vault resource id
+    :param str profile: The profile configured for the workspace
+    :param Dict[str, Dict[str, str]] scopes: The existing workspace scopes
+
+    :return: Whether the scope matches its desired state
+    :rtype: bool
+    """
+    if scope_name not in scopes:
+        return False
+    return get_fingerprints(profile).get('scopes', scope_name) == scope_fingerprint(scope_name, key_vault, resource_id)
+
+
+def plan_scope_update(
+        scope_name: str,
+        key_vault: str,
+        resource_id: str,
+        profile: str,
+        base_config: DatabricksConfig,
+        groups: Iterable[str],
+        scopes: Dict[str, Dict[str, str]],
+        force: bool = False,
+        acl_workers: int = 8) -> Plan:
+    """Plans the changes updating a single key vault backed secret scope against already extracted workspace state
+
+    :param str scope_name: The name of the secret scope
+    :param str key_vault: The key vault name
+    :param str resource_id: The key vault resource id
+    :param str profile: The profile configured for the workspace
+    :param DatabricksConfig base_config: The config of the profile
+    :param Iterable[str] groups: The existing workspace groups, at least the access groups of the scope
+    :param Dict[str, Dict[str, str]] scopes: The existing workspace scopes
+    :param bool force: Force the recreation of an existing scope
+    :param int acl_workers: The maximum number of concurrent acl calls of a recreated scope
+
+    :return: The plan
+    :rtype: Plan
+    """
+    plan = Plan()
+
     # Check scope existence
-    if scope_name in scopes and not args.f:
+    create_keys = []
+    if scope_name in scopes and not force:
         logger.warning(
             f'Scope {scope_name} already exists. Please remove if misconfigured, consider using the -f flag to force an update.')
     else:
-        create = args.f or scope_name not in scopes
-
-        # If the scope is missing or an update is forced, recreate it
-        if create:
-            # Update the azure ad profile if needed
-            set_aad_scope(base_config)
+        # If the scope is missing or an update is forced, recreate it once an azure ad token is at hand
+        create_keys.append(plan.add('get_aad_token', base_config.host, get_aad_token))
 
-            # Delete if exists
-            if scope_name in scopes:
-                # Delete the scope
-                delete_scope(scope_name, profile)
+        # Delete if exists
+        if scope_name in scopes:
+            create_keys.append(plan.add('delete_scope', scope_name, delete_scope, scope_name, profile))
 
-            create_scope(
+        create_keys = [
+            plan.add(
+                'create_scope',
+                scope_name,
+                create_scope,
                 scope=scope_name,
-                resource_id=args.resource_id,
-                key_vault_name=args.key_vault
+                resource_id=resource_id,
+                key_vault_name=key_vault,
+                profile=profile,
+                depends_on=create_keys
             )
+        ]
 
     # Construct the access groups
-    accesses = ['read', 'write', 'manage']
-    access_groups = {
-        f'scope-{scope_name}-{access}': access.upper()
-        for access in accesses
-    }
+    access_groups = get_access_groups(scope_name)
 
     # Filter and create the missing groups
+    group_keys = []
     missing_groups = [group for group in access_groups if group not in groups]
     if missing_groups:
-        create_groups(missing_groups, profile)
+        group_keys.append(plan.add('create_groups', ', '.join(missing_groups), create_groups, missing_groups, profile))
 
-    # Get the existing acls for the secret scope
-    acls = get_acls(scope_name, profile)
+    # The acls of a new scope are only known once created
+    if create_keys:
+        plan.add(
+            'set_scope_acls',
+            scope_name,
+            sync_acls,
+            access_groups,
+            scope_name,
+            profile,
+            max_workers=acl_workers,
+            depends_on=create_keys + group_keys
+        )
+        return plan
+
+    # Update the acls of the existing scope, granting before revoking so the caller never locks itself out
+    changes = diff_acls(get_acls(scope_name, profile), access_groups)
+    put_keys = [
+        plan.add(
+            'put_scope_acl',
+            f'{scope_name}/{change["principal"]}',
+            add_acl,
+            change['principal'],
+            change['permission'],
+            scope_name,
+            profile,
+            depends_on=group_keys
+        )
+        for change
+        in changes
+        if change['action'] != 'delete'
+    ]
+    for change in changes:
+        if change['action'] == 'delete':
+            plan.add(
+                'delete_scope_acl',
+                f'{scope_name}/{change["principal"]}',
+                delete_acl,
+                change['principal'],
+                scope_name,
+                profile,
+                depends_on=put_keys
+            )
 
-    # Update the acls
-    set_acls(acls, access_groups, scope_name, profile)
+    return plan
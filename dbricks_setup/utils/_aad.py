@@ -0,0 +1,124 @@
+import datetime
+import json
+import subprocess
+import threading
+import time
+from typing import Callable, Tuple
+
+import logging
+
+from ._timing import span
+
+logger = logging.getLogger(__name__)
+
+# The azure ad application of azure databricks, and the scope of its tokens
+DATABRICKS_RESOURCE = '2ff814a6-3304-4ab8-85cb-cd0e6f879c1d'
+DATABRICKS_SCOPE = f'{DATABRICKS_RESOURCE}/.default'
+
+# The seconds before expiry at which a cached token is refreshed
+REFRESH_MARGIN = 300.0
+
+
+def acquire_with_azure_identity() -> Tuple[str, float]:
+    """Acquire a token through azure identity, from the environment, a managed identity or the azure cli login
+
+    :return: The token and its expiry as a unix timestamp
+    :rtype: Tuple[str, float]
+    """
+    from azure.identity import DefaultAzureCredential
+
+    token = DefaultAzureCredential().get_token(DATABRICKS_SCOPE)
+    return token.token, float(token.expires_on)
+
+
+def acquire_with_azure_cli() -> Tuple[str, float]:
+    """Acquire a token from the login of the azure cli
+
+    :return: The token and its expiry as a unix timestamp
+    :rtype: Tuple[str, float]
+    """
+    sp = subprocess.run(
+        ['az', 'account', 'get-access-token', '--resource', DATABRICKS_RESOURCE, '--output', 'json'],
+        capture_output=True
+    )
+    if sp.returncode:
+        raise EnvironmentError(
+            f'Could not get an azure ad token from the azure cli, you may need to run "az login" again.\n'
+            f'{sp.stderr.decode().strip()}'
+        )
+    token_data = json.loads(sp.stdout)
+
+    # Older versions of the azure cli only report the local expiry time
+    if 'expires_on' in token_data:
+        expires_on = float(token_data['expires_on'])
+    else:
+        expires_on = datetime.datetime.strptime(token_data['expiresOn'], '%Y-%m-%d %H:%M:%S.%f').timestamp()
+
+    return token_data['accessToken'], expires_on
+
+
+def acquire_token() -> Tuple[str, float]:
+    """Acquire a token through azure identity, or the azure cli when azure identity is not installed
+
+    :return: The token and its expiry as a unix timestamp
+    :rtype: Tuple[str, float]
+    """
+    try:
+        import azure.identity  # noqa: F401
+    except ImportError:
+        return acquire_with_azure_cli()
+    return acquire_with_azure_identity()
+
+
+class AadTokenProvider:
+    """Azure ad tokens for azure databricks held in memory, refreshed shortly before they expire
+
+    Concurrent callers share one acquisition.
+
+    :param Callable[[], Tuple[str, float]] acquire: Acquires a new token and its expiry as a unix timestamp
+    :param float refresh_margin: The seconds before expiry at which the token is refreshed
+    """
+
+    def __init__(self, acquire: Callable[[], Tuple[str, float]] = acquire_token, refresh_margin: float = REFRESH_MARGIN):
+        self.acquire = acquire
+        self.refresh_margin = refresh_margin
+        self._token = None
+        self._expires_on = 0.0
+        self._lock = threading.Lock()
+
+    def get_token(self) -> str:
+        """Get a token valid for at least the refresh margin
+
+        :return: The token
+        :rtype: str
+        """
+        with self._lock:
+            if self._token is None or self._expires_on - self.refresh_margin <= time.time():
+                logger.info('Acquiring azure ad token')
+                with span('acquire_aad_token'):
+                    token, expires_on = self.acquire()
+                if expires_on - self.refresh_margin <= time.time():
+                    raise EnvironmentError('The acquired azure ad token is about to expire, please log in again.')
+                self._token, self._expires_on = token, expires_on
+            return self._token
+
+
+_provider = AadTokenProvider()
+
+
+def set_token_provider(provider: AadTokenProvider):
+    """Replace the token provider shared by every workspace, i.e. to use a service principal credential
+
+    :param AadTokenProvider provider: The token provider
+    """
+    global _provider
+    _provider = provider
+
+
+def get_aad_token() -> str:
+    """Get the azure ad token used for key vault backed secret scopes
+
+    :return: The token
+    :rtype: str
+    """
+    return _provider.get_token()
@@ -0,0 +1,794 @@
+import json
+import os
+import subprocess
+import threading
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import logging
+import requests
+from requests.adapters import HTTPAdapter
+from databricks_cli.configure.provider import DatabricksConfig
+
+from ._aad import get_aad_token
+from ._fingerprint import FINGERPRINT_TAG, SIZING_TAG
+from ._governor import Governor, get_governor
+from ._profile import get_profile_config
+from ._timing import call_span, record_payload
+
+logger = logging.getLogger(__name__)
+
+# The rest api base paths
+API_VERSION = '/api/2.0'
+CLUSTERS_API_VERSION = '/api/2.1'
+
+# The page size of paginated listings
+PAGE_SIZE = 100
+
+# The page size of the cluster events api
+EVENTS_PAGE_SIZE = 500
+
+# The scim api, the path of the groups and the limits of bulk requests and filters
+SCIM_PATH = '/preview/scim/v2'
+SCIM_GROUP_SCHEMA = 'urn:ietf:params:scim:schemas:core:2.0:Group'
+SCIM_BULK_SCHEMA = 'urn:ietf:params:scim:api:messages:2.0:BulkRequest'
+BULK_MAX_OPERATIONS = 100
+FILTER_MAX_NAMES = 20
+
+# The databricks cli commands that only read the workspace
+CLI_READ_COMMANDS = ('events', 'get', 'list', 'list-acls', 'list-members', 'list-scopes', 'spark-versions')
+
+# The environment variable used to select the backend
+BACKEND_ENV_VAR = 'DBRICKS_SETUP_BACKEND'
+
+
+def parse_clusters(response: Dict) -> Iterator[Dict[str, str]]:
+    """Convert a clusters list response to the cluster records used by the utils
+
+    :param Dict response: The json response of /clusters/list
+
+    :return: The clusters with their id, name, status, and the fingerprint of their desired state and their sizing if
+        tagged
+    :rtype: Iterator[Dict[str, str]]
+    """
+    for cluster in response.get('clusters', []):
+        yield {
+            'cluster_id': cluster['cluster_id'],
+            'name': cluster['cluster_name'],
+            'status': cluster['state'],
+            'fingerprint': cluster.get('custom_tags', {}).get(FINGERPRINT_TAG),
+            'sizing': cluster.get('custom_tags', {}).get(SIZING_TAG),
+        }
+
+
+def parse_scopes(response: Dict) -> Iterator[Dict[str, str]]:
+    """Convert a scopes list response to the scope records used by the utils
+
+    :param Dict response: The json response of /secrets/scopes/list
+
+    :return: The scopes with their name, backend and url
+    :rtype: Iterator[Dict[str, str]]
+    """
+    for scope in response.get('scopes', []):
+        yield {
+            'name': scope['name'],
+            'backend': scope.get('backend_type', ''),
+            'url': scope.get('keyvault_metadata', {}).get('dns_name', '')
+        }
+
+
+def parse_acls(response: Dict) -> Dict[str, str]:
+    """Convert an acls list response to the acl mapping used by the utils
+
+    :param Dict response: The json response of /secrets/acls/list
+
+    :return: The permission keyed by principal
+    :rtype: Dict[str, str]
+    """
+    return {acl['principal']: acl['permission'] for acl in response.get('items', [])}
+
+
+def parse_secrets(response: Dict) -> List[Dict]:
+    """Convert a secrets list response to the secret records used by the utils, without the secret values
+
+    :param Dict response: The json response of /secrets/list
+
+    :return: The secrets with their key and the time they were last updated in epoch milliseconds
+    :rtype: List[Dict]
+    """
+    return [
+        {'key': secret['key'], 'last_updated_timestamp': secret.get('last_updated_timestamp')}
+        for secret
+        in response.get('secrets', [])
+    ]
+
+
+def parse_members(response: Dict) -> List[str]:
+    """Convert a group members response to the names of the members
+
+    :param Dict response: The json response of /groups/list-members
+
+    :return: The user, group and service principal names of the direct members
+    :rtype: List[str]
+    """
+    return [
+        member.get('user_name') or member.get('group_name') or member.get('service_principal_name')
+        for member
+        in response.get('members', [])
+    ]
+
+
+def scope_create_request(scope: str, resource_id: str, dns_name: str) -> Dict:
+    """Get the request body creating a key vault backed secret scope
+
+    :param str scope: The scope to create
+    :param str resource_id: The resource id of the key vault
+    :param str dns_name: The dns name of the key vault
+
+    :return: The json body of /secrets/scopes/create
+    :rtype: Dict
+    """
+    return {
+        'scope': scope,
+        'scope_backend_type': 'AZURE_KEYVAULT',
+        'backend_azure_keyvault': {
+            'resource_id': resource_id,
+            'dns_name': dns_name
+        }
+    }
+
+
+def scim_string(value: str) -> str:
+    """Quote a value for use in a scim filter
+
+    :param str value: The value
+
+    :return: The quoted and escaped value
+    :rtype: str
+    """
+    return '"' + value.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+class Backend:
+    """Base class for the workspace backends, every remote call made by the utils goes through one of these"""
+
+    def list_groups(self) -> List[str]:
+        raise NotImplementedError
+
+    def create_group(self, group: str):
+        raise NotImplementedError
+
+    def delete_group(self, group: str):
+        raise NotImplementedError
+
+    def list_group_members(self, group: str) -> List[str]:
+        raise NotImplementedError
+
+    def search_groups(self, prefix: str) -> List[str]:
+        """Get the groups starting with a prefix
+
+        :param str prefix: The prefix of the group names
+
+        :return: The matching groups
+        :rtype: List[str]
+        """
+        return [group for group in self.list_groups() if group.startswith(prefix)]
+
+    def create_groups(self, groups: List[str]) -> Dict[str, str]:
+        """Create groups one at a time
+
+        :param List[str] groups: The groups to create
+
+        :return: The error of every group that failed
+        :rtype: Dict[str, str]
+        """
+        errors = {}
+        for group in groups:
+            try:
+                self.create_group(group)
+            except Exception as e:
+                errors[group] = str(e)
+        return errors
+
+    def delete_groups(self, groups: List[str]) -> Dict[str, str]:
+        """Delete groups one at a time
+
+        :param List[str] groups: The groups to delete
+
+        :return: The error of every group that failed
+        :rtype: Dict[str, str]
+        """
+        errors = {}
+        for group in groups:
+            try:
+                self.delete_group(group)
+            except Exception as e:
+                errors[group] = str(e)
+        return errors
+
+    def list_clusters(self) -> Iterator[Dict[str, str]]:
+        raise NotImplementedError
+
+    def get_cluster(self, cluster_id: str) -> Optional[Dict[str, str]]:
+        raise NotImplementedError
+
+    def get_cluster_config(self, cluster_id: str) -> Dict:
+        raise NotImplementedError
+
+    def get_cluster_events(self, cluster_id: str, start_time: int, event_types: List[str] = None) -> Optional[List[Dict]]:
+        raise NotImplementedError
+
+    def list_spark_versions(self) -> List[Dict[str, str]]:
+        raise NotImplementedError
+
+    def create_cluster(self, cluster_config: Dict) -> str:
+        raise NotImplementedError
+
+    def edit_cluster(self, cluster_config: Dict):
+        raise NotImplementedError
+
+    def terminate_cluster(self, cluster_id: str):
+        raise NotImplementedError
+
+    def delete_cluster(self, cluster_id: str):
+        raise NotImplementedError
+
+    def list_instance_pools(self) -> List[Dict]:
+        raise NotImplementedError
+
+    def create_instance_pool(self, pool_config: Dict) -> str:
+        raise NotImplementedError
+
+    def edit_instance_pool(self, pool_config: Dict):
+        raise NotImplementedError
+
+    def list_scopes(self) -> Iterator[Dict[str, str]]:
+        raise NotImplementedError
+
+    def create_scope(self, scope: str, resource_id: str, dns_name: str):
+        raise NotImplementedError
+
+    def delete_scope(self, scope: str):
+        raise NotImplementedError
+
+    def list_acls(self, scope: str) -> Dict[str, str]:
+        raise NotImplementedError
+
+    def list_secrets(self, scope: str) -> List[Dict]:
+        raise NotImplementedError
+
+    def put_acl(self, scope: str, principal: str, permission: str):
+        raise NotImplementedError
+
+    def delete_acl(self, scope: str, principal: str):
+        raise NotImplementedError
+
+
+class RestBackend(Backend):
+    """Backend calling the workspace rest api directly over one keep-alive session
+
+    :param DatabricksConfig config: The configuration of the workspace
+    """
+
+    def __init__(self, config: DatabricksConfig):
+        self.host = config.host.rstrip('/')
+        self.governor = get_governor(self.host)
+
+        # Set up the pooled session
+        self.session = requests.Session()
+        self.session.headers['Authorization'] = f'Bearer {config.token}'
+        self.session.verify = not config.insecure
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=32)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        # Whether the workspace serves scim bulk requests, set on the first bulk request
+        self.bulk_supported = True
+
+    def request(
+            self,
+            method: str,
+            api_command: str,
+            data: Dict = None,
+            params: Dict = None,
+            api_version: str = API_VERSION) -> Dict:
+        """Perform a request against the workspace api
+
+        :param str method: The http method
+        :param str api_command: The api command, i.e. /clusters/list
+        :param Dict data: The json body of the request
+        :param Dict params: The query parameters of the request
+        :param str api_version: The api base path
+
+        :return: The json response
+        :rtype: Dict
+        """
+        url = f'{self.host}{api_version}{api_command}'
+
+        # Run and enforce success
+        def attempt() -> requests.Response:
+            with call_span(f'{method} {api_command}') as record:
+                r = self.session.request(method, url, json=data, params=params)
+                record_payload(record, len(r.request.body or b''), len(r.content))
+                if not r.ok:
+                    logger.error(f'{method} {api_command} failed with {r.status_code}: {r.text}')
+                r.raise_for_status()
+            return r
+
+        # Only creations are not safe to repeat after a lost response
+        r = self.governor.call(attempt, idempotent=method != 'POST')
+
+        return r.json() if r.content else {}
+
+    def list_groups(self) -> List[str]:
+        return self.request('GET', '/groups/list').get('group_names', [])
+
+    def create_group(self, group: str):
+        self.request('POST', '/groups/create', {'group_name': group})
+
+    def delete_group(self, group: str):
+        self.request('POST', '/groups/delete', {'group_name': group})
+
+    def list_group_members(self, group: str) -> List[str]:
+        return parse_members(self.request('GET', '/groups/list-members', params={'group_name': group}))
+
+    def scim_groups(self, scim_filter: str) -> Iterator[Dict[str, str]]:
+        """Get the groups matching a scim filter, page by page as they are consumed
+
+        :param str scim_filter: The scim filter, i.e. displayName sw "cluster-"
+
+        :return: The groups with their id and displayName
+        :rtype: Iterator[Dict[str, str]]
+        """
+        start_index = 1
+        while True:
+            params = {
+                'filter': scim_filter,
+                'attributes': 'id,displayName',
+                'startIndex': start_index,
+                'count': PAGE_SIZE,
+            }
+            response = self.request('GET', f'{SCIM_PATH}/Groups', params=params)
+            resources = response.get('Resources', [])
+            yield from resources
+
+            # Continue with the next page
+            start_index += len(resources)
+            if not resources or start_index > response.get('totalResults', 0):
+                return
+
+    def find_groups(self, groups: List[str]) -> Dict[str, str]:
+        """Get the scim ids of groups, filtering by name on the server
+
+        :param List[str] groups: The group names
+
+        :return: The id of every existing group by name
+        :rtype: Dict[str, str]
+        """
+        ids = {}
+        for i in range(0, len(groups), FILTER_MAX_NAMES):
+            scim_filter = ' or '.join(f'displayName eq {scim_string(name)}' for name in groups[i:i + FILTER_MAX_NAMES])
+            for group in self.scim_groups(scim_filter):
+                ids[group['displayName']] = group['id']
+        return ids
+
+    def search_groups(self, prefix: str) -> List[str]:
+        return [group['displayName'] for group in self.scim_groups(f'displayName sw {scim_string(prefix)}')]
+
+    def bulk(self, operations: List[Dict]) -> List[Dict]:
+        """Run scim operations in bulk requests of at most BULK_MAX_OPERATIONS
+
+        :param List[Dict] operations: The scim operations, each with a unique bulkId
+
+        :return: The result of every operation, with its bulkId, status and error
+        :rtype: List[Dict]
+        """
+        results = []
+        for i in range(0, len(operations), BULK_MAX_OPERATIONS):
+            chunk = operations[i:i + BULK_MAX_OPERATIONS]
+            response = self.request(
+                'POST',
+                f'{SCIM_PATH}/Bulk',
+                {'schemas': [SCIM_BULK_SCHEMA], 'failOnErrors': len(chunk) + 1, 'Operations': chunk}
+            )
+            for operation in response.get('Operations', []):
+                status = operation.get('status', 0)
+                if isinstance(status, dict):
+                    status = status.get('code', 0)
+                detail = operation.get('response') or {}
+                results.append({
+                    'bulkId': operation.get('bulkId'),
+                    'status': int(status),
+                    'error': detail.get('detail') or detail.get('message') or f'Failed with status {status}',
+                })
+        return results
+
+    def _bulk_or_fallback(
+            self,
+            operations: List[Dict],
+            names: Dict[str, str],
+            ignored_status: int) -> Optional[Dict[str, str]]:
+        """Run scim operations in bulk, returning the errors by name
+
+        :param List[Dict] operations: The scim operations, each with a unique bulkId
+        :param Dict[str, str] names: The name of the group of every bulkId
+        :param int ignored_status: The status meaning the group already is in the desired state
+
+        :return: The error of every group that failed, None if bulk requests are not supported
+        :rtype: Optional[Dict[str, str]]
+        """
+        try:
+            results = self.bulk(operations)
+        except requests.HTTPError as e:
+            if e.response.status_code not in (404, 501):
+                raise
+            logger.warning('The workspace does not support scim bulk requests, falling back to single requests')
+            self.bulk_supported = False
+            return None
+
+        errors = {}
+        for result in results:
+            if result['status'] >= 400 and result['status'] != ignored_status:
+                errors[names[result['bulkId']]] = result['error']
+        return errors
+
+    def create_groups(self, groups: List[str]) -> Dict[str, str]:
+        if not self.bulk_supported or len(groups) < 2:
+            return super().create_groups(groups)
+
+        names = {str(i): group for i, group in enumerate(groups)}
+        operations = [
+            {
+                'method': 'POST',
+                'path': '/Groups',
+                'bulkId': bulk_id,
+                'data': {'schemas': [SCIM_GROUP_SCHEMA], 'displayName': group},
+            }
+            for bulk_id, group
+            in names.items()
+        ]
+        errors = self._bulk_or_fallback(operations, names, 409)
+        return super().create_groups(groups) if errors is None else errors
+
+    def delete_groups(self, groups: List[str]) -> Dict[str, str]:
+        if not self.bulk_supported or len(groups) < 2:
+            return super().delete_groups(groups)
+
+        # Groups that no longer exist need no deletion
+        ids = self.find_groups(groups)
+        names = {str(i): group for i, group in enumerate(ids)}
+        operations = [
+            {'method': 'DELETE', 'path': f'/Groups/{ids[group]}', 'bulkId': bulk_id}
+            for bulk_id, group
+            in names.items()
+        ]
+        errors = self._bulk_or_fallback(operations, names, 404)
+        return super().delete_groups(list(ids)) if errors is None else errors
+
+    def list_clusters(self) -> Iterator[Dict[str, str]]:
+        params = {'page_size': PAGE_SIZE}
+        while True:
+            response = self.request('GET', '/clusters/list', params=params, api_version=CLUSTERS_API_VERSION)
+            yield from parse_clusters(response)
+
+            # Continue with the next page
+            if not response.get('next_page_token'):
+                return
+            params = {'page_size': PAGE_SIZE, 'page_token': response['next_page_token']}
+
+    def get_cluster(self, cluster_id: str) -> Optional[Dict[str, str]]:
+        try:
+            response = self.request('GET', '/clusters/get', params={'cluster_id': cluster_id})
+        except requests.HTTPError as e:
+            if e.response.status_code in (400, 404):
+                return None
+            raise
+        return next(parse_clusters({'clusters': [response]}))
+
+    def get_cluster_config(self, cluster_id: str) -> Dict:
+        return self.request('GET', '/clusters/get', params={'cluster_id': cluster_id})
+
+    def get_cluster_events(self, cluster_id: str, start_time: int, event_types: List[str] = None) -> Optional[List[Dict]]:
+        body = {'cluster_id': cluster_id, 'start_time': start_time, 'order': 'ASC', 'limit': EVENTS_PAGE_SIZE}
+        if event_types:
+            body['event_types'] = event_types
+
+        events = []
+        while True:
+            try:
+                response = self.request('POST', '/clusters/events', body)
+            except requests.HTTPError as e:
+                if e.response.status_code in (400, 404):
+                    return None
+                raise
+            events += response.get('events', [])
+
+            # Continue with the next page
+            if not response.get('next_page'):
+                return events
+            body = response['next_page']
+
+    def list_spark_versions(self) -> List[Dict[str, str]]:
+        return self.request('GET', '/clusters/spark-versions')['versions']
+
+    def create_cluster(self, cluster_config: Dict) -> str:
+        return self.request('POST', '/clusters/create', cluster_config)['cluster_id']
+
+    def edit_cluster(self, cluster_config: Dict):
+        self.request('POST', '/clusters/edit', cluster_config)
+
+    def terminate_cluster(self, cluster_id: str):
+        self.request('POST', '/clusters/delete', {'cluster_id': cluster_id})
+
+    def delete_cluster(self, cluster_id: str):
+        self.request('POST', '/clusters/permanent-delete', {'cluster_id': cluster_id})
+
+    def list_instance_pools(self) -> List[Dict]:
+        return self.request('GET', '/instance-pools/list').get('instance_pools', [])
+
+    def create_instance_pool(self, pool_config: Dict) -> str:
+        return self.request('POST', '/instance-pools/create', pool_config)['instance_pool_id']
+
+    def edit_instance_pool(self, pool_config: Dict):
+        self.request('POST', '/instance-pools/edit', pool_config)
+
+    def list_scopes(self) -> Iterator[Dict[str, str]]:
+        return parse_scopes(self.request('GET', '/secrets/scopes/list'))
+
+    def create_scope(self, scope: str, resource_id: str, dns_name: str):
+        self.request('POST', '/secrets/scopes/create', scope_create_request(scope, resource_id, dns_name))
+
+    def delete_scope(self, scope: str):
+        self.request('POST', '/secrets/scopes/delete', {'scope': scope})
+
+    def list_acls(self, scope: str) -> Dict[str, str]:
+        return parse_acls(self.request('GET', '/secrets/acls/list', params={'scope': scope}))
+
+    def list_secrets(self, scope: str) -> List[Dict]:
+        return parse_secrets(self.request('GET', '/secrets/list', params={'scope': scope}))
+
+    def put_acl(self, scope: str, principal: str, permission: str):
+        self.request('POST', '/secrets/acls/put', {'scope': scope, 'principal': principal, 'permission': permission})
+
+    def delete_acl(self, scope: str, principal: str):
+        self.request('POST', '/secrets/acls/delete', {'scope': scope, 'principal': principal})
+
+    def get_permissions(self, object_type: str, object_id: str) -> Dict:
+        return self.request('GET', f'/permissions/{object_type}/{object_id}')
+
+    def set_permissions(self, object_type: str, object_id: str, permissions: Dict) -> Dict:
+        return self.request('PUT', f'/permissions/{object_type}/{object_id}', permissions)
+
+    def update_permissions(self, object_type: str, object_id: str, permissions: Dict) -> Dict:
+        return self.request('PATCH', f'/permissions/{object_type}/{object_id}', permissions)
+
+
+class CliBackend(Backend):
+    """Backend spawning the databricks cli for every call, kept as a fallback
+
+    :param str profile: The profile configured for the workspace
+    """
+
+    def __init__(self, profile: str):
+        self.profile = profile
+        self._governor = None
+
+    @property
+    def governor(self) -> Governor:
+        # The governor is shared with the rest backends of the workspace
+        if self._governor is None:
+            self._governor = get_governor(get_profile_config(self.profile).host)
+        return self._governor
+
+    def run_json(self, *args: str) -> Dict:
+        """Run a databricks cli command with json output against the profile
+
+        :param str args: The cli arguments, i.e. 'clusters', 'list'
+
+        :return: The json output of the command
+        :rtype: Dict
+        """
+        return json.loads(self.run(*args, '--output', 'JSON') or b'{}')
+
+    def run(self, *args: str) -> bytes:
+        """Run a databricks cli command against the profile
+
+        :param str args: The cli arguments, i.e. 'clusters', 'list'
+
+        :return: The standard output of the command
+        :rtype: bytes
+        """
+        query = ['databricks', *args, '--profile', self.profile]
+
+        # Run and enforce success
+        def attempt() -> bytes:
+            with call_span(f'databricks {" ".join(args[:2])}') as record:
+                sp = subprocess.run(query, capture_output=True)
+                record_payload(record, 0, len(sp.stdout))
+                sp.check_returncode()
+            return sp.stdout
+
+        # Only reads are repeated after a connection error
+        return self.governor.call(attempt, idempotent=len(args) > 1 and args[1] in CLI_READ_COMMANDS)
+
+    def list_groups(self) -> List[str]:
+        return json.loads(self.run('groups', 'list')).get('group_names', [])
+
+    def create_group(self, group: str):
+        self.run('groups', 'create', '--group-name', group)
+
+    def delete_group(self, group: str):
+        self.run('groups', 'delete', '--group-name', group)
+
+    def list_group_members(self, group: str) -> List[str]:
+        return parse_members(json.loads(self.run('groups', 'list-members', '--group-name', group)))
+
+    def list_clusters(self) -> Iterator[Dict[str, str]]:
+        return parse_clusters(self.run_json('clusters', 'list'))
+
+    def get_cluster(self, cluster_id: str) -> Optional[Dict[str, str]]:
+        try:
+            response = json.loads(self.run('clusters', 'get', '--cluster-id', cluster_id))
+        except subprocess.CalledProcessError as e:
+            if b'does not exist' in (e.stderr or b'') + (e.stdout or b''):
+                return None
+            raise
+        return next(parse_clusters({'clusters': [response]}))
+
+    def get_cluster_config(self, cluster_id: str) -> Dict:
+        return json.loads(self.run('clusters', 'get', '--cluster-id', cluster_id))
+
+    def get_cluster_events(self, cluster_id: str, start_time: int, event_types: List[str] = None) -> Optional[List[Dict]]:
+        args = ['clusters', 'events', '--cluster-id', cluster_id, '--start-time', str(start_time), '--order', 'ASC']
+        for event_type in event_types or []:
+            args += ['--event-type', event_type]
+
+        events = []
+        while True:
+            try:
+                response = self.run_json(*args, '--offset', str(len(events)), '--limit', str(EVENTS_PAGE_SIZE))
+            except subprocess.CalledProcessError as e:
+                if b'does not exist' in (e.stderr or b'') + (e.stdout or b''):
+                    return None
+                raise
+            events += response.get('events', [])
+
+            # Continue with the next page
+            if not response.get('next_page'):
+                return events
+
+    def list_spark_versions(self) -> List[Dict[str, str]]:
+        return json.loads(self.run('clusters', 'spark-versions'))['versions']
+
+    def create_cluster(self, cluster_config: Dict) -> str:
+        stdout = self.run('clusters', 'create', '--json', json.dumps(cluster_config, ensure_ascii=False))
+        return json.loads(stdout)['cluster_id']
+
+    def edit_cluster(self, cluster_config: Dict):
+        self.run('clusters', 'edit', '--json', json.dumps(cluster_config, ensure_ascii=False))
+
+    def terminate_cluster(self, cluster_id: str):
+        self.run('clusters', 'delete', '--cluster-id', cluster_id)
+
+    def delete_cluster(self, cluster_id: str):
+        self.run('clusters', 'permanent-delete', '--cluster-id', cluster_id)
+
+    def list_instance_pools(self) -> List[Dict]:
+        return self.run_json('instance-pools', 'list').get('instance_pools', [])
+
+    def create_instance_pool(self, pool_config: Dict) -> str:
+        stdout = self.run('instance-pools', 'create', '--json', json.dumps(pool_config, ensure_ascii=False))
+        return json.loads(stdout)['instance_pool_id']
+
+    def edit_instance_pool(self, pool_config: Dict):
+        self.run('instance-pools', 'edit', '--json', json.dumps(pool_config, ensure_ascii=False))
+
+    def list_scopes(self) -> Iterator[Dict[str, str]]:
+        return parse_scopes(self.run_json('secrets', 'list-scopes'))
+
+    def create_scope(self, scope: str, resource_id: str, dns_name: str):
+        self.run(
+            'secrets', 'create-scope',
+            '--scope', scope,
+            '--scope-backend-type', 'AZURE_KEYVAULT',
+            '--resource-id', resource_id,
+            '--dns-name', dns_name
+        )
+
+    def delete_scope(self, scope: str):
+        self.run('secrets', 'delete-scope', '--scope', scope)
+
+    def list_acls(self, scope: str) -> Dict[str, str]:
+        return parse_acls(self.run_json('secrets', 'list-acls', '--scope', scope))
+
+    def list_secrets(self, scope: str) -> List[Dict]:
+        return parse_secrets(self.run_json('secrets', 'list', '--scope', scope))
+
+    def put_acl(self, scope: str, principal: str, permission: str):
+        self.run('secrets', 'put-acl', '--scope', scope, '--principal', principal, '--permission', permission)
+
+    def delete_acl(self, scope: str, principal: str):
+        self.run('secrets', 'delete-acl', '--scope', scope, '--principal', principal)
+
+
+# The available backends
+BACKENDS = {
+    'rest': RestBackend,
+    'cli': CliBackend,
+}
+
+_backend_type = os.environ.get(BACKEND_ENV_VAR, 'rest')
+_backends: Dict[Tuple[str, str], Backend] = {}
+_rest_backends: Dict[Tuple[str, str], RestBackend] = {}
+_aad_backends: Dict[str, Tuple[str, RestBackend]] = {}
+_lock = threading.Lock()
+
+
+def set_backend_type(backend_type: str):
+    """Select the backend used for all subsequent workspace calls
+
+    :param str backend_type: The backend type, one of BACKENDS
+    """
+    global _backend_type
+    if backend_type not in BACKENDS:
+        raise ValueError(f'Unknown backend {backend_type}, expected one of {list(BACKENDS)}')
+    _backend_type = backend_type
+
+
+def get_rest_backend(config: DatabricksConfig) -> RestBackend:
+    """Get the shared rest backend for a workspace configuration
+
+    :param DatabricksConfig config: The configuration of the workspace
+
+    :return: The rest backend holding the pooled session of the workspace
+    :rtype: RestBackend
+    """
+    key = (config.host, config.token)
+    with _lock:
+        if key not in _rest_backends:
+            _rest_backends[key] = RestBackend(config)
+        return _rest_backends[key]
+
+
+def get_backend(profile: str) -> Backend:
+    """Get the shared backend for a profile
+
+    :param str profile: The profile configured for the workspace
+
+    :return: The backend for the profile
+    :rtype: Backend
+    """
+    key = (_backend_type, profile)
+    if key not in _backends:
+        if _backend_type == 'cli':
+            backend = CliBackend(profile)
+        else:
+            backend = get_rest_backend(get_profile_config(profile))
+        with _lock:
+            _backends.setdefault(key, backend)
+
+    return _backends[key]
+
+
+def get_aad_backend(profile: str) -> RestBackend:
+    """Get the rest backend of a profile authenticated with the azure ad token of the current identity
+
+    Key vault backed secret scopes can only be created with an azure ad token, those calls always use the rest api.
+
+    :param str profile: The profile configured for the workspace
+
+    :return: The rest backend of the workspace
+    :rtype: RestBackend
+    """
+    config = get_profile_config(profile)
+    token = get_aad_token()
+    with _lock:
+        # The session of an expired token is replaced
+        cached_token, backend = _aad_backends.get(config.host, (None, None))
+        if cached_token != token:
+            if backend is not None:
+                backend.session.close()
+            backend = RestBackend(
+                DatabricksConfig(host=config.host, username=None, password=None, token=token, insecure=config.insecure)
+            )
+            _aad_backends[config.host] = (token, backend)
+        return backend
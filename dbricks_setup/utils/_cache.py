@@ -0,0 +1,170 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict
+
+import logging
+from databricks_cli.configure.provider import ProfileConfigProvider
+
+logger = logging.getLogger(__name__)
+
+# The environment variables controlling the cache
+CACHE_DIR_ENV_VAR = 'DBRICKS_SETUP_CACHE_DIR'
+NO_CACHE_ENV_VAR = 'DBRICKS_SETUP_NO_CACHE'
+
+# The version of the cached record format
+CACHE_VERSION = 2
+
+# The time to live in seconds for each cached object type
+TTLS = {
+    'groups': 3600,
+    'clusters': 60,
+    'scopes': 300,
+    'spark_versions': 86400,
+}
+
+_enabled = not os.environ.get(NO_CACHE_ENV_VAR)
+_caches: Dict[str, 'WorkspaceCache'] = {}
+_lock = threading.Lock()
+
+
+def get_cache_dir() -> str:
+    """Get the directory of the cached workspace state
+
+    :return: The directory, from DBRICKS_SETUP_CACHE_DIR or ~/.cache/dbricks_setup
+    :rtype: str
+    """
+    return os.environ.get(CACHE_DIR_ENV_VAR, os.path.join(os.path.expanduser('~'), '.cache', 'dbricks_setup'))
+
+
+def workspace_digest(key: str) -> str:
+    """Get the file name safe digest of a workspace
+
+    :param str key: The key of the workspace, i.e. profile@host
+
+    :return: The digest
+    :rtype: str
+    """
+    return hashlib.sha256(f'{CACHE_VERSION}:{key}'.encode()).hexdigest()[:16]
+
+
+class WorkspaceCache:
+    """On disk cache of the state of a single workspace
+
+    Entries are stored per object type with the time they were extracted, and expire after the ttl of the type.
+    Updates made by this tool are written through to the cached entries without refreshing their timestamp.
+
+    :param str key: The key of the workspace, i.e. profile@host
+    """
+
+    def __init__(self, key: str):
+        self.key = key
+        self.path = os.path.join(get_cache_dir(), f'{workspace_digest(key)}.json')
+        self._lock = threading.RLock()
+
+    def _read(self) -> Dict[str, Dict]:
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write(self, entries: Dict[str, Dict]):
+        # Write atomically so concurrent processes never read a partial file
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.path), suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(entries, f)
+        os.replace(tmp_path, self.path)
+
+    @property
+    def enabled(self) -> bool:
+        return _enabled
+
+    def get(self, object_type: str) -> Any:
+        """Get a cached object
+
+        :param str object_type: The object type, one of TTLS
+
+        :return: The cached value, None if missing, expired or the cache is disabled
+        :rtype: Any
+        """
+        if not _enabled:
+            return None
+
+        with self._lock:
+            entry = self._read().get(object_type)
+        if entry is None or time.time() - entry['timestamp'] > TTLS[object_type]:
+            return None
+
+        logger.debug(f'Using cached {object_type} for {self.key}')
+        return entry['value']
+
+    def set(self, object_type: str, value: Any):
+        """Cache a freshly extracted object
+
+        :param str object_type: The object type, one of TTLS
+        :param Any value: The json serializable value
+        """
+        if not _enabled:
+            return
+
+        with self._lock:
+            entries = self._read()
+            entries[object_type] = {'timestamp': time.time(), 'value': value}
+            self._write(entries)
+
+    def update(self, object_type: str, func: Callable[[Any], Any]):
+        """Write a change made by this tool through to a cached object, keeping its timestamp
+
+        :param str object_type: The object type, one of TTLS
+        :param Callable[[Any], Any] func: Function returning the updated value from the cached value
+        """
+        if not _enabled:
+            return
+
+        with self._lock:
+            entries = self._read()
+            entry = entries.get(object_type)
+            if entry is None or time.time() - entry['timestamp'] > TTLS[object_type]:
+                return
+            entry['value'] = func(entry['value'])
+            self._write(entries)
+
+    def invalidate(self, object_type: str):
+        """Remove a cached object
+
+        :param str object_type: The object type, one of TTLS
+        """
+        with self._lock:
+            entries = self._read()
+            if entries.pop(object_type, None) is not None:
+                self._write(entries)
+
+
+def set_cache_enabled(enabled: bool):
+    """Enable or disable the workspace cache for all subsequent calls
+
+    :param bool enabled: Whether the cache is used
+    """
+    global _enabled
+    _enabled = enabled
+
+
+def get_cache(profile: str) -> WorkspaceCache:
+    """Get the cache of the workspace configured for a profile
+
+    :param str profile: The profile configured for the workspace
+
+    :return: The workspace cache keyed by profile and host
+    :rtype: WorkspaceCache
+    """
+    with _lock:
+        if profile not in _caches:
+            config = ProfileConfigProvider(profile).get_config()
+            host = config.host.rstrip('/') if config is not None and config.host else ''
+            _caches[profile] = WorkspaceCache(f'{profile}@{host}')
+        return _caches[profile]
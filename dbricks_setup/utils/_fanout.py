@@ -0,0 +1,150 @@
+import contextvars
+import io
+import sys
+import threading
+import time
+from argparse import Namespace
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional
+
+import logging
+
+from ._pool import ContextThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# The maximum number of workspaces handled concurrently by default
+MAX_PROFILE_WORKERS = 16
+
+# The profile of the workspace the current thread works on, used to tag its output
+_workspace: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar('dbricks_setup_workspace', default=None)
+
+
+class WorkspaceLogFilter(logging.Filter):
+    """Prefixes the log records emitted while working on a workspace with its profile"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        workspace = _workspace.get()
+        if workspace is not None and not getattr(record, 'workspace', None):
+            record.workspace = workspace
+            record.msg = f'[{workspace}] {record.msg}'
+        return True
+
+
+class TaggedStream(io.TextIOBase):
+    """Text stream prefixing every line written while working on a workspace with its profile
+
+    Lines are buffered per thread and written whole, so the output of concurrent workspaces does not interleave
+    within a line.
+
+    :param stream: The stream written to, i.e. sys.stdout
+    """
+
+    def __init__(self, stream):
+        super().__init__()
+        self.stream = stream
+        self._buffers = threading.local()
+        self._lock = threading.Lock()
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        workspace = _workspace.get()
+        if workspace is None:
+            return self.stream.write(text)
+
+        buffer = getattr(self._buffers, 'text', '') + text
+        lines = buffer.split('\n')
+        self._buffers.text = lines.pop()
+        if lines:
+            with self._lock:
+                self.stream.write(''.join(f'[{workspace}] {line}\n' for line in lines))
+        return len(text)
+
+    def flush(self):
+        workspace = _workspace.get()
+        buffer = getattr(self._buffers, 'text', '')
+        if workspace is not None and buffer:
+            self._buffers.text = ''
+            with self._lock:
+                self.stream.write(f'[{workspace}] {buffer}')
+        self.stream.flush()
+
+
+@contextmanager
+def tagged_output() -> Iterator[None]:
+    """Tag the standard output and log records of every workspace with its profile"""
+    log_filter = WorkspaceLogFilter()
+    handlers = list(logging.getLogger().handlers)
+    for handler in handlers:
+        handler.addFilter(log_filter)
+    stdout = sys.stdout
+    sys.stdout = TaggedStream(stdout)
+    try:
+        yield
+    finally:
+        sys.stdout = stdout
+        for handler in handlers:
+            handler.removeFilter(log_filter)
+
+
+def run_for_profiles(
+        func: Callable[[Namespace], None],
+        args: Namespace,
+        profiles: List[str],
+        max_workers: int = None) -> List[Dict]:
+    """Run a command against every workspace concurrently, one copy of the arguments per profile
+
+    :param Callable[[Namespace], None] func: The function handling the command
+    :param Namespace args: The arguments from the cli, the profile is replaced for every workspace
+    :param List[str] profiles: The profiles configured for the workspaces
+    :param int max_workers: The maximum number of concurrent workspaces, every workspace by default
+
+    :return: The profile, status, seconds and error of every workspace in the order of the profiles
+    :rtype: List[Dict]
+    """
+    if max_workers is None:
+        max_workers = min(len(profiles), MAX_PROFILE_WORKERS)
+
+    def run(profile: str) -> Dict:
+        _workspace.set(profile)
+        start = time.perf_counter()
+        try:
+            func(Namespace(**{**vars(args), 'profile': profile}))
+            error = None
+        except Exception as e:
+            logger.error(f'Failed: {e}')
+            error = e
+        finally:
+            sys.stdout.flush()
+        return {
+            'profile': profile,
+            'status': 'ok' if error is None else 'failed',
+            'seconds': time.perf_counter() - start,
+            'error': '' if error is None else f'{type(error).__name__}: {error}',
+        }
+
+    logger.info(f'Running against {len(profiles)} workspaces, {max_workers} at a time')
+    with tagged_output(), ContextThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = [executor.submit(run, profile) for profile in profiles]
+        return [future.result() for future in futures]
+
+
+def format_summary(results: List[Dict]) -> str:
+    """Describe the outcome of every workspace
+
+    :param List[Dict] results: The results of run_for_profiles
+
+    :return: The summary table
+    :rtype: str
+    """
+    width = max([len('Workspace')] + [len(result['profile']) for result in results]) + 2
+    summary = f'{"Workspace".ljust(width)}{"Status".ljust(8)}{"Seconds".rjust(8)}  Error'
+    for result in results:
+        summary += (
+            f'\n{result["profile"].ljust(width)}{result["status"].ljust(8)}{result["seconds"]:8.2f}  {result["error"]}'
+        )
+    failed = sum(1 for result in results if result['status'] != 'ok')
+    summary += f'\n{len(results) - failed} of {len(results)} workspaces succeeded'
+    return summary
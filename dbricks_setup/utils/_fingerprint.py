@@ -0,0 +1,116 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from typing import Any, Dict, Optional
+
+import logging
+
+from ._cache import get_cache, get_cache_dir, workspace_digest
+
+logger = logging.getLogger(__name__)
+
+# The custom tag holding the fingerprint of the desired state a cluster was configured with
+FINGERPRINT_TAG = 'dbricks_setup_fingerprint'
+
+# The custom tag holding the sizing a cluster was given, kept by the updates not supplying one
+SIZING_TAG = 'dbricks_setup_sizing'
+
+# The number of hex digits of a fingerprint
+FINGERPRINT_LENGTH = 16
+
+_stores: Dict[str, 'FingerprintStore'] = {}
+_lock = threading.Lock()
+
+
+def fingerprint(*parts: Any) -> str:
+    """Get a stable hash of the desired state of a resource
+
+    :param Any parts: The json serializable parts of the desired state, i.e. the configuration and the acls
+
+    :return: The fingerprint
+    :rtype: str
+    """
+    payload = json.dumps(parts, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(payload.encode()).hexdigest()[:FINGERPRINT_LENGTH]
+
+
+class FingerprintStore:
+    """Local sidecar of the fingerprints of resources that can not be tagged, i.e. secret scopes
+
+    Unlike the workspace cache the fingerprints do not expire, they are ignored when the cache is disabled.
+
+    :param str key: The key of the workspace, i.e. profile@host
+    :param bool enabled: Whether fingerprints are read and written
+    """
+
+    def __init__(self, key: str, enabled: bool = True):
+        self.key = key
+        self.enabled = enabled
+        self.path = os.path.join(get_cache_dir(), f'{workspace_digest(key)}.fingerprints.json')
+        self._lock = threading.Lock()
+
+    def _read(self) -> Dict[str, Dict[str, str]]:
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write(self, fingerprints: Dict[str, Dict[str, str]]):
+        # Write atomically so concurrent processes never read a partial file
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.path), suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(fingerprints, f)
+        os.replace(tmp_path, self.path)
+
+    def get(self, kind: str, name: str) -> Optional[str]:
+        """Get the fingerprint of a resource
+
+        :param str kind: The resource type, i.e. scopes
+        :param str name: The name of the resource
+
+        :return: The fingerprint, None if unknown or disabled
+        :rtype: Optional[str]
+        """
+        if not self.enabled:
+            return None
+        with self._lock:
+            return self._read().get(kind, {}).get(name)
+
+    def set(self, kind: str, name: str, value: Optional[str]):
+        """Record the fingerprint of a resource, None forgets it
+
+        :param str kind: The resource type, i.e. scopes
+        :param str name: The name of the resource
+        :param Optional[str] value: The fingerprint
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            fingerprints = self._read()
+            if value is None:
+                if fingerprints.get(kind, {}).pop(name, None) is None:
+                    return
+            else:
+                fingerprints.setdefault(kind, {})[name] = value
+            self._write(fingerprints)
+
+
+def get_fingerprints(profile: str) -> FingerprintStore:
+    """Get the fingerprint sidecar of the workspace configured for a profile
+
+    :param str profile: The profile configured for the workspace
+
+    :return: The fingerprint store, disabled along with the workspace cache
+    :rtype: FingerprintStore
+    """
+    cache = get_cache(profile)
+    with _lock:
+        store = _stores.get(cache.key)
+        if store is None:
+            store = _stores[cache.key] = FingerprintStore(cache.key)
+        store.enabled = cache.enabled
+        return store
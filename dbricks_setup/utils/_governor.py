@@ -0,0 +1,255 @@
+import asyncio
+import contextvars
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, Iterator, Optional
+
+import logging
+
+from ._retry import is_rate_limited, is_transient, is_unavailable, retry_after
+from ._timing import record_retry
+
+logger = logging.getLogger(__name__)
+
+# The defaults of the governors, no rate limit and six retries with a delay growing from half a second
+DEFAULT_RATE = 0.0
+DEFAULT_MAX_RETRIES = 6
+DEFAULT_BASE_DELAY = 0.5
+DEFAULT_MAX_DELAY = 30.0
+
+_governors: Dict[str, 'Governor'] = {}
+_settings = {'rate': DEFAULT_RATE, 'burst': None, 'max_retries': DEFAULT_MAX_RETRIES}
+_lock = threading.Lock()
+_retry_counter: contextvars.ContextVar[Optional[Dict[str, int]]] = contextvars.ContextVar(
+    'dbricks_setup_retry_counter', default=None
+)
+
+
+class Governor:
+    """Gate every call to one workspace goes through, limiting the call rate and retrying transient failures
+
+    Calls take a token from a bucket refilled at the rate limit before they are issued. Throttled calls pause every
+    caller of the workspace until the delay requested by the workspace passed, the other transient failures are
+    retried by the failing caller alone. The delay grows exponentially with full jitter.
+
+    Throttled and unavailable calls are always retried, calls that failed with a gateway or connection error only
+    when they are idempotent since the workspace may have applied them.
+
+    :param float rate: The number of calls per second, 0 disables the limit
+    :param int burst: The number of calls issued at once after an idle period, the rate by default
+    :param float base_delay: The delay in seconds before the first retry
+    :param float max_delay: The upper bound of the delay in seconds
+    :param int max_retries: The number of retries of a call before giving up
+    """
+
+    def __init__(
+            self,
+            rate: float = DEFAULT_RATE,
+            burst: int = None,
+            base_delay: float = DEFAULT_BASE_DELAY,
+            max_delay: float = DEFAULT_MAX_DELAY,
+            max_retries: int = DEFAULT_MAX_RETRIES):
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_retries = max_retries
+        self.counters = {'calls': 0, 'retries': 0, 'throttled': 0, 'failures': 0, 'waited_seconds': 0.0}
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+        self.configure(rate, burst)
+
+    def configure(self, rate: float, burst: int = None):
+        """Change the rate limit
+
+        :param float rate: The number of calls per second, 0 disables the limit
+        :param int burst: The number of calls issued at once after an idle period, the rate by default
+        """
+        with self._lock:
+            self.rate = max(0.0, rate)
+            self.burst = max(1, burst or int(self.rate) or 1)
+            self._tokens = float(self.burst)
+            self._refilled = time.monotonic()
+
+    def _reserve(self) -> float:
+        """Take a token for a call
+
+        The bucket may go into debt, the debt of a call is the time it has to wait.
+
+        :return: The seconds to wait before issuing the call
+        :rtype: float
+        """
+        with self._lock:
+            now = time.monotonic()
+            delay = max(0.0, self._paused_until - now)
+            if self.rate:
+                self._tokens = min(self.burst, self._tokens + (now - self._refilled) * self.rate)
+                self._refilled = now
+                self._tokens -= 1
+                if self._tokens < 0:
+                    delay = max(delay, -self._tokens / self.rate)
+            self.counters['calls'] += 1
+            self.counters['waited_seconds'] += delay
+            return delay
+
+    def _should_retry(self, error: Exception, retries: int, idempotent: bool) -> bool:
+        if retries >= self.max_retries:
+            return False
+        if is_rate_limited(error) or is_unavailable(error):
+            return True
+        return idempotent and is_transient(error)
+
+    def _retry(self, error: Exception, retries: int) -> float:
+        """Count a retry and get its delay
+
+        :param Exception error: The error of the failed call
+        :param int retries: The number of the retry
+
+        :return: The seconds the caller has to wait on its own, a throttled call pauses the whole workspace instead
+        :rtype: float
+        """
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (retries - 1)))
+        delay = max(delay, min(self.max_delay, retry_after(error)))
+
+        with self._lock:
+            self.counters['retries'] += 1
+            if is_rate_limited(error):
+                self.counters['throttled'] += 1
+                self._paused_until = max(self._paused_until, time.monotonic() + delay)
+        record_retry()
+        counter = _retry_counter.get()
+        if counter is not None:
+            counter['retries'] += 1
+
+        logger.warning(f'{type(error).__name__}: {error}, retry {retries} in {delay:.1f}s')
+        return 0.0 if is_rate_limited(error) else delay
+
+    def _failed(self):
+        with self._lock:
+            self.counters['failures'] += 1
+
+    def call(self, func: Callable, *args, idempotent: bool = True, **kwargs) -> Any:
+        """Call a function making one remote call, retrying it while it fails transiently
+
+        :param Callable func: The function making the remote call
+        :param bool idempotent: Whether repeating the call has no further effect
+
+        :return: The result of the call
+        :rtype: Any
+        """
+        retries = 0
+        while True:
+            delay = self._reserve()
+            if delay:
+                time.sleep(delay)
+
+            try:
+                return func(*args, **kwargs)
+            except Exception as e:
+                if not self._should_retry(e, retries, idempotent):
+                    self._failed()
+                    raise
+                retries += 1
+                delay = self._retry(e, retries)
+                if delay:
+                    time.sleep(delay)
+
+    async def acall(self, func: Callable[..., Awaitable], *args, idempotent: bool = True, **kwargs) -> Any:
+        """Await a coroutine function making one remote call, retrying it while it fails transiently
+
+        :param Callable[..., Awaitable] func: The coroutine function making the remote call
+        :param bool idempotent: Whether repeating the call has no further effect
+
+        :return: The result of the call
+        :rtype: Any
+        """
+        retries = 0
+        while True:
+            delay = self._reserve()
+            if delay:
+                await asyncio.sleep(delay)
+
+            try:
+                return await func(*args, **kwargs)
+            except Exception as e:
+                if not self._should_retry(e, retries, idempotent):
+                    self._failed()
+                    raise
+                retries += 1
+                delay = self._retry(e, retries)
+                if delay:
+                    await asyncio.sleep(delay)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the counters of the governor
+
+        :return: The number of calls, retries, throttled calls and failed calls, and the seconds spent waiting
+        :rtype: Dict[str, Any]
+        """
+        with self._lock:
+            return dict(self.counters)
+
+
+def get_governor(host: str) -> Governor:
+    """Get the governor shared by every call to a workspace
+
+    :param str host: The host of the workspace
+
+    :return: The governor
+    :rtype: Governor
+    """
+    host = host.rstrip('/')
+    with _lock:
+        governor = _governors.get(host)
+        if governor is None:
+            governor = _governors[host] = Governor(
+                _settings['rate'], _settings['burst'], max_retries=_settings['max_retries']
+            )
+        return governor
+
+
+def configure_governors(rate: float = None, burst: int = None, max_retries: int = None):
+    """Change the rate limit and retries of every workspace, including the governors already in use
+
+    :param float rate: The number of calls per second per workspace, 0 disables the limit
+    :param int burst: The number of calls issued at once after an idle period, the rate by default
+    :param int max_retries: The number of retries of a call before giving up
+    """
+    with _lock:
+        if rate is not None:
+            _settings['rate'], _settings['burst'] = rate, burst
+        if max_retries is not None:
+            _settings['max_retries'] = max_retries
+        governors = list(_governors.values())
+
+    for governor in governors:
+        if rate is not None:
+            governor.configure(rate, burst)
+        if max_retries is not None:
+            governor.max_retries = max_retries
+
+
+def governor_report() -> Dict[str, Dict[str, Any]]:
+    """Get the counters of the governor of every workspace called
+
+    :return: The counters by host
+    :rtype: Dict[str, Dict[str, Any]]
+    """
+    with _lock:
+        governors = dict(_governors)
+    return {host: governor.stats() for host, governor in sorted(governors.items())}
+
+
+@contextmanager
+def count_retries() -> Iterator[Dict[str, int]]:
+    """Count the retries of the calls made within, i.e. of one acl change
+
+    :return: The counter, its retries are final when the block exits
+    :rtype: Iterator[Dict[str, int]]
+    """
+    counter = {'retries': 0}
+    token = _retry_counter.set(counter)
+    try:
+        yield counter
+    finally:
+        _retry_counter.reset(token)
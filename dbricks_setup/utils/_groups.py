@@ -1,43 +1,137 @@
-import json
-import subprocess
-from typing import List
+import bisect
+from typing import Iterable, Iterator, List
 
 import logging
 
+from ._backend import get_backend
+from ._cache import get_cache
+from ._pool import ContextThreadPoolExecutor
+from ._timing import span
+
 logger = logging.getLogger(__name__)
 
+# The number of prefixes above which extracting every group is cheaper than a filtered query per prefix
+MAX_PREFIX_QUERIES = 10
+
+
+class GroupIndex:
+    """Set of group names supporting constant time membership and prefix lookups
+
+    :param Iterable[str] groups: The group names
+    """
+
+    def __init__(self, groups: Iterable[str]):
+        self._names = set(groups)
+        self._sorted = sorted(self._names)
+
+    def __contains__(self, group: str) -> bool:
+        return group in self._names
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._sorted)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def with_prefix(self, prefix: str) -> List[str]:
+        """Get the groups starting with a prefix
 
-def get_groups(profile: str) -> List[str]:
-    """Get the list of groups from the configured workspace
+        :param str prefix: The prefix of the group names
+
+        :return: The matching groups in order
+        :rtype: List[str]
+        """
+        start = bisect.bisect_left(self._sorted, prefix)
+        end = start
+        while end < len(self._sorted) and self._sorted[end].startswith(prefix):
+            end += 1
+        return self._sorted[start:end]
+
+
+def get_groups(profile: str) -> GroupIndex:
+    """Get every group from the configured workspace
 
     :param str profile: The profile configured for the workspace
 
     :return: The available groups
-    :rtype: List[str]
+    :rtype: GroupIndex
     """
 
+    # Use the cached groups if fresh
+    cache = get_cache(profile)
+    groups = cache.get('groups')
+
     # Query what groups are available
-    logger.info('Extracting group information')
-    group_query = f'databricks groups list --profile {profile}'
+    if groups is None:
+        logger.info('Extracting group information')
+        with span('get_groups'):
+            groups = get_backend(profile).list_groups()
+        cache.set('groups', groups)
+
+    return GroupIndex(groups)
+
+
+def find_groups(prefix: str, profile: str) -> GroupIndex:
+    """Get the groups starting with a prefix from the configured workspace, filtered by the workspace
+
+    :param str prefix: The prefix of the group names, i.e. cluster-<name>-
+    :param str profile: The profile configured for the workspace
 
-    # Run the group query
-    sp = subprocess.run(group_query, capture_output=True)
-    sp.check_returncode()
-    groups = json.loads(sp.stdout).get('group_names', [])
+    :return: The matching groups
+    :rtype: GroupIndex
+    """
+
+    # Use the cached groups if fresh
+    groups = get_cache(profile).get('groups')
+    if groups is not None:
+        return GroupIndex(GroupIndex(groups).with_prefix(prefix))
+
+    # Query only the matching groups
+    logger.info(f'Extracting groups starting with {prefix}')
+    with span('find_groups', prefix):
+        return GroupIndex(get_backend(profile).search_groups(prefix))
+
+
+def find_groups_with_prefixes(prefixes: List[str], profile: str, max_workers: int = 8) -> GroupIndex:
+    """Get the groups starting with any of a set of prefixes from the configured workspace
+
+    Few prefixes are queried concurrently, for many prefixes every group of the workspace is extracted once.
+
+    :param List[str] prefixes: The prefixes of the group names
+    :param str profile: The profile configured for the workspace
+    :param int max_workers: The maximum number of concurrent queries
+
+    :return: The matching groups
+    :rtype: GroupIndex
+    """
+    if len(prefixes) > MAX_PREFIX_QUERIES:
+        return get_groups(profile)
 
-    return groups
+    with ContextThreadPoolExecutor(max_workers=max(1, min(max_workers, len(prefixes)))) as executor:
+        indexes = list(executor.map(lambda prefix: find_groups(prefix, profile), prefixes))
+    return GroupIndex(group for index in indexes for group in index)
 
 
 def create_groups(groups: List[str], profile: str):
-    """Create a set of groups in the configured workspace
+    """Create a set of groups in the configured workspace, in bulk where supported
 
     :param List[str] groups: The list of groups to create
     :param str profile: The profile configured for the workspace
     """
-    if groups:
-        logger.info(f'Creating groups: {groups}')
-    for group in groups:
-        create_group(group, profile)
+    if not groups:
+        return
+
+    logger.info(f'Creating groups: {groups}')
+    with span('create_groups', f'{len(groups)} groups'):
+        errors = get_backend(profile).create_groups(groups)
+    created = [group for group in groups if group not in errors]
+    get_cache(profile).update('groups', lambda cached: cached + [group for group in created if group not in cached])
+
+    # Report every failed group
+    for group, error in errors.items():
+        logger.error(f'Failed to create group {group}: {error}')
+    if errors:
+        raise RuntimeError(f'Failed to create {len(errors)} of {len(groups)} groups: {sorted(errors)}')
 
 
 def create_group(group: str, profile: str):
@@ -47,12 +141,9 @@ def create_group(group: str, profile: str):
     :param str profile: The profile configured for the workspace
     """
     logger.info(f'Creating Group: {group}')
-    create_query = f'databricks groups create --profile {profile}'
-    create_query += f' --group-name {group}'
-
-    # Run and enforce success
-    sp = subprocess.run(create_query, capture_output=True)
-    sp.check_returncode()
+    with span('create_group', group):
+        get_backend(profile).create_group(group)
+    get_cache(profile).update('groups', lambda groups: groups + [group])
 
 
 def delete_group(group: str, profile: str):
@@ -62,11 +153,29 @@ def delete_group(group: str, profile: str):
     :param str profile: The profile configured for the workspace
     """
     # Remove the existing group
-    group_query = 'databricks groups delete'
-    group_query += f' --profile {profile}'
-    group_query += f' --group-name {group}'
-
-    # Run and enforce success
     logger.warning(f'Removing group {group}')
-    sp = subprocess.run(group_query, capture_output=True)
-    sp.check_returncode()
+    with span('delete_group', group):
+        get_backend(profile).delete_group(group)
+    get_cache(profile).update('groups', lambda groups: [g for g in groups if g != group])
+
+
+def delete_groups(groups: List[str], profile: str):
+    """Delete a set of groups in the configured workspace, in bulk where supported
+
+    :param List[str] groups: The list of groups to delete
+    :param str profile: The profile configured for the workspace
+    """
+    if not groups:
+        return
+
+    logger.warning(f'Removing groups {groups}')
+    with span('delete_groups', f'{len(groups)} groups'):
+        errors = get_backend(profile).delete_groups(groups)
+    deleted = set(groups) - set(errors)
+    get_cache(profile).update('groups', lambda cached: [group for group in cached if group not in deleted])
+
+    # Report every failed group
+    for group, error in errors.items():
+        logger.error(f'Failed to delete group {group}: {error}')
+    if errors:
+        raise RuntimeError(f'Failed to delete {len(errors)} of {len(groups)} groups: {sorted(errors)}')
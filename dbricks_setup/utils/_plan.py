@@ -0,0 +1,177 @@
+from concurrent.futures import FIRST_COMPLETED, wait
+from typing import Any, Callable, Dict, Iterable, List
+
+import logging
+
+from ._pool import ContextThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class Ref:
+    """Placeholder for the result of another operation of the plan, resolved when the operation runs
+
+    :param str key: The key of the operation
+    """
+
+    def __init__(self, key: str):
+        self.key = key
+
+    def __repr__(self) -> str:
+        return f'<{self.key}>'
+
+
+class Operation:
+    """A single remote change of a plan
+
+    :param str action: The name of the change, i.e. create_groups
+    :param str target: The resource changed, used in the plan description
+    :param Callable func: The function making the change
+    :param tuple args: The positional arguments of the function, Ref arguments are resolved when it runs
+    :param Iterable[str] depends_on: The keys of the operations that have to succeed first
+    :param dict kwargs: The keyword arguments of the function, Ref arguments are resolved when it runs
+    """
+
+    def __init__(self, action: str, target: str, func: Callable, args: tuple, depends_on: Iterable[str], kwargs: dict):
+        self.action = action
+        self.target = target
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.depends_on = list(depends_on)
+
+    @property
+    def key(self) -> str:
+        return f'{self.action}:{self.target}'
+
+    def run(self, results: Dict[str, Any]) -> Any:
+        """Run the operation, its remote calls are retried by the governor of the workspace
+
+        :param Dict[str, Any] results: The results of the finished operations
+
+        :return: The result of the function
+        :rtype: Any
+        """
+        args = [results[arg.key] if isinstance(arg, Ref) else arg for arg in self.args]
+        kwargs = {k: results[v.key] if isinstance(v, Ref) else v for k, v in self.kwargs.items()}
+        return self.func(*args, **kwargs)
+
+
+class Plan:
+    """Set of remote changes with the dependencies between them
+
+    Independent operations are executed concurrently, an operation starts as soon as every operation it depends on
+    succeeded. Operations depending on a failed operation are skipped.
+    """
+
+    def __init__(self):
+        self.operations: Dict[str, Operation] = {}
+
+    def __len__(self) -> int:
+        return len(self.operations)
+
+    def add(self, action: str, target: str, func: Callable, *args, depends_on: Iterable[str] = (), **kwargs) -> str:
+        """Add an operation to the plan
+
+        :param str action: The name of the change, i.e. create_groups
+        :param str target: The resource changed, unique per action
+        :param Callable func: The function making the change
+        :param Iterable[str] depends_on: The keys of the operations that have to succeed first
+
+        :return: The key of the operation
+        :rtype: str
+        """
+        operation = Operation(action, target, func, args, depends_on, kwargs)
+        if operation.key in self.operations:
+            raise ValueError(f'Operation {operation.key} is already planned')
+        self.operations[operation.key] = operation
+        return operation.key
+
+    def waves(self) -> List[List[Operation]]:
+        """Group the operations in waves, every operation only depends on operations of earlier waves
+
+        :return: The waves of operations in order
+        :rtype: List[List[Operation]]
+        """
+        for operation in self.operations.values():
+            unknown = [key for key in operation.depends_on if key not in self.operations]
+            if unknown:
+                raise ValueError(f'Operation {operation.key} depends on unknown operations {unknown}')
+
+        waves = []
+        done = set()
+        remaining = list(self.operations.values())
+        while remaining:
+            wave = [operation for operation in remaining if all(key in done for key in operation.depends_on)]
+            if not wave:
+                raise ValueError(f'Operations {[operation.key for operation in remaining]} have cyclic dependencies')
+            waves.append(wave)
+            done.update(operation.key for operation in wave)
+            remaining = [operation for operation in remaining if operation.key not in done]
+        return waves
+
+    def describe(self) -> str:
+        """Describe the operations of the plan by wave
+
+        :return: The description of the plan
+        :rtype: str
+        """
+        if not self.operations:
+            return 'Nothing to do'
+
+        description = f'Plan of {len(self)} operations:'
+        for i, wave in enumerate(self.waves()):
+            description += f'\n\tWave {i + 1}:'
+            for operation in wave:
+                description += f'\n\t\t{operation.action.ljust(24)}{operation.target}'
+        return description
+
+    def execute(self, max_workers: int = 8) -> Dict[str, Any]:
+        """Execute the plan, running independent operations concurrently
+
+        :param int max_workers: The maximum number of concurrent operations
+
+        :return: The result of every operation by key
+        :rtype: Dict[str, Any]
+        """
+        self.waves()
+
+        results = {}
+        failures = {}
+        skipped = set()
+        pending = dict(self.operations)
+
+        with ContextThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            running = {}
+
+            def submit_ready():
+                changed = True
+                while changed:
+                    changed = False
+                    for key, operation in list(pending.items()):
+                        # Skip the operations depending on a failed operation
+                        if any(k in failures or k in skipped for k in operation.depends_on):
+                            logger.warning(f'Skipping {key}, an operation it depends on failed')
+                            skipped.add(pending.pop(key).key)
+                            changed = True
+                        elif all(k in results for k in operation.depends_on):
+                            running[executor.submit(operation.run, results)] = pending.pop(key)
+
+            submit_ready()
+            while running:
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    operation = running.pop(future)
+                    try:
+                        results[operation.key] = future.result()
+                    except Exception as e:
+                        logger.error(f'Operation {operation.key} failed: {e}')
+                        failures[operation.key] = e
+                submit_ready()
+
+        if failures:
+            raise RuntimeError(
+                f'{len(failures)} of {len(self)} operations failed: {sorted(failures)}, skipped: {sorted(skipped)}'
+            )
+
+        return results
@@ -0,0 +1,40 @@
+import contextvars
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator
+
+
+class ContextThreadPoolExecutor(ThreadPoolExecutor):
+    """Thread pool running every task in a copy of the context it was submitted from
+
+    The workspace tag of the output and the timing span of the submitting thread carry over to the task.
+    """
+
+    def submit(self, fn: Callable, /, *args, **kwargs) -> Future:
+        return super().submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+def bounded_map(func: Callable, iterable: Iterable, max_workers: int, window: int = None) -> Iterator:
+    """Apply a function to the items of a lazy iterable concurrently, keeping the order of the items
+
+    Unlike Executor.map the iterable is consumed as the results are, at most window items are in flight so a listing
+    of any size is processed in constant memory.
+
+    :param Callable func: The function applied to every item
+    :param Iterable iterable: The items
+    :param int max_workers: The number of concurrent calls
+    :param int window: The number of items submitted ahead of the consumer, twice the workers by default
+
+    :return: The results in the order of the items
+    :rtype: Iterator
+    """
+    max_workers = max(1, max_workers)
+    window = max(max_workers, window or 2 * max_workers)
+    with ContextThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = deque()
+        for item in iterable:
+            pending.append(executor.submit(func, item))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
@@ -0,0 +1,94 @@
+import subprocess
+import sys
+from typing import Optional
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Markers of a throttled databricks cli call
+_CLI_RATE_LIMIT_MARKERS = (b'429', b'Too Many Requests', b'REQUEST_LIMIT_EXCEEDED')
+
+# Markers of a databricks cli call rejected by an unavailable workspace
+_CLI_UNAVAILABLE_MARKERS = (b'503', b'Service Unavailable', b'TEMPORARILY_UNAVAILABLE')
+
+# The http status codes of calls that may succeed when repeated
+TRANSIENT_STATUS_CODES = (429, 502, 503, 504)
+
+
+def is_rate_limited(error: Exception) -> bool:
+    """Check whether an error raised by a backend call was caused by throttling
+
+    :param Exception error: The error raised by the backend
+
+    :return: Whether the workspace answered with HTTP 429
+    :rtype: bool
+    """
+    response = getattr(error, 'response', None)
+    if response is not None and hasattr(response, 'status_code'):
+        return response.status_code == 429
+    if isinstance(error, subprocess.CalledProcessError):
+        output = (error.stderr or b'') + (error.stdout or b'')
+        return any(marker in output for marker in _CLI_RATE_LIMIT_MARKERS)
+    return False
+
+
+def _status_code(error: Exception) -> Optional[int]:
+    response = getattr(error, 'response', None)
+    return getattr(response, 'status_code', None) if response is not None else None
+
+
+def is_unavailable(error: Exception) -> bool:
+    """Check whether an error raised by a backend call was caused by the workspace being temporarily unavailable
+
+    :param Exception error: The error raised by the backend
+
+    :return: Whether the workspace answered with HTTP 503
+    :rtype: bool
+    """
+    if _status_code(error) is not None:
+        return _status_code(error) == 503
+    if isinstance(error, subprocess.CalledProcessError):
+        output = (error.stderr or b'') + (error.stdout or b'')
+        return any(marker in output for marker in _CLI_UNAVAILABLE_MARKERS)
+    return False
+
+
+def is_transient(error: Exception) -> bool:
+    """Check whether an error raised by a backend call may succeed when the call is repeated
+
+    :param Exception error: The error raised by the backend
+
+    :return: Whether the call was throttled, hit an unavailable or overloaded gateway or lost its connection
+    :rtype: bool
+    """
+    if is_rate_limited(error) or is_unavailable(error):
+        return True
+    if _status_code(error) is not None:
+        return _status_code(error) in TRANSIENT_STATUS_CODES
+
+    # Connection errors of the http clients, checked without importing them
+    requests = sys.modules.get('requests')
+    if requests is not None and isinstance(error, (requests.ConnectionError, requests.Timeout)):
+        return True
+    httpx = sys.modules.get('httpx')
+    if httpx is not None and isinstance(error, httpx.TransportError):
+        return True
+    return False
+
+
+def retry_after(error: Exception) -> float:
+    """Get the delay requested by the Retry-After header of a failed call
+
+    :param Exception error: The error raised by the backend
+
+    :return: The delay in seconds, 0 when the workspace did not request one
+    :rtype: float
+    """
+    response = getattr(error, 'response', None)
+    if response is not None and hasattr(response, 'headers'):
+        try:
+            return max(0.0, float(response.headers.get('Retry-After', 0)))
+        except (TypeError, ValueError):
+            return 0.0
+    return 0.0
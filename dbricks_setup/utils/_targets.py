@@ -0,0 +1,88 @@
+import fnmatch
+import re
+from concurrent.futures import as_completed
+from typing import Any, Callable, Dict, Iterable, List
+
+import logging
+
+from ._pool import ContextThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# The prefix of regular expression patterns, other patterns are globs
+REGEX_PREFIX = 're:'
+
+
+def is_pattern(name: str) -> bool:
+    """Check whether a name given on the cli is a pattern
+
+    :param str name: The name, a glob like team-* or a regular expression like re:team-\\d+
+
+    :return: Whether the name is a pattern
+    :rtype: bool
+    """
+    return name.startswith(REGEX_PREFIX) or any(c in name for c in '*?[')
+
+
+def match_names(patterns: Iterable[str], names: Iterable[str], case_sensitive: bool = True) -> List[str]:
+    """Resolve names and patterns against the existing names
+
+    Plain names are kept whether they exist or not, patterns select the existing names they match in full.
+
+    :param Iterable[str] patterns: The names and patterns given on the cli
+    :param Iterable[str] names: The existing names
+    :param bool case_sensitive: Whether names are matched case sensitively, otherwise they are lower cased
+
+    :return: The unique names in order
+    :rtype: List[str]
+    """
+    def normalize(name: str) -> str:
+        return name if case_sensitive else name.lower()
+
+    names = [normalize(name) for name in names]
+    matched = {}
+    for pattern in patterns:
+        if not is_pattern(pattern):
+            matched[normalize(pattern)] = None
+            continue
+
+        if pattern.startswith(REGEX_PREFIX):
+            regex = re.compile(pattern[len(REGEX_PREFIX):], 0 if case_sensitive else re.IGNORECASE)
+        else:
+            regex = re.compile(fnmatch.translate(normalize(pattern)))
+        selected = [name for name in names if regex.fullmatch(name)]
+        if not selected:
+            logger.warning(f'No existing names match {pattern}')
+        matched.update(dict.fromkeys(selected))
+
+    return list(matched)
+
+
+def run_for_targets(func: Callable[..., Any], targets: List[str], max_workers: int = 8, **kwargs) -> Dict[str, Any]:
+    """Run a function for every target concurrently, reporting every failed target
+
+    :param Callable[..., Any] func: The function taking the target as first argument
+    :param List[str] targets: The targets
+    :param int max_workers: The maximum number of concurrent targets
+
+    :return: The result of every target
+    :rtype: Dict[str, Any]
+    """
+    if len(targets) == 1:
+        return {targets[0]: func(targets[0], **kwargs)}
+
+    results = {}
+    failures = {}
+    with ContextThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = {executor.submit(func, target, **kwargs): target for target in targets}
+        for future in as_completed(futures):
+            try:
+                results[futures[future]] = future.result()
+            except Exception as e:
+                logger.error(f'Failed for {futures[future]}: {e}')
+                failures[futures[future]] = e
+
+    if failures:
+        raise RuntimeError(f'{len(failures)} of {len(targets)} targets failed: {sorted(failures)}')
+
+    return results
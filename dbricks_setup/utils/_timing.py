@@ -0,0 +1,228 @@
+import contextvars
+import json
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+_enabled = False
+_origin = time.perf_counter()
+_spans: List[Dict] = []
+_lock = threading.Lock()
+_current: contextvars.ContextVar[Optional[Dict]] = contextvars.ContextVar('dbricks_setup_span', default=None)
+
+
+def enable_timings(enabled: bool = True):
+    """Start recording timing spans, the report is relative to this moment
+
+    :param bool enabled: Whether spans are recorded
+    """
+    global _enabled, _origin
+    with _lock:
+        _enabled = enabled
+        _origin = time.perf_counter()
+        _spans.clear()
+
+
+def _new_span(operation: str, target: str) -> Dict:
+    return {
+        'operation': operation,
+        'target': target,
+        'start': None,
+        'end': None,
+        'duration': 0.0,
+        'calls': 0,
+        'retries': 0,
+        'sent': 0,
+        'received': 0,
+        'thread': threading.current_thread().name,
+    }
+
+
+def _finish_span(record: Dict):
+    if record['start'] is None:
+        return
+    with _lock:
+        _spans.append(record)
+
+
+@contextmanager
+def span(operation: str, target: str = '') -> Iterator[Optional[Dict]]:
+    """Record the duration of a remote operation, the calls made within are attributed to it
+
+    :param str operation: The name of the operation, i.e. create_group
+    :param str target: The resource the operation works on
+    """
+    if not _enabled:
+        yield None
+        return
+
+    record = _new_span(operation, target)
+    token = _current.set(record)
+    record['start'] = time.perf_counter() - _origin
+    try:
+        yield record
+    except Exception as e:
+        # The retries are counted by the governors as they happen
+        record['error'] = type(e).__name__
+        raise
+    finally:
+        record['end'] = time.perf_counter() - _origin
+        record['duration'] = record['end'] - record['start']
+        _current.reset(token)
+        _finish_span(record)
+
+
+def timed_iter(operation: str, target: str, iterable: Iterable) -> Iterator:
+    """Record the time spent producing the items of a lazy listing, excluding the time spent by the consumer
+
+    :param str operation: The name of the operation, i.e. extract_clusters
+    :param str target: The resource the operation works on
+    :param Iterable iterable: The listing
+
+    :return: The items of the listing
+    :rtype: Iterator
+    """
+    if not _enabled:
+        yield from iterable
+        return
+
+    record = _new_span(operation, target)
+    iterator = iter(iterable)
+    try:
+        while True:
+            token = _current.set(record)
+            start = time.perf_counter() - _origin
+            if record['start'] is None:
+                record['start'] = start
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                record['end'] = time.perf_counter() - _origin
+                record['duration'] += record['end'] - start
+                _current.reset(token)
+            yield item
+    finally:
+        _finish_span(record)
+
+
+@contextmanager
+def call_span(operation: str) -> Iterator[Optional[Dict]]:
+    """Attribute a single remote call to the current operation, or record it as its own span
+
+    :param str operation: The name of the call, used when no operation is being recorded
+    """
+    record = _current.get()
+    if record is None:
+        with span(operation) as record:
+            if record is not None:
+                record['calls'] += 1
+            yield record
+    else:
+        record['calls'] += 1
+        yield record
+
+
+def record_payload(record: Optional[Dict], sent: int = 0, received: int = 0):
+    """Add the payload size of a call to a span
+
+    :param Optional[Dict] record: The span of the call
+    :param int sent: The number of bytes sent
+    :param int received: The number of bytes received
+    """
+    if record is not None:
+        record['sent'] += sent
+        record['received'] += received
+
+
+def record_retry():
+    """Count a retry of the current operation, made within the operation"""
+    record = _current.get()
+    if record is not None:
+        record['retries'] += 1
+
+
+def critical_path(spans: List[Dict]) -> List[Dict]:
+    """Get the chain of spans that determined the wall clock time
+
+    Starting from the span that finished last, the predecessor of each span is the span that finished last before
+    it started.
+
+    :param List[Dict] spans: The recorded spans
+
+    :return: The spans on the critical path in order of execution
+    :rtype: List[Dict]
+    """
+    remaining = sorted(spans, key=lambda s: s['end'])
+    if not remaining:
+        return []
+
+    path = [remaining.pop()]
+    while True:
+        predecessors = [s for s in remaining if s['end'] <= path[-1]['start']]
+        if not predecessors:
+            break
+        path.append(predecessors[-1])
+        remaining = [s for s in remaining if s['end'] < path[-1]['end']]
+
+    return path[::-1]
+
+
+def timing_report() -> Dict:
+    """Get the timing breakdown of the recorded spans
+
+    :return: The wall clock time, the totals per operation, the counters per workspace, the critical path and every
+        span
+    :rtype: Dict
+    """
+    # Imported here, the governors record their retries in the spans
+    from ._governor import governor_report
+
+    with _lock:
+        spans = sorted(_spans, key=lambda s: s['start'])
+
+    operations = {}
+    for record in spans:
+        operation = operations.setdefault(
+            record['operation'],
+            {'count': 0, 'seconds': 0.0, 'max_seconds': 0.0, 'calls': 0, 'retries': 0, 'sent': 0, 'received': 0}
+        )
+        operation['count'] += 1
+        operation['seconds'] += record['duration']
+        operation['max_seconds'] = max(operation['max_seconds'], record['duration'])
+        for key in ['calls', 'retries', 'sent', 'received']:
+            operation[key] += record[key]
+
+    path = critical_path(spans)
+    return {
+        'wall_seconds': time.perf_counter() - _origin,
+        'operations': dict(sorted(operations.items(), key=lambda item: -item[1]['seconds'])),
+        'workspaces': governor_report(),
+        'critical_path_seconds': sum(s['duration'] for s in path),
+        'critical_path': [
+            {'operation': s['operation'], 'target': s['target'], 'start': s['start'], 'duration': s['duration']}
+            for s in path
+        ],
+        'spans': spans,
+    }
+
+
+def write_timing_report(path: str = '-'):
+    """Write the timing report as json
+
+    :param str path: The file to write to, - for stdout
+    """
+    report = json.dumps(timing_report(), indent=2)
+    if path == '-':
+        print(report, file=sys.stdout)
+    else:
+        with open(path, 'w') as f:
+            f.write(report)
+        logger.info(f'Timings written to {path}')
@@ -1,12 +1,14 @@
 import json
-import subprocess
 from typing import Dict
 
-import requests
 from databricks_cli.configure.provider import DatabricksConfig
 
 import logging
 
+from .._backend import get_rest_backend
+from .._timing import span
+from ..scope._acl import diff_acls
+
 logger = logging.getLogger(__name__)
 
 
@@ -17,55 +19,92 @@ def get_acls(cluster_id: str, base_config: DatabricksConfig) -> Dict[str, str]:
     :param DatabricksConfig base_config: The profile configured for the workspace
     """
 
-    # Access the permissions api
-    api_version = '/api/2.0'
-    headers = {'Authorization': f"Bearer {base_config.token}"}
-
-    # Generate the url
-    api_command = f'/permissions/clusters/{cluster_id}'
-    url = f"{base_config.host.rstrip('/')}{api_version}{api_command}"
+    # Get the acls
+    with span('get_cluster_acls', cluster_id):
+        return get_rest_backend(base_config).get_permissions('clusters', cluster_id)
 
-    # Update the acls
-    r = requests.get(
-        url=url,
-        headers=headers,
-    )
 
-    return r.json()
+def parse_acls(cluster_permissions: Dict) -> Dict[str, str]:
+    """Get the explicitly granted permission of every principal of a cluster
 
+    :param Dict cluster_permissions: The permissions of the cluster as returned by the permissions api
 
-def set_acls(desired_acls: Dict[str, str], cluster_id: str, base_config: DatabricksConfig) -> Dict[str, str]:
-    """Enforce the list of acls for the supplied secret scope
-
-    :param Dict[str, str] desired_acls: The acls to add to the cluster
-    :param str cluster_id: The id of the cluster in question
-    :param DatabricksConfig base_config: The profile configured for the workspace
+    :return: The permission keyed by principal, several permissions of a principal are joined by commas
+    :rtype: Dict[str, str]
     """
-
-    # Access the permissions api
-    api_version = '/api/2.0'
-    headers = {'Authorization': f"Bearer {base_config.token}"}
-
-    # Set the permissions
-    permissions = {
+    acls = {}
+    for acl in cluster_permissions.get('access_control_list', []):
+        principal = acl.get('group_name') or acl.get('user_name') or acl.get('service_principal_name')
+        permissions = sorted(
+            set(permission['permission_level'] for permission in acl['all_permissions'] if not permission['inherited'])
+        )
+        if permissions:
+            acls[principal] = ','.join(permissions)
+    return acls
+
+
+def _access_control_list(acls: Dict[str, str]) -> Dict:
+    return {
         'access_control_list': [
             {
                 'group_name': group,
                 'permission_level': permission
             }
             for group, permission
-            in desired_acls.items()
+            in acls.items()
         ]
     }
 
-    # Generate the url
-    api_command = f'/permissions/clusters/{cluster_id}'
-    url = f"{base_config.host.rstrip('/')}{api_version}{api_command}"
+
+def set_acls(desired_acls: Dict[str, str], cluster_id: str, base_config: DatabricksConfig) -> Dict[str, str]:
+    """Enforce the list of acls for the supplied secret scope
+
+    :param Dict[str, str] desired_acls: The acls to add to the cluster
+    :param str cluster_id: The id of the cluster in question
+    :param DatabricksConfig base_config: The profile configured for the workspace
+    """
+
+    # Set the permissions
+    permissions = _access_control_list(desired_acls)
 
     # Update the acls
-    r = requests.put(
-        url=url,
-        headers=headers,
-        json=permissions
-    )
-    logger.info(f'Permissions updated to {json.dumps(r.json(), indent=2)}')
+    with span('set_cluster_acls', cluster_id):
+        response = get_rest_backend(base_config).set_permissions('clusters', cluster_id, permissions)
+    logger.info(f'Permissions updated to {json.dumps(response, indent=2)}')
+
+
+def add_acls(acls: Dict[str, str], cluster_id: str, base_config: DatabricksConfig):
+    """Grant permissions on a cluster, keeping the existing permissions
+
+    :param Dict[str, str] acls: The acls to add to the cluster
+    :param str cluster_id: The id of the cluster in question
+    :param DatabricksConfig base_config: The profile configured for the workspace
+    """
+    logger.info(f'Adding permissions {acls} to {cluster_id}')
+    with span('add_cluster_acls', cluster_id):
+        get_rest_backend(base_config).update_permissions('clusters', cluster_id, _access_control_list(acls))
+
+
+def plan_acls(existing_acls: Dict[str, str], desired_acls: Dict[str, str]) -> Dict:
+    """Get the cheapest write turning the existing acls of a cluster into the desired acls
+
+    Nothing is written when the acls match, missing groups are added with a PATCH and any other change replaces the
+    acls with a PUT.
+
+    :param Dict[str, str] existing_acls: The explicitly granted permissions of the cluster
+    :param Dict[str, str] desired_acls: The acls of the cluster
+
+    :return: The action, none, add or set, with the acls to write and the changes
+    :rtype: Dict
+    """
+    changes = diff_acls(existing_acls, desired_acls)
+    if not changes:
+        return {'action': 'none', 'acls': {}, 'changes': changes}
+    if all(change['action'] == 'add' for change in changes):
+        return {
+            'action': 'add',
+            'acls': {change['principal']: change['permission'] for change in changes},
+            'changes': changes
+        }
+    return {'action': 'set', 'acls': desired_acls, 'changes': changes}
+
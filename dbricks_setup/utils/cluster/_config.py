@@ -1,19 +1,41 @@
-from typing import Dict
+from typing import Any, Dict, Iterable, Optional, Tuple
 
 from ._extract import extract_spark
+from .._fingerprint import FINGERPRINT_TAG, SIZING_TAG, fingerprint
 
+# The fields of a cluster configuration set by the instance pool of the cluster
+POOL_MANAGED_FIELDS = [
+    'node_type_id',
+    'driver_node_type_id',
+    'enable_elastic_disk',
+    'disk_spec',
+    'azure_attributes',
+    'instance_source',
+    'driver_instance_source',
+]
 
-def create_config(cluster_name: str, profile: str) -> Dict:
+
+def create_config(
+        cluster_name: str,
+        profile: str,
+        spark_version: Dict[str, str] = None,
+        instance_pool_id: str = None,
+        sizing: Dict = None) -> Dict:
     """Get the current spark version from the configured workspace
 
     :param str cluster_name: The name of the cluster
     :param str profile: The profile configured for the workspace
+    :param Dict[str, str] spark_version: The spark version to use, extracted from the workspace if not supplied
+    :param str instance_pool_id: The instance pool the driver and workers are taken from
+    :param Dict sizing: The minimum and maximum workers, node type and autotermination, the defaults if not supplied
 
     :return: The current spark version
     :rtype: Dict
     """
 
-    last_version = extract_spark(profile)
+    last_version = spark_version
+    if last_version is None:
+        last_version = extract_spark(profile)
 
     # Set the cluster json
     cluster_config = {
@@ -44,4 +66,138 @@ def create_config(cluster_name: str, profile: str) -> Dict:
         },
     }
 
+    # Size the cluster, and tag it with its sizing so later updates keep it
+    if sizing is not None:
+        cluster_config['custom_tags'] = {SIZING_TAG: format_sizing(sizing)}
+        cluster_config['autoscale'] = {'min_workers': sizing['min_workers'], 'max_workers': sizing['max_workers']}
+        cluster_config['autotermination_minutes'] = sizing['autotermination_minutes']
+        if sizing.get('node_type_id'):
+            for key in ['node_type_id', 'driver_node_type_id']:
+                cluster_config[key] = sizing['node_type_id']
+            for key in ['instance_source', 'driver_instance_source']:
+                cluster_config[key] = {'node_type_id': sizing['node_type_id']}
+
+    # Take the nodes from the instance pool, which sets their type, disks and availability
+    if instance_pool_id is not None:
+        for key in POOL_MANAGED_FIELDS:
+            cluster_config.pop(key)
+        cluster_config['instance_pool_id'] = instance_pool_id
+        cluster_config['driver_instance_pool_id'] = instance_pool_id
+
     return cluster_config
+
+
+def format_sizing(sizing: Dict) -> str:
+    """Format the sizing of a cluster as the value of its sizing tag
+
+    :param Dict sizing: The minimum and maximum workers, node type and autotermination
+
+    :return: The minimum and maximum workers, autotermination and node type separated by colons
+    :rtype: str
+    """
+    return ':'.join([
+        str(sizing['min_workers']),
+        str(sizing['max_workers']),
+        str(sizing['autotermination_minutes']),
+        sizing.get('node_type_id') or '',
+    ])
+
+
+def parse_sizing(value: Optional[str]) -> Optional[Dict]:
+    """Parse the sizing tag of a cluster
+
+    :param Optional[str] value: The value of the sizing tag
+
+    :return: The minimum and maximum workers, node type and autotermination, None if untagged or malformed
+    :rtype: Optional[Dict]
+    """
+    try:
+        min_workers, max_workers, autotermination, node_type = value.split(':')
+        return {
+            'min_workers': int(min_workers),
+            'max_workers': int(max_workers),
+            'node_type_id': node_type or None,
+            'autotermination_minutes': int(autotermination),
+        }
+    except (AttributeError, ValueError):
+        return None
+
+
+def find_sizing(clusters: Iterable[Dict[str, str]]) -> Optional[Dict]:
+    """Get the sizing the clusters of a name were tagged with, from the first tagged cluster
+
+    :param Iterable[Dict[str, str]] clusters: The clusters of the name, as listed
+
+    :return: The sizing, None if no cluster is tagged
+    :rtype: Optional[Dict]
+    """
+    return next(
+        (sizing for sizing in (parse_sizing(cluster.get('sizing')) for cluster in clusters) if sizing is not None),
+        None
+    )
+
+
+def get_access_groups(cluster_name: str) -> Dict[str, str]:
+    """Get the access groups of a cluster with their permission
+
+    :param str cluster_name: The name of the cluster
+
+    :return: The permission keyed by group
+    :rtype: Dict[str, str]
+    """
+    return {
+        f'cluster-{cluster_name}-manage': 'CAN_MANAGE',
+        f'cluster-{cluster_name}-restart': 'CAN_RESTART',
+        f'cluster-{cluster_name}-attach': 'CAN_ATTACH_TO',
+    }
+
+
+def tag_config(cluster_config: Dict, access_groups: Dict[str, str]) -> Dict:
+    """Tag a cluster configuration with the fingerprint of its desired state, the configuration and the acls
+
+    :param Dict cluster_config: The config of the cluster
+    :param Dict[str, str] access_groups: The permission of every access group of the cluster
+
+    :return: The config of the cluster with the fingerprint in its custom tags
+    :rtype: Dict
+    """
+    custom_tags = {k: v for k, v in cluster_config.get('custom_tags', {}).items() if k != FINGERPRINT_TAG}
+    value = fingerprint({**cluster_config, 'custom_tags': custom_tags}, access_groups)
+    return {**cluster_config, 'custom_tags': {**custom_tags, FINGERPRINT_TAG: value}}
+
+
+def _same(desired: Any, existing: Any) -> bool:
+    """Compare configuration values, numbers by value and dictionaries by their keys and values"""
+    if isinstance(desired, dict):
+        if not isinstance(existing, dict) or set(desired) != set(existing):
+            return False
+        return all(_same(value, existing[key]) for key, value in desired.items())
+    if isinstance(desired, list):
+        if not isinstance(existing, list) or len(desired) != len(existing):
+            return False
+        return all(_same(d, e) for d, e in zip(desired, existing))
+    if isinstance(desired, (int, float)) and not isinstance(desired, bool):
+        return isinstance(existing, (int, float)) and not isinstance(existing, bool) and desired == existing
+    return desired == existing
+
+
+def diff_config(existing_config: Dict, desired_config: Dict) -> Dict[str, Tuple[Any, Any]]:
+    """Get the fields of a cluster configuration that differ from the desired configuration
+
+    Only the fields of the desired configuration are compared, the fields set by the workspace like the state or
+    default tags are ignored. An empty desired value matches a missing field.
+
+    :param Dict existing_config: The configuration of the cluster as returned by the workspace
+    :param Dict desired_config: The desired configuration
+
+    :return: The existing and desired value keyed by field
+    :rtype: Dict[str, Tuple[Any, Any]]
+    """
+    diff = {}
+    for key, desired in desired_config.items():
+        existing = existing_config.get(key)
+        if existing is None and desired in ({}, [], None):
+            continue
+        if not _same(desired, existing):
+            diff[key] = (existing, desired)
+    return diff
@@ -1,8 +1,10 @@
-import json
 import logging
-import subprocess
 from typing import Dict
 
+from .._backend import get_backend
+from .._cache import get_cache
+from .._timing import span
+
 logger = logging.getLogger(__name__)
 
 
@@ -16,18 +18,15 @@ def create_cluster(profile: str, cluster_config: Dict) -> str:
     :rtype: str
     """
     # Create the cluster
-    cluster_str = json.dumps(cluster_config, ensure_ascii=False).replace('"', '\\"')
-    create_query = 'databricks clusters create'
-    create_query += f' --profile {profile}'
-    create_query += f' --json "{cluster_str}"'
-
-    # Run and enforce success
     logger.info(f'Creating cluster {cluster_config["cluster_name"]}')
-    sp = subprocess.run(create_query, capture_output=True)
-    sp.check_returncode()
-
-    # Extract the cluster id
-    cluster_id = json.loads(sp.stdout)['cluster_id']
+    with span('create_cluster', cluster_config['cluster_name']):
+        cluster_id = get_backend(profile).create_cluster(cluster_config)
+    get_cache(profile).update(
+        'clusters',
+        lambda clusters: clusters + [
+            {'cluster_id': cluster_id, 'name': cluster_config['cluster_name'], 'status': 'PENDING'}
+        ]
+    )
 
     return cluster_id
 
@@ -41,13 +40,7 @@ def edit_cluster(profile: str, cluster_config: Dict):
     :returns: The cluster id of the new cluster
     :rtype: str
     """
-    # Create the cluster
-    cluster_str = json.dumps(cluster_config, ensure_ascii=False).replace('"', '\\"')
-    edit_query = 'databricks clusters edit'
-    edit_query += f' --profile {profile}'
-    edit_query += f' --json "{cluster_str}"'
-
-    # Run and enforce success
+    # Edit the cluster
     logger.info(f'Editing cluster {cluster_config["cluster_name"]}')
-    sp = subprocess.run(edit_query, capture_output=True)
-    sp.check_returncode()
+    with span('edit_cluster', cluster_config['cluster_name']):
+        get_backend(profile).edit_cluster(cluster_config)
@@ -1,5 +1,8 @@
 import logging
-import subprocess
+
+from .._backend import get_backend
+from .._cache import get_cache
+from .._timing import span
 
 logger = logging.getLogger(__name__)
 
@@ -12,14 +15,10 @@ def terminate_cluster(cluster_id: str, cluster_name: str, profile: str):
     :param str profile: The profile configured for the workspace
     """
     # Terminate the cluster
-    terminate_query = 'databricks clusters delete'
-    terminate_query += f' --profile {profile}'
-    terminate_query += f' --cluster-id {cluster_id}'
-
-    # Run and enforce success
     logging.warning(f'Terminating cluster {cluster_name} with id {cluster_id}')
-    sp = subprocess.run(terminate_query, capture_output=True)
-    sp.check_returncode()
+    with span('terminate_cluster', cluster_name):
+        get_backend(profile).terminate_cluster(cluster_id)
+    get_cache(profile).invalidate('clusters')
 
 
 def delete_cluster(cluster_id: str, cluster_name: str, profile: str):
@@ -29,12 +28,11 @@ def delete_cluster(cluster_id: str, cluster_name: str, profile: str):
     :param str cluster_name: The name of the cluster
     :param str profile: The profile configured for the workspace
     """
-    # Terminate the cluster
-    delete_query = 'databricks clusters permanent-delete'
-    delete_query += f' --profile {profile}'
-    delete_query += f' --cluster-id {cluster_id}'
-
-    # Run and enforce success
+    # Delete the cluster
     logging.warning(f'Deleting cluster {cluster_name} with id {cluster_id}')
-    sp = subprocess.run(delete_query, capture_output=True)
-    sp.check_returncode()
+    with span('delete_cluster', cluster_name):
+        get_backend(profile).delete_cluster(cluster_id)
+    get_cache(profile).update(
+        'clusters',
+        lambda clusters: [cluster for cluster in clusters if cluster['cluster_id'] != cluster_id]
+    )
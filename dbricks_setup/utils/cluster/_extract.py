@@ -1,76 +1,107 @@
-import json
-import subprocess
-from typing import Dict, List
+import threading
+import time
+from typing import Dict, Iterator, List, Tuple
 
 import logging
 
+from ._spark import SparkCatalog
+from .._backend import get_backend
+from .._cache import TTLS, get_cache
+from .._timing import span, timed_iter
+
 logger = logging.getLogger(__name__)
 
+_catalogs: Dict[str, Tuple[float, SparkCatalog]] = {}
+_catalogs_lock = threading.Lock()
+
 
-def extract_clusters(profile: str) -> List[Dict[str, str]]:
-    """Get the list of clusters from the configured workspace
+def extract_clusters(profile: str) -> Iterator[Dict[str, str]]:
+    """Get the clusters from the configured workspace, page by page as they are consumed
 
     :param str profile: The profile configured for the workspace
 
-    :return: The list of clusters in the workspace
-    :rtype: List[Dict[str, str]]
+    :return: The clusters in the workspace
+    :rtype: Iterator[Dict[str, str]]
     """
 
-    # Construct the query
-    logger.info('Extracting scope information')
-    # Query what clusters exists
-    cluster_query = 'databricks clusters list'
-    cluster_query += f' --profile {profile}'
+    # Use the cached clusters if fresh
+    cache = get_cache(profile)
+    cached_clusters = cache.get('clusters')
+    if cached_clusters is not None:
+        yield from cached_clusters
+        return
+
+    # Query what clusters exists, only cache complete listings
+    logger.info('Extracting cluster information')
+    existing_clusters = [] if cache.enabled else None
+    for cluster in timed_iter('extract_clusters', profile, get_backend(profile).list_clusters()):
+        if existing_clusters is not None:
+            existing_clusters.append(cluster)
+        yield cluster
 
-    # Run and enforce success
-    sp = subprocess.run(cluster_query, capture_output=True)
-    sp.check_returncode()
+    if existing_clusters is not None:
+        cache.set('clusters', existing_clusters)
 
-    # Extract the existing scopes
-    cluster_lines = [l.strip('\r') for l in sp.stdout.decode().split('\n')]
-    cluster_lines = [l for l in cluster_lines if l.replace('-', '').strip()]
-    cluster_lines = [[elem for elem in l.split(' ') if elem] for l in cluster_lines]
 
-    #
-    existing_clusters = [{'cluster_id': cluster[0], 'name': cluster[1], 'status': cluster[2]} for cluster in
-                         cluster_lines]
+def get_spark_catalog(profile: str) -> SparkCatalog:
+    """Get the catalog of spark runtimes of the configured workspace, refreshed once stale
 
-    return existing_clusters
+    :param str profile: The profile configured for the workspace
+
+    :return: The spark runtimes indexed by variant and version
+    :rtype: SparkCatalog
+    """
+    with _catalogs_lock:
+        # Use the catalog of this process if fresh
+        timestamp, catalog = _catalogs.get(profile, (0, None))
+        if catalog is not None and time.time() - timestamp <= TTLS['spark_versions']:
+            return catalog
 
+        # Get the spark versions, from the workspace cache if fresh
+        cache = get_cache(profile)
+        spark_versions = cache.get('spark_versions')
+        if spark_versions is None:
+            with span('extract_spark'):
+                spark_versions = get_backend(profile).list_spark_versions()
+            cache.set('spark_versions', spark_versions)
 
-def extract_spark(profile: str) -> Dict[str, str]:
-    """Get the current spark version from the configured workspace
+        catalog = SparkCatalog(spark_versions)
+        _catalogs[profile] = (time.time(), catalog)
+        return catalog
 
+
+def get_cluster_config(cluster_id: str, profile: str) -> Dict:
+    """Get the configuration of a cluster as returned by the workspace
+
+    :param str cluster_id: The id of the cluster
     :param str profile: The profile configured for the workspace
 
-    :return: The current spark version
+    :return: The cluster configuration, with the fields set by the workspace
+    :rtype: Dict
+    """
+    with span('get_cluster_config', cluster_id):
+        return get_backend(profile).get_cluster_config(cluster_id)
+
+
+def extract_spark(profile: str, query: str = 'latest', variant: str = 'standard') -> Dict[str, str]:
+    """Get the spark version for new clusters from the configured workspace
+
+    :param str profile: The profile configured for the workspace
+    :param str query: latest, lts, a pinned release like 13.x or 13.3, lts:13.x, or the exact runtime key
+    :param str variant: The runtime variant, one of standard, ml, gpu-ml or photon
+
+    :return: The spark version
     :rtype: Dict[str, str]
     """
+    return get_spark_catalog(profile).select(query, variant)
+
 
-    # Get the current spark versions
-    spark_query = 'databricks clusters spark-versions'
-    spark_query += f' --profile {profile}'
-
-    # Run and enforce success
-    sp = subprocess.run(spark_query, capture_output=True)
-    sp.check_returncode()
-
-    # Filter the spark versions
-    spark_versions = json.loads(sp.stdout)['versions']
-    valid_versions = [
-        v
-        for v
-        in spark_versions
-        if (
-                'gpu' not in v['key']
-                and 'cpu' not in v['key']
-                and 'photon' not in v['key']
-                and 'apache' not in v['key']
-        )
-    ]
-    valid_versions = sorted(valid_versions, key=lambda x: x['key'])
-
-    # Get the last version
-    last_version = valid_versions[-1]
-
-    return last_version
+def select_spark_version(spark_versions: List[Dict[str, str]]) -> Dict[str, str]:
+    """Select the spark version used for new clusters, the newest standard runtime
+
+    :param List[Dict[str, str]] spark_versions: The spark versions available in the workspace
+
+    :return: The current spark version
+    :rtype: Dict[str, str]
+    """
+    return SparkCatalog(spark_versions).select()
@@ -0,0 +1,115 @@
+import re
+from typing import Dict, List, Optional, Tuple
+
+# The runtime variants a cluster can be created with
+VARIANTS = ['standard', 'ml', 'gpu-ml', 'photon']
+
+# The key of a databricks runtime, i.e. 13.3.x-cpu-ml-scala2.12
+_KEY_PATTERN = re.compile(r'^(?P<major>\d+)\.(?P<minor>\d+)\.x-(?P<tags>(?:[a-z0-9]+-)*)scala(?P<scala>[\d.]+)$')
+
+# A version query, i.e. latest, lts, 13.x, 13.3 or lts:13.x
+_QUERY_PATTERN = re.compile(r'^(?:(?P<lts>lts|latest)(?::|$))?(?:(?P<major>\d+)\.(?P<minor>\d+|x))?$')
+
+
+def parse_spark_version(spark_version: Dict[str, str]) -> Optional[Dict]:
+    """Parse the version, release channel and variant of a spark runtime
+
+    :param Dict[str, str] spark_version: The runtime as listed by the workspace, with a key and a name
+
+    :return: The parsed runtime, None for keys that are not databricks runtimes
+    :rtype: Optional[Dict]
+    """
+    match = _KEY_PATTERN.match(spark_version['key'])
+    if match is None:
+        return None
+
+    # Get the variant from the tags of the key
+    tags = set(match.group('tags').strip('-').split('-')) - {''}
+    if 'gpu' in tags:
+        variant = 'gpu-ml'
+    elif 'ml' in tags:
+        variant = 'ml'
+    elif 'photon' in tags:
+        variant = 'photon'
+    elif tags <= {'cpu'}:
+        variant = 'standard'
+    else:
+        # i.e. aarch64 or custom images
+        variant = '-'.join(sorted(tags))
+
+    name = spark_version.get('name', '')
+    return {
+        'key': spark_version['key'],
+        'name': name,
+        'version': (int(match.group('major')), int(match.group('minor'))),
+        'scala': match.group('scala'),
+        'lts': 'LTS' in name,
+        'beta': 'beta' in name.lower(),
+        'variant': variant,
+    }
+
+
+class SparkCatalog:
+    """Index of the spark runtimes of a workspace by variant, ordered by version
+
+    :param List[Dict[str, str]] spark_versions: The runtimes as listed by the workspace
+    """
+
+    def __init__(self, spark_versions: List[Dict[str, str]]):
+        self.spark_versions = spark_versions
+        self.index: Dict[str, List[Dict]] = {}
+        for spark_version in spark_versions:
+            runtime = parse_spark_version(spark_version)
+            if runtime is not None:
+                self.index.setdefault(runtime['variant'], []).append(runtime)
+
+        # Newest first, the highest scala version first within a release
+        for runtimes in self.index.values():
+            runtimes.sort(key=lambda r: (r['version'], tuple(int(p) for p in r['scala'].split('.'))), reverse=True)
+
+    def find(self, lts: bool = False, pin: Tuple[int, Optional[int]] = None, variant: str = 'standard') -> List[Dict]:
+        """Get the runtimes matching a query, newest first
+
+        :param bool lts: Only long term support runtimes
+        :param Tuple[int, Optional[int]] pin: The major and optionally minor version to pin to
+        :param str variant: The runtime variant, one of VARIANTS
+
+        :return: The matching runtimes
+        :rtype: List[Dict]
+        """
+        runtimes = [r for r in self.index.get(variant, []) if not r['beta']]
+        if lts:
+            runtimes = [r for r in runtimes if r['lts']]
+        if pin is not None:
+            major, minor = pin
+            runtimes = [r for r in runtimes if r['version'][0] == major and minor in (None, r['version'][1])]
+        return runtimes
+
+    def select(self, query: str = 'latest', variant: str = 'standard') -> Dict[str, str]:
+        """Select the runtime for a query
+
+        :param str query: latest, lts, a pinned release like 13.x or 13.3, lts:13.x, or the exact runtime key
+        :param str variant: The runtime variant, one of VARIANTS
+
+        :return: The newest runtime matching the query, with its key and name
+        :rtype: Dict[str, str]
+        """
+        # An exact key is used as is
+        for spark_version in self.spark_versions:
+            if spark_version['key'] == query:
+                return spark_version
+
+        match = _QUERY_PATTERN.match(query.lower())
+        if match is None or not any(match.groupdict().values()):
+            raise ValueError(f'Unknown spark version query {query}, expected latest, lts, 13.x, 13.3 or a runtime key')
+
+        pin = None
+        if match.group('major') is not None:
+            minor = match.group('minor')
+            pin = (int(match.group('major')), None if minor == 'x' else int(minor))
+
+        runtimes = self.find(lts=match.group('lts') == 'lts', pin=pin, variant=variant)
+        if not runtimes:
+            raise ValueError(f'No {variant} spark runtime matches {query} in {len(self.spark_versions)} runtimes')
+
+        return {'key': runtimes[0]['key'], 'name': runtimes[0]['name']}
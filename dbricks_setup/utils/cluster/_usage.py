@@ -0,0 +1,209 @@
+import math
+import statistics
+from typing import Dict, Iterable, List, Optional
+
+# The event types read to size a cluster
+USAGE_EVENTS = [
+    'CREATING',
+    'STARTING',
+    'RUNNING',
+    'RESIZING',
+    'UPSIZE_COMPLETED',
+    'NODES_LOST',
+    'TERMINATING',
+    'DRIVER_NOT_RESPONDING',
+    'DRIVER_UNAVAILABLE',
+    'SPARK_EXCEPTION',
+]
+
+# The event types of a driver running out of memory or restarting
+DRIVER_FAILURE_EVENTS = ['DRIVER_NOT_RESPONDING', 'DRIVER_UNAVAILABLE', 'SPARK_EXCEPTION']
+
+# The node types clusters are moved up, one size at a time
+NODE_TYPES = ['Standard_DS3_v2', 'Standard_DS4_v2', 'Standard_DS5_v2']
+
+# The running hours below which the history is too short to recommend anything
+MIN_RUNNING_HOURS = 1.0
+
+# The share of the running time at the maximum workers above which a cluster is starved
+STARVED_SHARE = 0.25
+
+# The number of driver failures moving a cluster to a larger node type
+DRIVER_FAILURE_THRESHOLD = 2
+
+# The minutes between an idle termination and the next start up to which staying up is cheaper than a cold start
+SHORT_GAP_MINUTES = 15
+
+# The bounds of the recommended autotermination
+MIN_AUTOTERMINATION = 10
+MAX_AUTOTERMINATION = 120
+
+
+def _percentile(worker_seconds: Dict[int, float], q: float) -> int:
+    """Get the number of workers the cluster ran with for at most a share of its running time"""
+    total = sum(worker_seconds.values())
+    seen = 0.0
+    for workers in sorted(worker_seconds):
+        seen += worker_seconds[workers]
+        if seen >= q * total:
+            return workers
+    return max(worker_seconds, default=0)
+
+
+def summarize_events(events: Iterable[Dict], until: int) -> Dict:
+    """Get the utilization statistics of a cluster from its event history
+
+    The number of workers is tracked from the running, resize and node loss events, weighted by the time it lasted
+    while the cluster was running.
+
+    :param Iterable[Dict] events: The events of the cluster as returned by the workspace, of USAGE_EVENTS
+    :param int until: The time in milliseconds the history ends at, a running cluster counts up to it
+
+    :return: The statistics of the cluster
+    :rtype: Dict
+    """
+    worker_seconds: Dict[int, float] = {}
+    running, workers, since = False, 0, None
+    starts, idle_terminations, driver_failures, peak_target = 0, 0, 0, 0
+    idle_since: Optional[int] = None
+    restart_gaps: List[float] = []
+
+    for event in sorted(events, key=lambda e: e['timestamp']):
+        timestamp, details = event['timestamp'], event.get('details', {})
+
+        # Account for the time since the previous event
+        if running and since is not None:
+            worker_seconds[workers] = worker_seconds.get(workers, 0.0) + (timestamp - since) / 1000
+        since = timestamp
+
+        event_type = event['type']
+        if event_type in ('CREATING', 'STARTING'):
+            starts += 1
+            if idle_since is not None:
+                restart_gaps.append((timestamp - idle_since) / 60000)
+                idle_since = None
+        elif event_type == 'RUNNING':
+            running = True
+            workers = details.get('current_num_workers', workers)
+        elif event_type == 'RESIZING':
+            peak_target = max(peak_target, details.get('target_num_workers', 0))
+        elif event_type in ('UPSIZE_COMPLETED', 'NODES_LOST'):
+            workers = details.get('current_num_workers', workers)
+        elif event_type == 'TERMINATING':
+            running = False
+            if details.get('reason', {}).get('code') == 'INACTIVITY':
+                idle_terminations += 1
+                idle_since = timestamp
+        elif event_type in DRIVER_FAILURE_EVENTS:
+            driver_failures += 1
+
+    # A running cluster counts up to the end of the history
+    if running and since is not None and until > since:
+        worker_seconds[workers] = worker_seconds.get(workers, 0.0) + (until - since) / 1000
+
+    running_seconds = sum(worker_seconds.values())
+    return {
+        'running_hours': running_seconds / 3600,
+        'worker_seconds': worker_seconds,
+        'p10_workers': _percentile(worker_seconds, 0.1),
+        'p95_workers': _percentile(worker_seconds, 0.95),
+        'peak_workers': max(worker_seconds, default=0),
+        'peak_target': peak_target,
+        'starts': starts,
+        'idle_terminations': idle_terminations,
+        'restart_gap_minutes': statistics.median(restart_gaps) if restart_gaps else None,
+        'driver_failures': driver_failures,
+    }
+
+
+def get_sizing(cluster_config: Dict) -> Dict:
+    """Get the sizing of a cluster from its configuration
+
+    :param Dict cluster_config: The configuration of the cluster, as returned by the workspace or created
+
+    :return: The minimum and maximum workers, node type and autotermination of the cluster, the node type is None for
+        clusters taking their nodes from an instance pool, and whether the cluster has a fixed number of workers
+    :rtype: Dict
+    """
+    autoscale = cluster_config.get('autoscale')
+    fixed = autoscale is None
+    if fixed:
+        autoscale = {'min_workers': cluster_config.get('num_workers', 0), 'max_workers': cluster_config.get('num_workers', 0)}
+    return {
+        'fixed': fixed,
+        'min_workers': autoscale['min_workers'],
+        'max_workers': autoscale['max_workers'],
+        'node_type_id': None if cluster_config.get('instance_pool_id') else cluster_config.get('node_type_id'),
+        'autotermination_minutes': cluster_config.get('autotermination_minutes', 0),
+    }
+
+
+def recommend(stats: Dict, sizing: Dict, max_workers_cap: int = 20) -> Dict:
+    """Recommend the sizing of a cluster from its utilization statistics
+
+    Starved clusters, running at their maximum workers for STARVED_SHARE of the time or asking for more, get a higher
+    maximum, other clusters one covering 95% of their running time. Fixed size clusters are only starved by asking for
+    more. The minimum covers 10% of the running time. A driver
+    failing repeatedly, or a starved cluster already at the cap, moves one node size up. Clusters mostly restarted
+    shortly after an idle termination stay up longer, others terminate sooner.
+
+    :param Dict stats: The statistics of the cluster from summarize_events
+    :param Dict sizing: The current sizing of the cluster from get_sizing
+    :param int max_workers_cap: The highest maximum workers recommended
+
+    :return: The recommended sizing, with the reasons of every change
+    :rtype: Dict
+    """
+    recommendation = {**sizing, 'reasons': []}
+    if stats['running_hours'] < MIN_RUNNING_HOURS:
+        recommendation['reasons'].append(f'only {stats["running_hours"]:.1f} running hours of history')
+        return recommendation
+    reasons = recommendation['reasons']
+
+    # Size the workers, a fixed size cluster always runs at its maximum so only asking for more workers starves it
+    at_max = sum(seconds for workers, seconds in stats['worker_seconds'].items() if workers >= sizing['max_workers'])
+    starved = (
+        (not sizing.get('fixed') and at_max / (stats['running_hours'] * 3600) >= STARVED_SHARE)
+        or stats['peak_target'] > sizing['max_workers']
+    )
+    min_workers = max(1, stats['p10_workers'])
+    if starved:
+        max_workers = min(max_workers_cap, max(stats['peak_target'], 2 * sizing['max_workers']))
+    else:
+        max_workers = stats['p95_workers']
+    max_workers = max(max_workers, min_workers)
+    if min_workers != sizing['min_workers']:
+        reasons.append(f'runs with {stats["p10_workers"]} workers or more 90% of the time')
+    if max_workers != sizing['max_workers']:
+        if starved:
+            reasons.append(f'runs at its maximum of {sizing["max_workers"]} workers {at_max / 3600:.1f} hours')
+        else:
+            reasons.append(f'runs with {stats["p95_workers"]} workers or less 95% of the time')
+    recommendation.update(min_workers=min_workers, max_workers=max_workers)
+
+    # Size the nodes, pool clusters take the node type of their pool and have none of their own
+    node_type = sizing['node_type_id']
+    if node_type in NODE_TYPES[:-1]:
+        larger = NODE_TYPES[NODE_TYPES.index(node_type) + 1]
+        if stats['driver_failures'] >= DRIVER_FAILURE_THRESHOLD:
+            recommendation['node_type_id'] = larger
+            reasons.append(f'the driver failed {stats["driver_failures"]} times')
+        elif starved and sizing['max_workers'] >= max_workers_cap:
+            recommendation['node_type_id'] = larger
+            reasons.append(f'starved at the cap of {max_workers_cap} workers')
+
+    # Size the autotermination
+    gap = stats['restart_gap_minutes']
+    if stats['idle_terminations'] and gap is not None:
+        autotermination = sizing['autotermination_minutes']
+        if gap <= SHORT_GAP_MINUTES:
+            autotermination = min(MAX_AUTOTERMINATION, autotermination + 5 * math.ceil(gap / 5))
+            reason = f'restarts {gap:.0f} minutes after idle terminations'
+        else:
+            autotermination = max(MIN_AUTOTERMINATION, autotermination // 2)
+            reason = f'stays terminated {gap:.0f} minutes after idle terminations'
+        if autotermination != sizing['autotermination_minutes']:
+            recommendation['autotermination_minutes'] = autotermination
+            reasons.append(reason)
+
+    return recommendation
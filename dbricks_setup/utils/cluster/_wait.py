@@ -0,0 +1,165 @@
+import threading
+import time
+from typing import Dict, Iterable, List
+
+import logging
+
+from .._backend import get_backend
+from .._timing import span
+
+logger = logging.getLogger(__name__)
+
+# The states a cluster does not leave by itself, running clusters terminate automatically
+FINAL_STATES = ['TERMINATED', 'ERROR']
+
+# The state of a cluster that no longer exists
+MISSING_STATE = 'MISSING'
+
+_waiters: Dict[str, 'ClusterWaiter'] = {}
+_waiters_lock = threading.Lock()
+
+
+class ClusterWaiter:
+    """Tracks the state of many clusters of a workspace from a single poll
+
+    Every caller waiting on clusters shares one poll, a get for a single tracked cluster and a list otherwise. The
+    interval between polls starts at min_interval and doubles up to max_interval, it is reset whenever a caller
+    starts waiting on new clusters.
+
+    :param str profile: The profile configured for the workspace
+    :param float min_interval: The first interval between polls in seconds
+    :param float max_interval: The upper bound of the interval between polls in seconds
+    """
+
+    def __init__(self, profile: str, min_interval: float = 1.0, max_interval: float = 30.0):
+        self.profile = profile
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.states: Dict[str, str] = {}
+        self._tracked: Dict[str, int] = {}
+        self._interval = min_interval
+        self._next_poll = 0.0
+        self._polling = False
+        self._condition = threading.Condition()
+
+    def _poll(self, cluster_ids: List[str]) -> Dict[str, str]:
+        backend = get_backend(self.profile)
+        if len(cluster_ids) == 1:
+            cluster = backend.get_cluster(cluster_ids[0])
+            return {cluster_ids[0]: cluster['status'] if cluster is not None else MISSING_STATE}
+
+        states = {cluster_id: MISSING_STATE for cluster_id in cluster_ids}
+        for cluster in backend.list_clusters():
+            if cluster['cluster_id'] in states:
+                states[cluster['cluster_id']] = cluster['status']
+        return states
+
+    def wait(self, cluster_ids: Iterable[str], states: Iterable[str], timeout: float = 1200.0) -> Dict[str, str]:
+        """Wait until every cluster reached one of the target states
+
+        :param Iterable[str] cluster_ids: The ids of the clusters
+        :param Iterable[str] states: The target states, i.e. TERMINATED
+        :param float timeout: The maximum time to wait in seconds
+
+        :return: The state of each cluster
+        :rtype: Dict[str, str]
+        """
+        cluster_ids = list(cluster_ids)
+        states = set(states)
+        deadline = time.monotonic() + timeout
+
+        with self._condition:
+            # Track the clusters, polling right away for clusters not seen before
+            for cluster_id in cluster_ids:
+                self._tracked[cluster_id] = self._tracked.get(cluster_id, 0) + 1
+                if cluster_id not in self.states:
+                    self._interval = self.min_interval
+                    self._next_poll = 0.0
+            self._condition.notify_all()
+
+        try:
+            while True:
+                with self._condition:
+                    current = {cluster_id: self.states.get(cluster_id) for cluster_id in cluster_ids}
+                    if all(state in states for state in current.values()):
+                        return current
+
+                    # A cluster that ended up in another final state will never reach the target
+                    stuck = {
+                        cluster_id: state
+                        for cluster_id, state
+                        in current.items()
+                        if state in FINAL_STATES + [MISSING_STATE] and state not in states
+                    }
+                    if stuck:
+                        raise RuntimeError(f'Clusters {stuck} will not reach {sorted(states)}')
+
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise TimeoutError(f'Clusters {current} did not reach {sorted(states)} within {timeout}s')
+
+                    # Wait for the poll of another caller, or the next poll
+                    if self._polling:
+                        self._condition.wait(remaining)
+                        continue
+                    delay = self._next_poll - time.monotonic()
+                    if delay > 0:
+                        self._condition.wait(min(delay, remaining))
+                        continue
+                    self._polling = True
+                    tracked = list(self._tracked)
+
+                # Poll once for every tracked cluster
+                polled = {}
+                try:
+                    polled = self._poll(tracked)
+                finally:
+                    with self._condition:
+                        self.states.update(polled)
+                        self._polling = False
+                        self._next_poll = time.monotonic() + self._interval
+                        self._interval = min(self.max_interval, self._interval * 2)
+                        self._condition.notify_all()
+        finally:
+            with self._condition:
+                for cluster_id in cluster_ids:
+                    self._tracked[cluster_id] -= 1
+                    if not self._tracked[cluster_id]:
+                        del self._tracked[cluster_id]
+                        self.states.pop(cluster_id, None)
+
+
+def get_cluster_waiter(profile: str) -> ClusterWaiter:
+    """Get the cluster waiter shared by every caller of a profile
+
+    :param str profile: The profile configured for the workspace
+
+    :return: The cluster waiter
+    :rtype: ClusterWaiter
+    """
+    with _waiters_lock:
+        if profile not in _waiters:
+            _waiters[profile] = ClusterWaiter(profile)
+        return _waiters[profile]
+
+
+def wait_for_clusters(
+        cluster_ids: Iterable[str],
+        states: Iterable[str],
+        profile: str,
+        timeout: float = 1200.0) -> Dict[str, str]:
+    """Wait until clusters reached one of the target states
+
+    :param Iterable[str] cluster_ids: The ids of the clusters
+    :param Iterable[str] states: The target states, i.e. TERMINATED
+    :param str profile: The profile configured for the workspace
+    :param float timeout: The maximum time to wait in seconds
+
+    :return: The state of each cluster
+    :rtype: Dict[str, str]
+    """
+    cluster_ids = list(cluster_ids)
+    states = list(states)
+    logger.info(f'Waiting for {len(cluster_ids)} clusters to reach {sorted(states)}')
+    with span('wait_clusters', ','.join(cluster_ids)):
+        return get_cluster_waiter(profile).wait(cluster_ids, states, timeout)
@@ -0,0 +1,48 @@
+from typing import Dict
+
+from databricks_cli.configure.provider import DatabricksConfig
+
+import logging
+
+from .._backend import get_rest_backend
+from .._timing import span
+from ..cluster._acl import _access_control_list, parse_acls
+
+logger = logging.getLogger(__name__)
+
+
+def get_acls(pool_id: str, base_config: DatabricksConfig) -> Dict[str, str]:
+    """Get the explicitly granted permission of every principal of an instance pool
+
+    :param str pool_id: The id of the instance pool
+    :param DatabricksConfig base_config: The profile configured for the workspace
+
+    :return: The permission keyed by principal
+    :rtype: Dict[str, str]
+    """
+    with span('get_pool_acls', pool_id):
+        return parse_acls(get_rest_backend(base_config).get_permissions('instance-pools', pool_id))
+
+
+def set_acls(desired_acls: Dict[str, str], pool_id: str, base_config: DatabricksConfig):
+    """Replace the acls of an instance pool
+
+    :param Dict[str, str] desired_acls: The acls of the instance pool
+    :param str pool_id: The id of the instance pool
+    :param DatabricksConfig base_config: The profile configured for the workspace
+    """
+    logger.info(f'Setting permissions {desired_acls} of pool {pool_id}')
+    with span('set_pool_acls', pool_id):
+        get_rest_backend(base_config).set_permissions('instance-pools', pool_id, _access_control_list(desired_acls))
+
+
+def add_acls(acls: Dict[str, str], pool_id: str, base_config: DatabricksConfig):
+    """Grant permissions on an instance pool, keeping the existing permissions
+
+    :param Dict[str, str] acls: The acls to add to the instance pool
+    :param str pool_id: The id of the instance pool
+    :param DatabricksConfig base_config: The profile configured for the workspace
+    """
+    logger.info(f'Adding permissions {acls} to pool {pool_id}')
+    with span('add_pool_acls', pool_id):
+        get_rest_backend(base_config).update_permissions('instance-pools', pool_id, _access_control_list(acls))
@@ -0,0 +1,65 @@
+from typing import Dict
+
+# The node type of the pool instances, the node type of the clusters
+POOL_NODE_TYPE = 'Standard_DS3_v2'
+
+# The availability of the pool instances by spot policy, pools do not fall back from spot to on demand
+POOL_AVAILABILITY = {
+    'on-demand': 'ON_DEMAND_AZURE',
+    'spot': 'SPOT_AZURE',
+}
+
+# The fields of a pool that can be changed once it exists
+EDITABLE_FIELDS = ['min_idle_instances', 'max_capacity', 'idle_instance_autotermination_minutes']
+
+
+def create_pool_config(
+        pool_name: str,
+        spark_version: Dict[str, str],
+        min_idle: int = 1,
+        max_capacity: int = 10,
+        idle_minutes: int = 30,
+        availability: str = 'on-demand') -> Dict:
+    """Get the configuration of an instance pool for the clusters
+
+    :param str pool_name: The name of the instance pool
+    :param Dict[str, str] spark_version: The spark version preloaded on the idle instances
+    :param int min_idle: The number of idle instances kept ready
+    :param int max_capacity: The maximum number of instances, idle or in use
+    :param int idle_minutes: The minutes an idle instance above the minimum is kept
+    :param str availability: The spot policy of the instances, one of POOL_AVAILABILITY
+
+    :return: The pool configuration
+    :rtype: Dict
+    """
+    if availability not in POOL_AVAILABILITY:
+        raise ValueError(f'Unknown pool availability {availability}, expected one of {list(POOL_AVAILABILITY)}')
+
+    azure_attributes = {'availability': POOL_AVAILABILITY[availability]}
+    if availability == 'spot':
+        azure_attributes['spot_bid_max_price'] = -1.0
+
+    return {
+        'instance_pool_name': pool_name,
+        'node_type_id': POOL_NODE_TYPE,
+        'min_idle_instances': min_idle,
+        'max_capacity': max_capacity,
+        'idle_instance_autotermination_minutes': idle_minutes,
+        'preloaded_spark_versions': [spark_version['key']],
+        'enable_elastic_disk': True,
+        'azure_attributes': azure_attributes,
+    }
+
+
+def get_access_groups(pool_name: str) -> Dict[str, str]:
+    """Get the access groups of an instance pool with their permission
+
+    :param str pool_name: The name of the instance pool
+
+    :return: The permission keyed by group
+    :rtype: Dict[str, str]
+    """
+    return {
+        f'pool-{pool_name}-manage': 'CAN_MANAGE',
+        f'pool-{pool_name}-attach': 'CAN_ATTACH_TO',
+    }
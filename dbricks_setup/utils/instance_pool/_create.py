@@ -0,0 +1,47 @@
+from typing import Dict, Optional
+
+import logging
+
+from .._backend import get_backend
+from .._timing import span
+
+logger = logging.getLogger(__name__)
+
+
+def find_pool(pool_name: str, profile: str) -> Optional[Dict]:
+    """Find an instance pool by name
+
+    :param str pool_name: The name of the instance pool
+    :param str profile: The profile configured for the workspace
+
+    :return: The configuration of the pool as returned by the workspace, None if it does not exist
+    :rtype: Optional[Dict]
+    """
+    with span('extract_pools', profile):
+        pools = get_backend(profile).list_instance_pools()
+    return next((pool for pool in pools if pool['instance_pool_name'] == pool_name), None)
+
+
+def create_pool(profile: str, pool_config: Dict) -> str:
+    """Create an instance pool
+
+    :param str profile: The profile configured for the workspace
+    :param Dict pool_config: The config of the instance pool
+
+    :return: The id of the new instance pool
+    :rtype: str
+    """
+    logger.info(f'Creating instance pool {pool_config["instance_pool_name"]}')
+    with span('create_pool', pool_config['instance_pool_name']):
+        return get_backend(profile).create_instance_pool(pool_config)
+
+
+def edit_pool(profile: str, pool_config: Dict):
+    """Edit an instance pool
+
+    :param str profile: The profile configured for the workspace
+    :param Dict pool_config: The config of the instance pool, with its id
+    """
+    logger.info(f'Editing instance pool {pool_config["instance_pool_name"]}')
+    with span('edit_pool', pool_config['instance_pool_name']):
+        get_backend(profile).edit_instance_pool(pool_config)
@@ -1,8 +1,13 @@
-import subprocess
-from typing import Dict
+import time
+from typing import Dict, List
 
 import logging
 
+from .._backend import get_backend
+from .._pool import ContextThreadPoolExecutor
+from .._governor import count_retries
+from .._timing import span
+
 logger = logging.getLogger(__name__)
 
 
@@ -17,27 +22,14 @@ def get_acls(scope: str, profile: str) -> Dict[str, str]:
     """
 
     # Get the acls for the scope
-    acl_query = 'databricks secrets list-acls'
-    acl_query += f' --profile {profile}'
-    acl_query += f' --scope {scope}'
-
-    # Run and enforce success
-    sp = subprocess.run(acl_query, capture_output=True)
-    sp.check_returncode()
-
-    # Extract the existing scopes
-    acl_lines = [l.strip('\r') for l in sp.stdout.decode().split('\n')[1:]]
-    acl_lines = [l for l in acl_lines if l.replace('-', '').strip()]
-    acl_lines = [[elem for elem in l.split(' ') if elem] for l in acl_lines]
-
-    # Turn acls int a dictionary
-    existing_acls = {acl[0]: acl[1] for acl in acl_lines}
+    with span('get_scope_acls', scope):
+        existing_acls = get_backend(profile).list_acls(scope)
 
     return existing_acls
 
 
 def add_acl(group: str, permission: str, scope: str, profile: str):
-    """Add an acl to the supplied secret scope
+    """Add an acl to the supplied secret scope, overwriting any existing permission of the group
 
     :param str group: The group for which to add the permission
     :param str permission: The permission to add
@@ -45,16 +37,9 @@ def add_acl(group: str, permission: str, scope: str, profile: str):
     :param str profile: The profile configured for the workspace
     """
     # Add the acl
-    acl_query = 'databricks secrets put-acl'
-    acl_query += f' --profile {profile}'
-    acl_query += f' --scope {scope}'
-    acl_query += f' --principal {group}'
-    acl_query += f' --permission {permission}'
-
-    # Run and enforce success
     logging.info(f'Adding {permission} to {scope} for {group}')
-    sp = subprocess.run(acl_query, capture_output=True)
-    sp.check_returncode()
+    with span('put_scope_acl', f'{scope}/{group}'):
+        get_backend(profile).put_acl(scope, group, permission)
 
 
 def delete_acl(group: str, scope: str, profile: str):
@@ -65,46 +50,102 @@ def delete_acl(group: str, scope: str, profile: str):
     :param str profile: The profile configured for the workspace
     """
     # Remove the existing acl
-    acl_query = 'databricks secrets delete-acl'
-    acl_query += f' --profile {profile}'
-    acl_query += f' --scope {scope}'
-    acl_query += f' --principal {group}'
-
-    # Run and enforce success
     logging.warning(f'Removing existing acl to {scope} for {group}')
-    sp = subprocess.run(acl_query, capture_output=True)
-    sp.check_returncode()
+    with span('delete_scope_acl', f'{scope}/{group}'):
+        get_backend(profile).delete_acl(scope, group)
 
 
-def set_acls(existing_acls: Dict[str, str], desired_acls: Dict[str, str], scope: str, profile: str) -> Dict[str, str]:
-    """Enforce the list of acls for the supplied secret scope
+def diff_acls(existing_acls: Dict[str, str], desired_acls: Dict[str, str]) -> List[Dict]:
+    """Get the changes turning the existing acls of a secret scope into the desired acls
 
     :param Dict[str, str] existing_acls: The acls in the scope
     :param Dict[str, str] desired_acls: The acls to add to the scope
-    :param str scope: The scope to extract from
-    :param str profile: The profile configured for the workspace
 
-    :return: The available groups
-    :rtype: Dict[str, str]
+    :return: The add, update and delete changes with their principal and permission
+    :rtype: List[Dict]
     """
 
-    # Add the acls
+    # Add new groups and update misconfigured acls
+    changes = []
     for group, permission in desired_acls.items():
-        # Add new groups
         if group not in existing_acls:
-            # Add the acl
-            add_acl(group, permission, scope, profile)
-
-        # Update misconfigured acls
-        elif existing_acls.get(group, None) != permission:
-            # Remove the existing acl
-            delete_acl(group, scope, profile)
-
-            # Add the acl
-            add_acl(group, permission, scope, profile)
+            changes.append({'action': 'add', 'principal': group, 'permission': permission})
+        elif existing_acls[group] != permission:
+            changes.append({'action': 'update', 'principal': group, 'permission': permission})
 
     # Clean up the access roles
-    for principal in existing_acls:
+    for principal, permission in existing_acls.items():
         if principal not in desired_acls:
-            # Remove the acl
-            delete_acl(principal, scope, profile)
+            changes.append({'action': 'delete', 'principal': principal, 'permission': permission})
+
+    return changes
+
+
+def sync_acls(desired_acls: Dict[str, str], scope: str, profile: str, max_workers: int = 8) -> List[Dict]:
+    """Enforce the list of acls for the supplied secret scope, reading the existing acls first
+
+    :param Dict[str, str] desired_acls: The acls to add to the scope
+    :param str scope: The scope to extract from
+    :param str profile: The profile configured for the workspace
+    :param int max_workers: The maximum number of concurrent acl calls
+
+    :return: The applied changes with their duration and retries
+    :rtype: List[Dict]
+    """
+    return set_acls(get_acls(scope, profile), desired_acls, scope, profile, max_workers=max_workers)
+
+
+def set_acls(
+        existing_acls: Dict[str, str],
+        desired_acls: Dict[str, str],
+        scope: str,
+        profile: str,
+        max_workers: int = 8) -> List[Dict]:
+    """Enforce the list of acls for the supplied secret scope
+
+    The grants are applied concurrently before the revokes, so a caller never loses its own access before the groups
+    are granted theirs. A changed permission is overwritten in place and throttled calls are retried by the governor of
+    the workspace.
+
+    :param Dict[str, str] existing_acls: The acls in the scope
+    :param Dict[str, str] desired_acls: The acls to add to the scope
+    :param str scope: The scope to extract from
+    :param str profile: The profile configured for the workspace
+    :param int max_workers: The maximum number of concurrent acl calls
+
+    :return: The applied changes with their duration and retries
+    :rtype: List[Dict]
+    """
+
+    changes = diff_acls(existing_acls, desired_acls)
+    if not changes:
+        logger.info(f'Acls of {scope} are up to date')
+        return changes
+
+    # Apply the changes
+    def apply_change(change: Dict) -> Dict:
+        start = time.perf_counter()
+        with count_retries() as counter:
+            if change['action'] == 'delete':
+                delete_acl(change['principal'], scope, profile)
+            else:
+                add_acl(change['principal'], change['permission'], scope, profile)
+        change['duration'] = time.perf_counter() - start
+        change['retries'] = counter['retries']
+        return change
+
+    # Grant first, then revoke
+    puts = [change for change in changes if change['action'] != 'delete']
+    deletes = [change for change in changes if change['action'] == 'delete']
+    with ContextThreadPoolExecutor(max_workers=max(1, min(max_workers, len(changes)))) as executor:
+        changes = list(executor.map(apply_change, puts))
+        changes += list(executor.map(apply_change, deletes))
+
+    # Summarize the changes
+    summary = f'Acl changes for {scope}:'
+    for change in changes:
+        summary += f'\n\t{change["action"].ljust(8)}{(change["permission"] + ":").ljust(8)}{change["principal"].ljust(40)}'
+        summary += f'{change["duration"]:.2f}s, {change["retries"]} retries'
+    logger.info(summary)
+
+    return changes
@@ -1,24 +1,44 @@
 import logging
-import subprocess
+
+from .._backend import get_aad_backend
+from .._cache import get_cache
+from .._timing import span
 
 logger = logging.getLogger(__name__)
 
 
-def create_scope(scope: str, resource_id: str, key_vault_name: str):
+def key_vault_dns_name(key_vault_name: str) -> str:
+    """Get the dns name of an azure key vault
+
+    :param str key_vault_name: The key vault name
+
+    :return: The dns name, as listed for the scopes backed by the key vault
+    :rtype: str
+    """
+    return f'https://{key_vault_name}.vault.azure.net/'
+
+
+def create_scope(scope: str, resource_id: str, key_vault_name: str, profile: str):
     """Function for creating a secret scope from databricks
 
     :param str scope: The scope to create
     :param str resource_id: The resource id of the key vault
     :param str key_vault_name: The key vault to add
+    :param str profile: The profile configured for the workspace
     """
-    # Create the scope
+    dns_name = key_vault_dns_name(key_vault_name)
+
+    # Create the scope with the azure ad token of the current identity
     logger.info(f'Creating secret scope: {scope}')
-    create_query = 'databricks secrets create-scope --profile AAD'
-    create_query += f' --scope {scope}'
-    create_query += f' --scope-backend-type AZURE_KEYVAULT'
-    create_query += f' --resource-id {resource_id}'
-    create_query += f' --dns-name https://{key_vault_name}.vault.azure.net/'
-
-    # Run and enforce success
-    sp = subprocess.run(create_query, capture_output=True)
-    sp.check_returncode()
+    with span('create_scope', scope):
+        get_aad_backend(profile).create_scope(
+            scope=scope,
+            resource_id=resource_id,
+            dns_name=dns_name
+        )
+
+    # Add the scope to the cached scopes
+    get_cache(profile).update(
+        'scopes',
+        lambda scopes: scopes + [{'name': scope, 'backend': 'AZURE_KEYVAULT', 'url': dns_name}]
+    )
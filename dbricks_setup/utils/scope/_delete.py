@@ -1,5 +1,9 @@
 import logging
-import subprocess
+
+from .._backend import get_backend
+from .._cache import get_cache
+from .._fingerprint import get_fingerprints
+from .._timing import span
 
 logger = logging.getLogger(__name__)
 
@@ -12,9 +16,7 @@ def delete_scope(scope: str, profile: str):
     """
     # Delete the scope
     logger.warning(f'Deleting secret scope: {scope}')
-    delete_query = f'databricks secrets delete-scope --profile {profile}'
-    delete_query += f' --scope {scope}'
-
-    # Run and enforce success
-    sp = subprocess.run(delete_query, capture_output=True)
-    sp.check_returncode()
+    with span('delete_scope', scope):
+        get_backend(profile).delete_scope(scope)
+    get_cache(profile).update('scopes', lambda scopes: [s for s in scopes if s['name'] != scope])
+    get_fingerprints(profile).set('scopes', scope, None)
@@ -1,35 +1,49 @@
-import subprocess
-from typing import Dict
+from typing import Dict, Iterator, Optional
 
 import logging
 
+from .._backend import get_backend
+from .._cache import get_cache
+from .._timing import timed_iter
+
 logger = logging.getLogger(__name__)
 
 
-def extract_scopes(profile: str) -> Dict[str, Dict[str, str]]:
-    """Get the list of secret scopes from the configured workspace
+def extract_scopes(profile: str) -> Iterator[Dict[str, str]]:
+    """Get the secret scopes from the configured workspace
 
     :param str profile: The profile configured for the workspace
 
-    :return: The available secret scopes with the names as the dictionary keys
-    :rtype: Dict[str, Dict[str, str]]
+    :return: The available secret scopes with their name, backend and url
+    :rtype: Iterator[Dict[str, str]]
     """
 
-    # Construct the query
+    # Use the cached scopes if fresh
+    cache = get_cache(profile)
+    cached_scopes = cache.get('scopes')
+    if cached_scopes is not None:
+        yield from cached_scopes
+        return
+
+    # Query what scopes exists, only cache complete listings
     logger.info('Extracting scope information')
-    scope_query = 'databricks secrets list-scopes'
-    scope_query += f' --profile {profile}'
+    existing_scopes = [] if cache.enabled else None
+    for scope in timed_iter('extract_scopes', profile, get_backend(profile).list_scopes()):
+        if existing_scopes is not None:
+            existing_scopes.append(scope)
+        yield scope
 
-    # Run and verify output
-    sp = subprocess.run(scope_query, capture_output=True)
-    sp.check_returncode()
+    if existing_scopes is not None:
+        cache.set('scopes', existing_scopes)
 
-    # Extract the existing scopes
-    scope_lines = [l.strip('\r') for l in sp.stdout.decode().split('\n')[1:]]
-    scope_lines = [l for l in scope_lines if l.replace('-', '').strip()]
-    scope_lines = [[elem for elem in l.split(' ') if elem] for l in scope_lines]
 
-    # Convert to a nested dictionary
-    existing_scopes = {scope[0]: {'backend': scope[1], 'url': scope[2]} for scope in scope_lines}
+def find_scope(scope_name: str, profile: str) -> Optional[Dict[str, str]]:
+    """Find a secret scope by name, stops listing at the first match
 
-    return existing_scopes
+    :param str scope_name: The name of the secret scope
+    :param str profile: The profile configured for the workspace
+
+    :return: The secret scope, None if it does not exist
+    :rtype: Optional[Dict[str, str]]
+    """
+    return next((scope for scope in extract_scopes(profile) if scope['name'] == scope_name), None)
@@ -0,0 +1 @@
+from ._watch import Watcher, watch_cli
@@ -0,0 +1,275 @@
+import random
+import time
+from argparse import Namespace
+from typing import Callable, Dict, List
+
+import logging
+from databricks_cli.configure.provider import DatabricksConfig
+
+from ..apply._manifest import load_manifest
+from ..cluster import update_cluster
+from ..scope import update_scope
+from ..scope._update import get_access_groups as get_scope_access_groups
+from ..utils._backend import get_backend
+from ..utils._groups import GroupIndex, get_groups
+from ..utils._pool import ContextThreadPoolExecutor
+from ..utils._profile import extract_profile
+from ..utils._timing import span, timed_iter
+from ..utils.cluster._acl import get_acls as get_cluster_acls, parse_acls, plan_acls
+from ..utils.cluster._config import get_access_groups as get_cluster_access_groups
+from ..utils.scope._acl import diff_acls, get_acls as get_scope_acls
+
+logger = logging.getLogger(__name__)
+
+# The cluster events meaning the configuration of a cluster was changed
+EDIT_EVENTS = ['EDITED']
+
+
+def _now() -> int:
+    return int(time.time() * 1000)
+
+
+class Watcher:
+    """Keeps the clusters and secret scopes of a manifest in their desired state
+
+    The workspace state is held in memory between cycles. A cycle reads the events of every managed cluster since the
+    previous cycle, the acls of the managed resources and the list of scopes, and reconciles only the resources that
+    are missing, were edited or whose acls drifted.
+
+    :param Dict manifest: The loaded manifest
+    :param str profile: The profile configured for the workspace
+    :param DatabricksConfig base_config: The config of the profile
+    :param int workers: The number of concurrent reads and reconciliations
+    """
+
+    def __init__(self, manifest: Dict, profile: str, base_config: DatabricksConfig, workers: int = 8):
+        self.clusters = {cluster['name']: cluster for cluster in manifest['clusters']}
+        self.scopes = {scope['scope_name']: scope for scope in manifest['scopes']}
+        self.profile = profile
+        self.base_config = base_config
+        self.workers = workers
+
+        self.groups: GroupIndex = GroupIndex([])
+        self.existing_clusters: Dict[str, Dict[str, str]] = {}
+        self.existing_scopes: Dict[str, Dict[str, str]] = {}
+        self.since: Dict[str, int] = {}
+        self.cycles = 0
+        self.failures = 0
+        self._stale_clusters = True
+
+    def _refresh_clusters(self):
+        # List the clusters, only after clusters were created since the ids of the managed clusters are kept
+        backend = get_backend(self.profile)
+        self.existing_clusters = {
+            cluster['name'].lower(): cluster
+            for cluster
+            in timed_iter('extract_clusters', self.profile, backend.list_clusters())
+            if cluster['name'].lower() in self.clusters
+        }
+        self._stale_clusters = False
+
+    def _refresh_scopes(self):
+        backend = get_backend(self.profile)
+        self.existing_scopes = {
+            scope['name']: scope
+            for scope
+            in timed_iter('extract_scopes', self.profile, backend.list_scopes())
+            if scope['name'] in self.scopes
+        }
+
+    def _cluster_changed(self, name: str) -> bool:
+        """Check whether a managed cluster left its desired state since the previous cycle
+
+        :param str name: The name of the cluster
+
+        :return: Whether the cluster is missing, was edited while its configuration is managed or its acls drifted
+        :rtype: bool
+        """
+        cluster = self.existing_clusters.get(name)
+        if cluster is None:
+            logger.info(f'Cluster {name} is missing')
+            return True
+
+        # Check for deletions and edits since the previous cycle
+        with span('get_cluster_events', cluster['cluster_id']):
+            events = get_backend(self.profile).get_cluster_events(
+                cluster['cluster_id'], self.since.get(name, 0), EDIT_EVENTS
+            )
+        if events is None:
+            logger.info(f'Cluster {name} was deleted')
+            self.existing_clusters.pop(name, None)
+            return True
+        if events and self.clusters[name]['edit']:
+            logger.info(f'Cluster {name} was edited')
+            return True
+
+        # Check for acl drift
+        existing_acls = parse_acls(get_cluster_acls(cluster['cluster_id'], self.base_config))
+        if plan_acls(existing_acls, get_cluster_access_groups(name))['action'] != 'none':
+            logger.info(f'Acls of cluster {name} drifted')
+            return True
+        return False
+
+    def _scope_changed(self, name: str) -> bool:
+        """Check whether a managed secret scope left its desired state
+
+        :param str name: The name of the secret scope
+
+        :return: Whether the scope is missing or its acls drifted
+        :rtype: bool
+        """
+        if name not in self.existing_scopes:
+            logger.info(f'Scope {name} is missing')
+            return True
+        if diff_acls(get_scope_acls(name, self.profile), get_scope_access_groups(name)):
+            logger.info(f'Acls of scope {name} drifted')
+            return True
+        return False
+
+    def poll(self) -> Dict[str, List[str]]:
+        """Find the managed resources that left their desired state
+
+        :return: The names of the changed clusters and scopes
+        :rtype: Dict[str, List[str]]
+        """
+        if self._stale_clusters:
+            self._refresh_clusters()
+        if self.scopes:
+            self._refresh_scopes()
+
+        # A resource that could not be read is checked again the next cycle
+        unread = set()
+
+        def check(changed: Callable[[str], bool], name: str) -> bool:
+            try:
+                return changed(name)
+            except Exception as e:
+                logger.error(f'Failed to check {name}: {e}')
+                unread.add(name)
+                return False
+
+        polled_at = _now()
+        with ContextThreadPoolExecutor(max_workers=max(1, self.workers)) as executor:
+            clusters = dict(zip(self.clusters, executor.map(lambda n: check(self._cluster_changed, n), self.clusters)))
+            scopes = dict(zip(self.scopes, executor.map(lambda n: check(self._scope_changed, n), self.scopes)))
+        for name in self.clusters:
+            if name not in unread:
+                self.since[name] = polled_at
+
+        return {
+            'clusters': [name for name, changed in clusters.items() if changed],
+            'scopes': [name for name, changed in scopes.items() if changed],
+        }
+
+    def reconcile(self, changed: Dict[str, List[str]]):
+        """Bring changed resources back to their desired state, a failure is logged and left to the next cycles
+
+        :param Dict[str, List[str]] changed: The names of the changed clusters and scopes
+        """
+        clusters = list(self.existing_clusters.values())
+
+        def reconcile_cluster(name: str):
+            cluster = self.clusters[name]
+            update_cluster(
+                name,
+                self.profile,
+                self.base_config,
+                self.groups,
+                clusters,
+                run=cluster['run'],
+                edit=cluster['edit'],
+                spark_query=cluster['spark_version'],
+                spark_variant=cluster['spark_variant'],
+                verify=True
+            )
+            return get_cluster_access_groups(name)
+
+        def reconcile_scope(name: str):
+            scope = self.scopes[name]
+            update_scope(
+                name,
+                scope['key_vault'],
+                scope['resource_id'],
+                self.profile,
+                self.base_config,
+                self.groups,
+                self.existing_scopes,
+                verify=True
+            )
+            return get_scope_access_groups(name)
+
+        with ContextThreadPoolExecutor(max_workers=max(1, self.workers)) as executor:
+            futures = {executor.submit(reconcile_cluster, name): f'cluster {name}' for name in changed['clusters']}
+            futures.update({executor.submit(reconcile_scope, name): f'scope {name}' for name in changed['scopes']})
+
+            created = []
+            for future, resource in futures.items():
+                try:
+                    created += list(future.result())
+                    logger.info(f'Reconciled {resource}')
+                except Exception as e:
+                    logger.error(f'Failed to reconcile {resource}: {e}')
+                    self.failures += 1
+
+        # Keep the created access groups, and the ids of recreated clusters for the next cycle
+        self.groups = GroupIndex(list(self.groups) + created)
+        if changed['clusters']:
+            self._stale_clusters = True
+
+    def run(self, interval: float = 60.0, jitter: float = 0.1, cycles: int = 0):
+        """Reconcile every resource once, then reconcile the changed resources every interval
+
+        :param float interval: The seconds between cycles
+        :param float jitter: The fraction of the interval the cycles are randomly shifted by, so watchers of many
+            workspaces do not poll in lockstep
+        :param int cycles: The number of cycles after the first reconciliation, 0 runs until interrupted
+        """
+        # Reconcile everything against a full read of the workspace
+        self.groups = get_groups(self.profile)
+        self._refresh_clusters()
+        self._refresh_scopes()
+        polled_at = _now()
+        self.reconcile({'clusters': list(self.clusters), 'scopes': list(self.scopes)})
+        self.since = {name: polled_at for name in self.clusters}
+
+        while not cycles or self.cycles < cycles:
+            time.sleep(max(0.0, interval * random.uniform(1 - jitter, 1 + jitter)))
+
+            start = time.perf_counter()
+            try:
+                changed = self.poll()
+            except Exception as e:
+                logger.error(f'Failed to poll the workspace: {e}')
+                self.failures += 1
+                changed = {'clusters': [], 'scopes': []}
+            if changed['clusters'] or changed['scopes']:
+                self.reconcile(changed)
+            self.cycles += 1
+            logger.info(
+                f'Cycle {self.cycles} reconciled {len(changed["clusters"])} clusters and {len(changed["scopes"])} '
+                f'scopes in {time.perf_counter() - start:.2f}s'
+            )
+
+
+def watch_cli(args: Namespace):
+    """Keeps every cluster and secret scope listed in a workspace manifest in its desired state
+
+    :param Namespace args: The arguments from the cli
+    :return:
+    """
+    # Load the manifest
+    manifest = load_manifest(args.f)
+
+    # Get the base profile, the cli argument takes precedence over the manifest
+    if args.profile is None:
+        args.profile = manifest['profile']
+    profile, base_config = extract_profile(args)
+
+    watcher = Watcher(manifest, profile, base_config, workers=args.workers)
+    try:
+        watcher.run(interval=args.interval, jitter=args.jitter, cycles=args.cycles)
+    except KeyboardInterrupt:
+        logger.info(f'Stopped watching after {watcher.cycles} cycles')
+
+    if watcher.failures:
+        raise RuntimeError(f'{watcher.failures} reconciliations failed')
@@ -9,11 +9,18 @@ setup(
     author_email='sindreosnes.git@gmail.com',
     version='0.0.1',
     include_package_data=True,
+    python_requires='>=3.9',
     packages=find_packages(exclude=['tests*']),
     install_requires=[
         'databricks-cli',
         'azure-cli',
+        'azure-identity',
+        'requests',
+        'pyyaml',
     ],
+    extras_require={
+        'async': ['httpx'],
+    },
     entry_points={
         'console_scripts': [
             'dbricks_setup=dbricks_setup._cli:cli'
@@ -0,0 +1,144 @@
+"""End to end benchmark of the cli commands against a local fake workspace
+
+Run with:
+
+    python -m tests.dbricks_setup_tests.benchmark --clusters 1000 --groups 5000 --scopes 100 --latency 0.02
+
+The databricks cli ignores the port of the workspace host, benchmarking the cli backend therefore needs the fake
+workspace on port 80:
+
+    python -m tests.dbricks_setup_tests.benchmark --backend cli --port 80
+"""
+import argparse
+import contextlib
+import io
+import json
+import logging
+import subprocess
+import sys
+import time
+from typing import Dict, List
+from unittest import mock
+
+from .fake_workspace import FakeWorkspace
+
+
+class _CountingPopen(subprocess.Popen):
+    spawns = 0
+
+    def __init__(self, *args, **kwargs):
+        _CountingPopen.spawns += 1
+        super().__init__(*args, **kwargs)
+
+
+def run_command(argv: List[str]) -> str:
+    """Run the cli in process with the supplied arguments, capturing its output
+
+    :param List[str] argv: The cli arguments
+
+    :return: The standard output of the command
+    :rtype: str
+    """
+    from dbricks_setup._cli import cli
+
+    output = io.StringIO()
+    with mock.patch.object(sys, 'argv', ['dbricks_setup', *argv]), contextlib.redirect_stdout(output):
+        cli()
+    return output.getvalue()
+
+
+def measure(workspace: FakeWorkspace, argv: List[str]) -> Dict:
+    """Run a command and measure its cost
+
+    :param FakeWorkspace workspace: The running fake workspace
+    :param List[str] argv: The cli arguments
+
+    :return: The duration, number of process spawns and http calls of the command
+    :rtype: Dict
+    """
+    workspace.reset_calls()
+    _CountingPopen.spawns = 0
+
+    start = time.perf_counter()
+    with mock.patch('subprocess.Popen', _CountingPopen):
+        run_command(argv)
+    duration = time.perf_counter() - start
+
+    return {
+        'command': ' '.join(argv),
+        'seconds': round(duration, 4),
+        'spawns': _CountingPopen.spawns,
+        'http_calls': len(workspace.calls),
+        'calls': dict(workspace.call_counts()),
+    }
+
+
+def scenarios(workspace: FakeWorkspace, backend: str = 'rest') -> List[List[str]]:
+    """Get the benchmarked commands for a workspace
+
+    :param FakeWorkspace workspace: The fake workspace
+    :param str backend: The backend used by the commands
+
+    :return: The cli arguments of each command
+    :rtype: List[List[str]]
+    """
+    # Create the resources the update and delete commands work on
+    workspace.add_cluster('bench-existing', state='TERMINATED')
+    workspace.add_cluster('bench-delete', state='TERMINATED')
+    workspace.add_scope('bench-scope')
+    workspace.add_scope('bench-scope-delete')
+    workspace.acls['bench-scope-delete']['stale-group'] = 'READ'
+
+    base = ['--backend', backend]
+    profile = ['--profile', workspace.profile]
+    return [
+        base + ['cluster', 'update', *profile, '--name', 'bench-new'],
+        base + ['cluster', 'update', *profile, '--name', 'bench-existing'],
+        base + ['cluster', 'delete', *profile, '-a', '-q', '--name', 'bench-delete'],
+        base + ['scope', 'update', *profile, '--key-vault', 'bench-scope', '--resource-id', 'fake-id'],
+        base + ['scope', 'delete', *profile, '-a', '-q', '--scope-name', 'bench-scope-delete'],
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the cli commands against a local fake workspace')
+    parser.add_argument('--clusters', type=int, default=100, help='The number of clusters in the workspace')
+    parser.add_argument('--groups', type=int, default=1000, help='The number of groups in the workspace')
+    parser.add_argument('--scopes', type=int, default=50, help='The number of secret scopes in the workspace')
+    parser.add_argument('--latency', type=float, default=0.0, help='The latency in seconds of every call')
+    parser.add_argument('--rate-limit', type=float, default=0.0, help='The calls per second before throttling')
+    parser.add_argument('--backend', type=str, default='rest', help='The backend used by the commands')
+    parser.add_argument('--cache', action='store_true', help='Use the workspace cache')
+    parser.add_argument('--port', type=int, default=0, help='The port of the fake workspace, any free port by default')
+    parser.add_argument('--output', type=str, help='Write the results as json to this file')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+
+    from dbricks_setup.utils._cache import set_cache_enabled
+    set_cache_enabled(args.cache)
+
+    results = []
+    with FakeWorkspace(
+            clusters=args.clusters,
+            groups=args.groups,
+            scopes=args.scopes,
+            latency=args.latency,
+            rate_limit=args.rate_limit,
+            port=args.port) as workspace:
+        for argv in scenarios(workspace, args.backend):
+            results.append(measure(workspace, argv))
+
+    # Report the results
+    print(f'{"command".ljust(60)}{"seconds".rjust(10)}{"spawns".rjust(8)}{"http".rjust(8)}')
+    for result in results:
+        command = result['command'].replace(f' --profile {workspace.profile}', '')
+        print(f'{command[:59].ljust(60)}{result["seconds"]:10.3f}{result["spawns"]:8d}{result["http_calls"]:8d}')
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
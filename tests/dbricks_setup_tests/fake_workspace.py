@@ -0,0 +1,539 @@
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Tuple
+from urllib.parse import parse_qs, urlparse
+
+# The spark versions served by default, in the shuffled order of the real api
+SPARK_VERSIONS = [
+    {'key': '9.1.x-scala2.12', 'name': '9.1 LTS (includes Apache Spark 3.1.2, Scala 2.12)'},
+    {'key': '13.3.x-scala2.12', 'name': '13.3 LTS (includes Apache Spark 3.4.1, Scala 2.12)'},
+    {'key': '13.3.x-photon-scala2.12', 'name': '13.3 LTS Photon (includes Apache Spark 3.4.1, Scala 2.12)'},
+    {'key': '13.3.x-cpu-ml-scala2.12', 'name': '13.3 LTS ML (includes Apache Spark 3.4.1, Scala 2.12)'},
+    {'key': '13.3.x-gpu-ml-scala2.12', 'name': '13.3 LTS ML (includes Apache Spark 3.4.1, GPU, Scala 2.12)'},
+    {'key': '14.0.x-scala2.12', 'name': '14.0 (includes Apache Spark 3.5.0, Scala 2.12)'},
+    {'key': '10.4.x-scala2.12', 'name': '10.4 LTS (includes Apache Spark 3.2.1, Scala 2.12)'},
+]
+
+
+class ApiError(Exception):
+
+    def __init__(self, status: int, error_code: str, message: str):
+        super().__init__(message)
+        self.status = status
+        self.error_code = error_code
+
+
+class FakeWorkspace:
+    """Local stand-in for the workspace rest api
+
+    Serves the clusters, groups, secrets, permissions and spark versions endpoints from in memory state, and records
+    every call. Use as a context manager, the profile of the workspace is written to a temporary databricks cli config
+    file which is selected through DATABRICKS_CONFIG_FILE.
+
+    :param int clusters: The number of clusters created up front
+    :param int groups: The number of unrelated groups created up front
+    :param int scopes: The number of secret scopes created up front
+    :param float latency: The latency in seconds added to every call
+    :param float rate_limit: The number of calls per second served before answering 429, 0 disables the limit
+    :param int page_size: The maximum page size of the 2.1 clusters list
+    :param int port: The port to serve on, the databricks cli ignores the port of the host so it needs 80
+    :param float terminate_delay: The seconds a terminated cluster stays TERMINATING
+    :param int bulk_max_operations: The maximum operations of a scim bulk request, 0 disables scim bulk requests
+    """
+
+    def __init__(
+            self,
+            clusters: int = 0,
+            groups: int = 0,
+            scopes: int = 0,
+            latency: float = 0.0,
+            rate_limit: float = 0.0,
+            page_size: int = 100,
+            port: int = 0,
+            terminate_delay: float = 0.0,
+            bulk_max_operations: int = 100):
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.page_size = page_size
+        self.port = port
+        self.terminate_delay = terminate_delay
+        self.bulk_max_operations = bulk_max_operations
+
+        self.groups: Dict[str, Dict] = {}
+        self.clusters: Dict[str, Dict] = {}
+        self.scopes: Dict[str, Dict] = {}
+        self.acls: Dict[str, Dict[str, str]] = {}
+        self.secrets: Dict[str, Dict[str, int]] = {}
+        self.events: Dict[str, List[Dict]] = {}
+        self.pools: Dict[str, Dict] = {}
+        self.permissions: Dict[str, Dict[str, str]] = {}
+        self.spark_versions: List[Dict[str, str]] = list(SPARK_VERSIONS)
+        self._terminating: Dict[str, float] = {}
+
+        self.calls: List[Tuple[str, str]] = []
+        # The number of upcoming calls answered with 503
+        self.unavailable = 0
+        self.authorizations: Dict[str, str] = {}
+        self._lock = threading.RLock()
+        self._tokens = rate_limit
+        self._last_refill = time.monotonic()
+
+        for i in range(groups):
+            self.add_group(f'group-{i}')
+        for i in range(clusters):
+            self.add_cluster(f'cluster {i}', state='TERMINATED')
+        for i in range(scopes):
+            self.add_scope(f'scope-{i}')
+
+        self.profile = f'fake-{uuid.uuid4().hex[:8]}'
+        self._server = None
+        self._thread = None
+        self._config_file = None
+        self._previous_config_file = None
+
+    # State helpers
+    def add_group(self, name: str):
+        with self._lock:
+            if not name:
+                raise ApiError(400, 'INVALID_PARAMETER_VALUE', 'A group name is required')
+            if name in self.groups:
+                raise ApiError(400, 'RESOURCE_ALREADY_EXISTS', f'Group {name} already exists')
+            self.groups[name] = {'display_name': name, 'id': uuid.uuid4().hex[:12], 'members': []}
+
+    def add_cluster(self, name: str, state: str = 'PENDING', **spec) -> str:
+        with self._lock:
+            cluster_id = f'{len(self.clusters):04d}-{uuid.uuid4().hex[:6]}-fake'
+            self.clusters[cluster_id] = {
+                **spec,
+                'cluster_id': cluster_id,
+                'cluster_name': name,
+                'state': state,
+            }
+            self.permissions[cluster_id] = {}
+            self.add_event(cluster_id, 'CREATING')
+            return cluster_id
+
+    def add_event(self, cluster_id: str, event_type: str):
+        with self._lock:
+            self.events.setdefault(cluster_id, []).append(
+                {'cluster_id': cluster_id, 'timestamp': int(time.time() * 1000), 'type': event_type, 'details': {}}
+            )
+
+    def add_scope(self, name: str, dns_name: str = None):
+        with self._lock:
+            if name in self.scopes:
+                raise ApiError(400, 'RESOURCE_ALREADY_EXISTS', f'Scope {name} already exists')
+            self.scopes[name] = {
+                'name': name,
+                'backend_type': 'AZURE_KEYVAULT',
+                'keyvault_metadata': {
+                    'resource_id': f'/subscriptions/fake/vaults/{name}',
+                    'dns_name': dns_name or f'https://{name}.vault.azure.net/',
+                }
+            }
+            self.acls[name] = {}
+            self.secrets[name] = {}
+
+    def add_secret(self, scope: str, key: str):
+        with self._lock:
+            self.secrets[scope][key] = int(time.time() * 1000)
+
+    def add_member(self, group: str, user: str):
+        with self._lock:
+            self.groups[group]['members'].append(user)
+
+    def count(self, prefix: str = '') -> int:
+        """Count the recorded calls whose path starts with a prefix
+
+        :param str prefix: The path prefix, i.e. /api/2.0/groups
+
+        :return: The number of calls
+        :rtype: int
+        """
+        with self._lock:
+            return sum(1 for _, path in self.calls if path.startswith(prefix))
+
+    def call_counts(self) -> Counter:
+        with self._lock:
+            return Counter(f'{method} {path}' for method, path in self.calls)
+
+    def reset_calls(self):
+        with self._lock:
+            self.calls.clear()
+
+    # Server lifecycle
+    @property
+    def host(self) -> str:
+        return f'http://127.0.0.1:{self._server.server_port}'
+
+    def __enter__(self) -> 'FakeWorkspace':
+        self._server = ThreadingHTTPServer(('127.0.0.1', self.port), _handler(self))
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+        # Write the profile of the workspace
+        fd, self._config_file = tempfile.mkstemp(suffix='.databrickscfg')
+        with os.fdopen(fd, 'w') as f:
+            f.write(f'[{self.profile}]\nhost = {self.host}\ntoken = fake-token\n')
+        self._previous_config_file = os.environ.get('DATABRICKS_CONFIG_FILE')
+        os.environ['DATABRICKS_CONFIG_FILE'] = self._config_file
+
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._previous_config_file is None:
+            os.environ.pop('DATABRICKS_CONFIG_FILE', None)
+        else:
+            os.environ['DATABRICKS_CONFIG_FILE'] = self._previous_config_file
+        os.remove(self._config_file)
+
+    def _throttled(self) -> bool:
+        if not self.rate_limit:
+            return False
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.rate_limit, self._tokens + (now - self._last_refill) * self.rate_limit)
+            self._last_refill = now
+            if self._tokens < 1:
+                return True
+            self._tokens -= 1
+            return False
+
+    def _unavailable(self) -> bool:
+        with self._lock:
+            if self.unavailable <= 0:
+                return False
+            self.unavailable -= 1
+            return True
+
+    # Api
+    def handle(self, method: str, path: str, query: Dict[str, str], body: Dict) -> Dict:
+        routes = {
+            ('GET', '/api/2.0/groups/list'): self._groups_list,
+            ('POST', '/api/2.0/groups/create'): self._groups_create,
+            ('POST', '/api/2.0/groups/delete'): self._groups_delete,
+            ('GET', '/api/2.0/groups/list-members'): self._groups_list_members,
+            ('GET', '/api/2.0/clusters/list'): self._clusters_list,
+            ('GET', '/api/2.1/clusters/list'): self._clusters_list_paginated,
+            ('GET', '/api/2.0/clusters/get'): self._clusters_get,
+            ('GET', '/api/2.0/clusters/spark-versions'): self._spark_versions,
+            ('POST', '/api/2.0/clusters/create'): self._clusters_create,
+            ('POST', '/api/2.0/clusters/edit'): self._clusters_edit,
+            ('POST', '/api/2.0/clusters/delete'): self._clusters_terminate,
+            ('POST', '/api/2.0/clusters/permanent-delete'): self._clusters_delete,
+            ('POST', '/api/2.0/clusters/events'): self._clusters_events,
+            ('GET', '/api/2.0/instance-pools/list'): self._pools_list,
+            ('POST', '/api/2.0/instance-pools/create'): self._pools_create,
+            ('POST', '/api/2.0/instance-pools/edit'): self._pools_edit,
+            ('GET', '/api/2.0/secrets/scopes/list'): self._scopes_list,
+            ('POST', '/api/2.0/secrets/scopes/create'): self._scopes_create,
+            ('POST', '/api/2.0/secrets/scopes/delete'): self._scopes_delete,
+            ('GET', '/api/2.0/secrets/acls/list'): self._acls_list,
+            ('GET', '/api/2.0/secrets/list'): self._secrets_list,
+            ('POST', '/api/2.0/secrets/acls/put'): self._acls_put,
+            ('POST', '/api/2.0/secrets/acls/delete'): self._acls_delete,
+        }
+        if path.startswith('/api/2.0/permissions/clusters/') or path.startswith('/api/2.0/permissions/instance-pools/'):
+            _, object_type, object_id = path.rsplit('/', 2)
+            return self._permissions(method, object_type, object_id, body)
+        if path == '/api/2.0/preview/scim/v2/Bulk' and method == 'POST':
+            return self._scim_bulk(body)
+        if path == '/api/2.0/preview/scim/v2/Groups' and method == 'GET':
+            with self._lock:
+                return self._scim_groups_list(query)
+        if (method, path) not in routes:
+            raise ApiError(404, 'ENDPOINT_NOT_FOUND', f'No api for {method} {path}')
+        with self._lock:
+            self._advance()
+            return routes[(method, path)](query, body)
+
+    def _advance(self):
+        # Finish the terminations that are due
+        now = time.monotonic()
+        for cluster_id, due in list(self._terminating.items()):
+            if due <= now:
+                del self._terminating[cluster_id]
+                if cluster_id in self.clusters:
+                    self.clusters[cluster_id]['state'] = 'TERMINATED'
+
+    def _groups_list(self, query: Dict, body: Dict) -> Dict:
+        return {'group_names': list(self.groups)}
+
+    def _groups_create(self, query: Dict, body: Dict) -> Dict:
+        self.add_group(body['group_name'])
+        return {'group_name': body['group_name']}
+
+    def _groups_delete(self, query: Dict, body: Dict) -> Dict:
+        if self.groups.pop(body['group_name'], None) is None:
+            raise ApiError(404, 'RESOURCE_DOES_NOT_EXIST', f'Group {body["group_name"]} does not exist')
+        return {}
+
+    def _groups_list_members(self, query: Dict, body: Dict) -> Dict:
+        if query['group_name'] not in self.groups:
+            raise ApiError(404, 'RESOURCE_DOES_NOT_EXIST', f'Group {query["group_name"]} does not exist')
+        return {'members': [{'user_name': user} for user in self.groups[query['group_name']]['members']]}
+
+    def _scim_groups_list(self, query: Dict) -> Dict:
+        # Supports displayName eq and sw conditions joined by or
+        conditions = re.findall(r'displayName (eq|sw) "((?:[^"\\]|\\.)*)"', query.get('filter', ''))
+        conditions = [(op, re.sub(r'\\(.)', r'\1', value)) for op, value in conditions]
+        groups = [
+            group
+            for name, group
+            in self.groups.items()
+            if not conditions or any(name == v if op == 'eq' else name.startswith(v) for op, v in conditions)
+        ]
+        start = int(query.get('startIndex', 1)) - 1
+        page = groups[start:start + min(int(query.get('count', self.page_size)), self.page_size)]
+        return {
+            'schemas': ['urn:ietf:params:scim:api:messages:2.0:ListResponse'],
+            'totalResults': len(groups),
+            'startIndex': start + 1,
+            'itemsPerPage': len(page),
+            'Resources': [{'id': group['id'], 'displayName': group['display_name']} for group in page],
+        }
+
+    def _scim_bulk(self, body: Dict) -> Dict:
+        if not self.bulk_max_operations:
+            raise ApiError(404, 'ENDPOINT_NOT_FOUND', 'No api for POST /api/2.0/preview/scim/v2/Bulk')
+        if len(body['Operations']) > self.bulk_max_operations:
+            raise ApiError(413, 'TOO_MANY_OPERATIONS', f'At most {self.bulk_max_operations} operations per request')
+
+        results = []
+        for operation in body['Operations']:
+            try:
+                with self._lock:
+                    if operation['method'] == 'POST' and operation['path'] == '/Groups':
+                        self.add_group(operation['data']['displayName'])
+                        status = 201
+                    elif operation['method'] == 'DELETE' and operation['path'].startswith('/Groups/'):
+                        group_id = operation['path'].rsplit('/', 1)[-1]
+                        names = [name for name, group in self.groups.items() if group['id'] == group_id]
+                        if not names:
+                            raise ApiError(404, 'RESOURCE_DOES_NOT_EXIST', f'Group {group_id} does not exist')
+                        self.groups.pop(names[0])
+                        status = 204
+                    else:
+                        raise ApiError(400, 'INVALID_PARAMETER_VALUE', f'Unsupported operation {operation}')
+                results.append({'bulkId': operation.get('bulkId'), 'method': operation['method'], 'status': str(status)})
+            except ApiError as e:
+                status = 409 if e.error_code == 'RESOURCE_ALREADY_EXISTS' else e.status
+                results.append({
+                    'bulkId': operation.get('bulkId'),
+                    'method': operation['method'],
+                    'status': str(status),
+                    'response': {'status': str(status), 'detail': str(e)},
+                })
+        return {'schemas': ['urn:ietf:params:scim:api:messages:2.0:BulkResponse'], 'Operations': results}
+
+    def _cluster(self, cluster_id: str) -> Dict:
+        if cluster_id not in self.clusters:
+            raise ApiError(400, 'INVALID_PARAMETER_VALUE', f'Cluster {cluster_id} does not exist')
+        return self.clusters[cluster_id]
+
+    def _clusters_list(self, query: Dict, body: Dict) -> Dict:
+        return {'clusters': list(self.clusters.values())} if self.clusters else {}
+
+    def _clusters_list_paginated(self, query: Dict, body: Dict) -> Dict:
+        page_size = min(int(query.get('page_size', self.page_size)), self.page_size)
+        start = int(query.get('page_token') or 0)
+        clusters = list(self.clusters.values())[start:start + page_size]
+        response = {'clusters': clusters}
+        if start + page_size < len(self.clusters):
+            response['next_page_token'] = str(start + page_size)
+        return response
+
+    def _clusters_get(self, query: Dict, body: Dict) -> Dict:
+        return self._cluster(query['cluster_id'])
+
+    def _spark_versions(self, query: Dict, body: Dict) -> Dict:
+        return {'versions': self.spark_versions}
+
+    def _clusters_create(self, query: Dict, body: Dict) -> Dict:
+        if 'instance_pool_id' in body:
+            self._pool(body['instance_pool_id'])
+        spec = {k: v for k, v in body.items() if k != 'cluster_name'}
+        return {'cluster_id': self.add_cluster(body['cluster_name'], **spec)}
+
+    def _clusters_edit(self, query: Dict, body: Dict) -> Dict:
+        cluster = self._cluster(body['cluster_id'])
+        if cluster['state'] not in ('TERMINATED', 'RUNNING'):
+            raise ApiError(400, 'INVALID_STATE', f'Cluster {body["cluster_id"]} is in unexpected state {cluster["state"]}')
+        self.clusters[body['cluster_id']] = {**body, 'state': cluster['state']}
+        self.add_event(body['cluster_id'], 'EDITED')
+        return {}
+
+    def _clusters_events(self, query: Dict, body: Dict) -> Dict:
+        self._cluster(body['cluster_id'])
+        events = [
+            event
+            for event
+            in self.events.get(body['cluster_id'], [])
+            if event['timestamp'] >= body.get('start_time', 0)
+            and (not body.get('event_types') or event['type'] in body['event_types'])
+        ]
+        if body.get('order', 'DESC') == 'DESC':
+            events = events[::-1]
+        offset, limit = body.get('offset', 0), min(body.get('limit', 50), 500)
+        response = {'events': events[offset:offset + limit], 'total_count': len(events)}
+        if offset + limit < len(events):
+            response['next_page'] = {**body, 'offset': offset + limit}
+        return response
+
+    def _clusters_terminate(self, query: Dict, body: Dict) -> Dict:
+        if self.terminate_delay:
+            self._cluster(body['cluster_id'])['state'] = 'TERMINATING'
+            self._terminating[body['cluster_id']] = time.monotonic() + self.terminate_delay
+        else:
+            self._cluster(body['cluster_id'])['state'] = 'TERMINATED'
+        return {}
+
+    def _clusters_delete(self, query: Dict, body: Dict) -> Dict:
+        self._cluster(body['cluster_id'])
+        self.clusters.pop(body['cluster_id'])
+        self.permissions.pop(body['cluster_id'], None)
+        return {}
+
+    def _pool(self, pool_id: str) -> Dict:
+        if pool_id not in self.pools:
+            raise ApiError(400, 'INVALID_PARAMETER_VALUE', f'Instance pool {pool_id} does not exist')
+        return self.pools[pool_id]
+
+    def _pools_list(self, query: Dict, body: Dict) -> Dict:
+        return {'instance_pools': list(self.pools.values())} if self.pools else {}
+
+    def _pools_create(self, query: Dict, body: Dict) -> Dict:
+        if any(pool['instance_pool_name'] == body['instance_pool_name'] for pool in self.pools.values()):
+            raise ApiError(400, 'INVALID_PARAMETER_VALUE', f'Instance pool {body["instance_pool_name"]} already exists')
+        pool_id = f'{len(self.pools):04d}-{uuid.uuid4().hex[:6]}-pool'
+        self.pools[pool_id] = {**body, 'instance_pool_id': pool_id, 'state': 'ACTIVE', 'default_tags': {}}
+        self.permissions[pool_id] = {}
+        return {'instance_pool_id': pool_id}
+
+    def _pools_edit(self, query: Dict, body: Dict) -> Dict:
+        pool = self._pool(body['instance_pool_id'])
+        if body['node_type_id'] != pool['node_type_id']:
+            raise ApiError(400, 'INVALID_PARAMETER_VALUE', 'The node type of an instance pool can not change')
+        pool.update(body)
+        return {}
+
+    def _scopes_list(self, query: Dict, body: Dict) -> Dict:
+        return {'scopes': list(self.scopes.values())} if self.scopes else {}
+
+    def _scopes_create(self, query: Dict, body: Dict) -> Dict:
+        self.add_scope(body['scope'], body.get('backend_azure_keyvault', {}).get('dns_name'))
+        return {}
+
+    def _scopes_delete(self, query: Dict, body: Dict) -> Dict:
+        if self.scopes.pop(body['scope'], None) is None:
+            raise ApiError(404, 'RESOURCE_DOES_NOT_EXIST', f'Scope {body["scope"]} does not exist')
+        self.acls.pop(body['scope'], None)
+        self.secrets.pop(body['scope'], None)
+        return {}
+
+    def _scope_acls(self, scope: str) -> Dict[str, str]:
+        if scope not in self.acls:
+            raise ApiError(404, 'RESOURCE_DOES_NOT_EXIST', f'Scope {scope} does not exist')
+        return self.acls[scope]
+
+    def _acls_list(self, query: Dict, body: Dict) -> Dict:
+        items = [{'principal': k, 'permission': v} for k, v in self._scope_acls(query['scope']).items()]
+        return {'items': items} if items else {}
+
+    def _secrets_list(self, query: Dict, body: Dict) -> Dict:
+        self._scope_acls(query['scope'])
+        secrets = self.secrets[query['scope']]
+        return {'secrets': [{'key': k, 'last_updated_timestamp': v} for k, v in secrets.items()]}
+
+    def _acls_put(self, query: Dict, body: Dict) -> Dict:
+        self._scope_acls(body['scope'])[body['principal']] = body['permission']
+        return {}
+
+    def _acls_delete(self, query: Dict, body: Dict) -> Dict:
+        if self._scope_acls(body['scope']).pop(body['principal'], None) is None:
+            raise ApiError(404, 'RESOURCE_DOES_NOT_EXIST', f'Acl for {body["principal"]} does not exist')
+        return {}
+
+    def _permissions(self, method: str, object_type: str, cluster_id: str, body: Dict) -> Dict:
+        with self._lock:
+            if object_type == 'instance-pools':
+                self._pool(cluster_id)
+            else:
+                self._cluster(cluster_id)
+            if method == 'PUT':
+                self.permissions[cluster_id] = {}
+            if method in ('PUT', 'PATCH'):
+                for acl in body.get('access_control_list', []):
+                    self.permissions[cluster_id][acl['group_name']] = acl['permission_level']
+            elif method != 'GET':
+                raise ApiError(405, 'METHOD_NOT_ALLOWED', f'{method} is not supported')
+
+            return {
+                'object_id': f'/{object_type}/{cluster_id}',
+                'object_type': object_type.rstrip('s'),
+                'access_control_list': [
+                    {
+                        'group_name': group,
+                        'all_permissions': [{'permission_level': permission, 'inherited': False}]
+                    }
+                    for group, permission
+                    in self.permissions[cluster_id].items()
+                ]
+            }
+
+
+def _handler(workspace: FakeWorkspace):
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def _handle(self):
+            url = urlparse(self.path)
+            length = int(self.headers.get('Content-Length') or 0)
+            raw_body = self.rfile.read(length) if length else b''
+
+            with workspace._lock:
+                workspace.calls.append((self.command, url.path))
+                workspace.authorizations[url.path] = self.headers.get('Authorization')
+            if workspace.latency:
+                time.sleep(workspace.latency)
+
+            if workspace._throttled():
+                status, response, headers = 429, {'error_code': 'REQUEST_LIMIT_EXCEEDED'}, {'Retry-After': '1'}
+            elif workspace._unavailable():
+                status, response, headers = 503, {'error_code': 'TEMPORARILY_UNAVAILABLE'}, {}
+            elif self.headers.get('Authorization') is None:
+                status, response, headers = 401, {'error_code': 'UNAUTHENTICATED'}, {}
+            else:
+                try:
+                    query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+                    body = json.loads(raw_body) if raw_body else {}
+                    status, response, headers = 200, workspace.handle(self.command, url.path, query, body), {}
+                except ApiError as e:
+                    status, response, headers = e.status, {'error_code': e.error_code, 'message': str(e)}, {}
+
+            payload = json.dumps(response).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            for header, value in headers.items():
+                self.send_header(header, value)
+            self.end_headers()
+            self.wfile.write(payload)
+
+        do_GET = do_POST = do_PUT = do_PATCH = _handle
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
@@ -0,0 +1,82 @@
+import threading
+import time
+import unittest
+
+from dbricks_setup.utils import _aad
+from dbricks_setup.utils._aad import AadTokenProvider, set_token_provider
+from dbricks_setup.utils._cache import set_cache_enabled
+
+from .benchmark import run_command
+from .fake_workspace import FakeWorkspace
+
+
+class StubAcquire:
+    """Hands out numbered tokens valid for a number of seconds, counting the acquisitions"""
+
+    def __init__(self, lifetime: float = 3600.0):
+        self.lifetime = lifetime
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            self.count += 1
+            return f'aad-token-{self.count}', time.time() + self.lifetime
+
+
+class AadTokenProviderTest(unittest.TestCase):
+
+    def test_token_is_cached(self):
+        acquire = StubAcquire()
+        provider = AadTokenProvider(acquire)
+
+        threads = [threading.Thread(target=provider.get_token) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(provider.get_token(), 'aad-token-1')
+        self.assertEqual(acquire.count, 1)
+
+    def test_token_is_refreshed_before_expiry(self):
+        acquire = StubAcquire(lifetime=600.0)
+        provider = AadTokenProvider(acquire, refresh_margin=300.0)
+        self.assertEqual(provider.get_token(), 'aad-token-1')
+
+        provider._expires_on = time.time() + 60.0
+        self.assertEqual(provider.get_token(), 'aad-token-2')
+
+    def test_expiring_token_is_rejected(self):
+        provider = AadTokenProvider(StubAcquire(lifetime=60.0), refresh_margin=300.0)
+
+        with self.assertRaises(EnvironmentError):
+            provider.get_token()
+
+
+class ScopeCreationTest(unittest.TestCase):
+
+    def setUp(self):
+        set_cache_enabled(False)
+        self.workspace = FakeWorkspace().__enter__()
+        self.acquire = StubAcquire()
+        self.previous_provider = _aad._provider
+        set_token_provider(AadTokenProvider(self.acquire))
+
+    def tearDown(self):
+        set_token_provider(self.previous_provider)
+        self.workspace.__exit__(None, None, None)
+        set_cache_enabled(True)
+
+    def test_scopes_are_created_with_the_aad_token(self):
+        for name in ['vault-a', 'vault-b']:
+            run_command(['scope', 'update', '--profile', self.workspace.profile, '--key-vault', name, '--resource-id', 'id'])
+
+        self.assertEqual(sorted(self.workspace.scopes), ['vault-a', 'vault-b'])
+        self.assertEqual(self.workspace.authorizations['/api/2.0/secrets/scopes/create'], 'Bearer aad-token-1')
+        self.assertEqual(self.workspace.authorizations['/api/2.0/secrets/acls/put'], 'Bearer fake-token')
+        self.assertEqual(self.acquire.count, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,186 @@
+import json
+import os
+import time
+import unittest
+from unittest import mock
+
+from dbricks_setup.utils import _backend
+from dbricks_setup.utils._cache import set_cache_enabled
+from dbricks_setup.utils.cluster._config import format_sizing, parse_sizing
+from dbricks_setup.utils.cluster._usage import get_sizing, recommend, summarize_events
+
+from .benchmark import run_command
+from .fake_workspace import FakeWorkspace
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures', 'cluster_events')
+
+# The sizing of the clusters the fixtures were recorded on
+SIZING = {'min_workers': 1, 'max_workers': 2, 'node_type_id': 'Standard_DS3_v2', 'autotermination_minutes': 60}
+
+
+def load_events(name: str):
+    with open(os.path.join(FIXTURES, f'{name}.json')) as f:
+        return json.load(f)['events']
+
+
+class RecommendTest(unittest.TestCase):
+
+    def advise(self, name: str):
+        events = load_events(name)
+        stats = summarize_events(events, max(event['timestamp'] for event in events))
+        return stats, recommend(stats, SIZING)
+
+    def test_starved(self):
+        stats, recommendation = self.advise('starved')
+
+        self.assertEqual(stats['starts'], 10)
+        self.assertEqual(stats['driver_failures'], 3)
+        self.assertEqual(stats['peak_target'], 6)
+        self.assertEqual(recommendation['min_workers'], 2)
+        self.assertEqual(recommendation['max_workers'], 6)
+        self.assertEqual(recommendation['node_type_id'], 'Standard_DS4_v2')
+        self.assertEqual(recommendation['autotermination_minutes'], 60)
+
+    def test_idle(self):
+        stats, recommendation = self.advise('idle')
+
+        self.assertAlmostEqual(stats['running_hours'], 40.0)
+        self.assertEqual(stats['idle_terminations'], 20)
+        self.assertEqual(stats['restart_gap_minutes'], 175)
+        self.assertEqual(recommendation['min_workers'], 1)
+        self.assertEqual(recommendation['max_workers'], 1)
+        self.assertEqual(recommendation['node_type_id'], 'Standard_DS3_v2')
+        self.assertEqual(recommendation['autotermination_minutes'], 30)
+
+    def test_short_restart_gaps_keep_the_cluster_up(self):
+        minute = 60000
+        events = []
+        for start in range(0, 1200 * minute, 200 * minute):
+            events += [
+                {'timestamp': start, 'type': 'STARTING'},
+                {'timestamp': start + minute, 'type': 'RUNNING', 'details': {'current_num_workers': 1}},
+                {'timestamp': start + 190 * minute, 'type': 'TERMINATING', 'details': {'reason': {'code': 'INACTIVITY'}}},
+            ]
+
+        recommendation = recommend(summarize_events(events, 1200 * minute), SIZING)
+
+        self.assertEqual(recommendation['autotermination_minutes'], 70)
+
+    def test_short_history(self):
+        events = load_events('idle')[-2:]
+        recommendation = recommend(summarize_events(events, events[0]['timestamp']), SIZING)
+
+        self.assertEqual({k: recommendation[k] for k in SIZING}, SIZING)
+        self.assertIn('running hours of history', recommendation['reasons'][0])
+
+    def test_fixed_size_cluster(self):
+        sizing = get_sizing({'num_workers': 3, 'node_type_id': 'Standard_DS3_v2'})
+        self.assertEqual(
+            sizing,
+            {'fixed': True, 'min_workers': 3, 'max_workers': 3, 'node_type_id': 'Standard_DS3_v2',
+             'autotermination_minutes': 0}
+        )
+
+        # Running at its size is not starving
+        hour = 3600000
+        events = [
+            {'timestamp': 0, 'type': 'RUNNING', 'details': {'current_num_workers': 3}},
+            {'timestamp': 4 * hour, 'type': 'TERMINATING', 'details': {'reason': {'code': 'USER_REQUEST'}}},
+        ]
+        recommendation = recommend(summarize_events(events, 4 * hour), sizing)
+        self.assertEqual((recommendation['min_workers'], recommendation['max_workers']), (3, 3))
+        self.assertEqual(recommendation['reasons'], [])
+
+        # Asking for more workers is
+        events.insert(1, {'timestamp': hour, 'type': 'RESIZING', 'details': {'target_num_workers': 5}})
+        recommendation = recommend(summarize_events(events, 4 * hour), sizing)
+        self.assertEqual(recommendation['max_workers'], 6)
+
+    def test_pool_cluster_keeps_its_node_type(self):
+        sizing = get_sizing({
+            'autoscale': {'min_workers': 1, 'max_workers': 2},
+            'node_type_id': 'Standard_DS3_v2',
+            'instance_pool_id': 'pool',
+            'autotermination_minutes': 60,
+        })
+        stats, _ = self.advise('starved')
+
+        recommendation = recommend(stats, sizing)
+
+        self.assertIsNone(sizing['node_type_id'])
+        self.assertIsNone(recommendation['node_type_id'])
+        self.assertFalse([reason for reason in recommendation['reasons'] if 'driver' in reason])
+
+    def test_sizing_tag(self):
+        self.assertEqual(parse_sizing(format_sizing(SIZING)), SIZING)
+        self.assertIsNone(parse_sizing(format_sizing({**SIZING, 'node_type_id': None}))['node_type_id'])
+        self.assertIsNone(parse_sizing(None))
+        self.assertIsNone(parse_sizing('1:2'))
+
+
+class AdviseTest(unittest.TestCase):
+
+    def setUp(self):
+        set_cache_enabled(False)
+        self.workspace = FakeWorkspace().__enter__()
+        self.cluster_ids = {name: self.add_recorded_cluster(name) for name in ['starved', 'idle']}
+
+    def tearDown(self):
+        self.workspace.__exit__(None, None, None)
+        set_cache_enabled(True)
+
+    def add_recorded_cluster(self, name: str) -> str:
+        cluster_id = self.workspace.add_cluster(
+            name,
+            state='TERMINATED',
+            spark_version='13.3.x-scala2.12',
+            node_type_id=SIZING['node_type_id'],
+            autotermination_minutes=SIZING['autotermination_minutes'],
+            autoscale={'min_workers': SIZING['min_workers'], 'max_workers': SIZING['max_workers']}
+        )
+
+        # Replay the recorded history, ending an hour ago
+        events = load_events(name)
+        shift = int(time.time() * 1000) - 3600000 - max(event['timestamp'] for event in events)
+        self.workspace.events[cluster_id] = sorted(
+            ({**event, 'cluster_id': cluster_id, 'timestamp': event['timestamp'] + shift} for event in events),
+            key=lambda event: event['timestamp']
+        )
+        return cluster_id
+
+    def test_report(self):
+        with mock.patch.object(_backend, 'EVENTS_PAGE_SIZE', 25):
+            output = run_command(['cluster', 'advise', '--profile', self.workspace.profile])
+
+        self.assertIn('Cluster idle: 40.0 running hours, 20 starts, 20 idle terminations', output)
+        self.assertIn('\tmax_workers: 2 -> 6', output)
+        self.assertIn('\tnode_type_id: Standard_DS3_v2 -> Standard_DS4_v2', output)
+        self.assertIn('\tautotermination_minutes: 60 -> 30', output)
+
+        # Every page of the histories is read, and nothing is changed
+        self.assertEqual(self.workspace.count('/api/2.0/clusters/events'), 6)
+        self.assertEqual(self.workspace.count('/api/2.0/clusters/edit'), 0)
+
+    def test_apply(self):
+        run_command(['cluster', 'advise', '--name', 'idle', '--profile', self.workspace.profile, '--apply', '-q'])
+
+        cluster = self.workspace.clusters[self.cluster_ids['idle']]
+        self.assertEqual(cluster['autoscale'], {'min_workers': 1, 'max_workers': 1})
+        self.assertEqual(cluster['autotermination_minutes'], 30)
+        self.assertEqual(cluster['spark_version'], '13.3.x-scala2.12')
+        self.assertEqual(self.workspace.clusters[self.cluster_ids['starved']]['autoscale']['max_workers'], 2)
+
+        # The sizing is kept by the updates not supplying one, and is part of the fingerprint
+        argv = ['cluster', 'update', '--name', 'idle', '--profile', self.workspace.profile, '--spark-version', '13.3']
+        run_command([*argv, '-e'])
+        cluster = self.workspace.clusters[self.cluster_ids['idle']]
+        self.assertEqual(cluster['autoscale'], {'min_workers': 1, 'max_workers': 1})
+        self.assertEqual(cluster['autotermination_minutes'], 30)
+        self.workspace.reset_calls()
+        run_command([*argv, '-e'])
+        self.assertEqual(self.workspace.count('/api/2.0/clusters/edit'), 0)
+        self.assertEqual(self.workspace.count('/api/2.0/permissions/clusters/' + self.cluster_ids['idle']), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
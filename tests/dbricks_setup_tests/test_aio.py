@@ -0,0 +1,172 @@
+import asyncio
+import gc
+import unittest
+
+from dbricks_setup import aio
+from dbricks_setup.aio._backend import _backends
+from dbricks_setup.utils import _aad
+from dbricks_setup.utils._aad import AadTokenProvider, set_token_provider
+from dbricks_setup.utils._backend import get_backend
+from dbricks_setup.utils._cache import set_cache_enabled
+from dbricks_setup.utils._fingerprint import FINGERPRINT_TAG
+
+from .fake_workspace import FakeWorkspace
+from .test_aad import StubAcquire
+
+
+def run(coroutine):
+    """Run a flow in a fresh event loop, closing the clients it opened"""
+    async def main():
+        try:
+            return await coroutine
+        finally:
+            await aio.close_backends()
+    return asyncio.run(main())
+
+
+class AsyncFlowsTest(unittest.TestCase):
+
+    def setUp(self):
+        set_cache_enabled(False)
+        self.workspace = FakeWorkspace(groups=2).__enter__()
+        self.previous_provider = _aad._provider
+        set_token_provider(AadTokenProvider(StubAcquire()))
+
+    def tearDown(self):
+        set_token_provider(self.previous_provider)
+        self.workspace.__exit__(None, None, None)
+        set_cache_enabled(True)
+
+    def test_update_and_delete_cluster(self):
+        clusters = run(aio.update_cluster('Team-A', self.workspace.profile))
+
+        self.assertEqual([cluster['name'] for cluster in clusters], ['team-a'])
+        cluster_id = clusters[0]['cluster_id']
+        self.assertEqual(self.workspace.clusters[cluster_id]['cluster_name'], 'team-a')
+        self.assertEqual(
+            self.workspace.permissions[cluster_id],
+            {'cluster-team-a-manage': 'CAN_MANAGE', 'cluster-team-a-restart': 'CAN_RESTART',
+             'cluster-team-a-attach': 'CAN_ATTACH_TO'}
+        )
+
+        # A dry run only reports what would be deleted
+        to_delete = run(aio.delete_cluster('team-a', self.workspace.profile, dry_run=True))
+        self.assertEqual(sorted(to_delete), ['clusters', 'groups', 'permissions'])
+        self.assertIn(cluster_id, self.workspace.clusters)
+
+        run(aio.delete_cluster('team-a', self.workspace.profile))
+        self.assertNotIn(cluster_id, self.workspace.clusters)
+        self.assertEqual(sorted(self.workspace.groups), ['group-0', 'group-1'])
+
+    def test_edit_keeps_external_tags_and_acls(self):
+        cluster_id = self.workspace.add_cluster('team-e', state='TERMINATED', custom_tags={'owner': 'data'})
+        self.workspace.permissions[cluster_id] = {'cluster-team-e-manage': 'CAN_MANAGE'}
+        run(aio.update_cluster('team-e', self.workspace.profile, edit=True))
+
+        # The missing acls are added and the tags merged
+        cluster = self.workspace.clusters[cluster_id]
+        self.assertEqual(cluster['custom_tags']['owner'], 'data')
+        self.assertIn(FINGERPRINT_TAG, cluster['custom_tags'])
+        self.assertEqual(len(self.workspace.permissions[cluster_id]), 3)
+        self.assertEqual([m for m, p in self.workspace.calls if p.startswith('/api/2.0/permissions/')], ['GET', 'PATCH'])
+
+        # An unchanged cluster is neither edited nor are its acls written
+        self.workspace.reset_calls()
+        run(aio.update_cluster('team-e', self.workspace.profile, edit=True))
+        self.assertEqual(self.workspace.count('/api/2.0/clusters/edit'), 0)
+        self.assertEqual([m for m, p in self.workspace.calls if p.startswith('/api/2.0/permissions/')], ['GET'])
+
+    def test_update_and_delete_scope(self):
+        changes = run(aio.update_scope('vault', '/subscriptions/fake/vaults/vault', self.workspace.profile))
+
+        self.assertEqual(sorted(change['principal'] for change in changes),
+                         ['scope-vault-manage', 'scope-vault-read', 'scope-vault-write'])
+        self.assertEqual(self.workspace.acls['vault'],
+                         {'scope-vault-read': 'READ', 'scope-vault-write': 'WRITE', 'scope-vault-manage': 'MANAGE'})
+
+        # The acls are only changed once
+        self.assertEqual(run(aio.update_scope('vault', '/subscriptions/fake/vaults/vault', self.workspace.profile)), [])
+
+        run(aio.delete_scope('vault', self.workspace.profile))
+        self.assertNotIn('vault', self.workspace.scopes)
+        self.assertEqual(sorted(self.workspace.groups), ['group-0', 'group-1'])
+
+
+class AsyncBackendTest(unittest.TestCase):
+
+    def setUp(self):
+        self.workspace = FakeWorkspace().__enter__()
+
+    def tearDown(self):
+        self.workspace.__exit__(None, None, None)
+
+    def test_backends_are_kept_per_loop(self):
+        async def get():
+            return aio.get_async_backend(self.workspace.profile)
+
+        # A loop left without closing its backends does not hand them to a later loop
+        first = asyncio.run(get())
+        gc.collect()
+        self.assertFalse(_backends)
+        second = run(get())
+        self.assertIsNot(first, second)
+        self.assertFalse(_backends)
+        asyncio.run(first.aclose())
+
+
+class AsyncClusterWaitTest(unittest.TestCase):
+
+    def setUp(self):
+        set_cache_enabled(False)
+        self.workspace = FakeWorkspace(terminate_delay=0.3).__enter__()
+
+    def tearDown(self):
+        self.workspace.__exit__(None, None, None)
+        set_cache_enabled(True)
+
+    def test_new_cluster_is_not_edited(self):
+        run(aio.update_cluster('team-n', self.workspace.profile, edit=True))
+
+        self.assertEqual(len(self.workspace.clusters), 1)
+        self.assertEqual(self.workspace.count('/api/2.0/clusters/edit'), 0)
+
+    def test_terminating_cluster_is_edited_once_terminated(self):
+        cluster_id = self.workspace.add_cluster('team-w', state='RUNNING')
+        get_backend(self.workspace.profile).terminate_cluster(cluster_id)
+
+        run(aio.update_cluster('team-w', self.workspace.profile, edit=True))
+
+        self.assertEqual(self.workspace.count('/api/2.0/clusters/edit'), 1)
+        self.assertEqual(self.workspace.clusters[cluster_id]['autoscale'], {'min_workers': 1, 'max_workers': 2})
+
+    def test_wait_shares_one_poll(self):
+        backend = get_backend(self.workspace.profile)
+        cluster_ids = [self.workspace.add_cluster(name, state='RUNNING') for name in ['team-x', 'team-y', 'team-z']]
+        for cluster_id in cluster_ids:
+            backend.terminate_cluster(cluster_id)
+        self.workspace.reset_calls()
+
+        # Every round lists the clusters once
+        states = run(aio.wait_for_clusters(cluster_ids[:2], ['TERMINATED'], self.workspace.profile, timeout=5))
+        self.assertEqual(states, {cluster_id: 'TERMINATED' for cluster_id in cluster_ids[:2]})
+        self.assertEqual(self.workspace.count('/api/2.0/clusters/get'), 0)
+        self.assertEqual(self.workspace.count('/api/2.1/clusters/list'), 2)
+
+        # Coroutines waiting concurrently share the polls, a single cluster is polled with a get
+        async def wait_each():
+            return await asyncio.gather(*(
+                aio.wait_for_clusters([cluster_id], ['TERMINATED'], self.workspace.profile, timeout=5)
+                for cluster_id in cluster_ids
+            ))
+        self.workspace.reset_calls()
+        run(wait_each())
+        self.assertLessEqual(self.workspace.count('/api/2.0/clusters/get'), 1)
+        self.assertLessEqual(self.workspace.count('/api/2.1/clusters/list'), 1)
+
+    def test_wait_for_missing_cluster(self):
+        with self.assertRaises(RuntimeError):
+            run(aio.wait_for_clusters(['missing'], ['TERMINATED'], self.workspace.profile, timeout=5))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,361 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from dbricks_setup.apply._manifest import load_manifest
+from dbricks_setup.scope._update import get_access_groups
+from dbricks_setup.utils import _aad
+from dbricks_setup.utils._aad import AadTokenProvider, set_token_provider
+from dbricks_setup.utils._cache import CACHE_DIR_ENV_VAR, set_cache_enabled
+from dbricks_setup.utils._fingerprint import FINGERPRINT_TAG
+from dbricks_setup.utils._timing import enable_timings
+from dbricks_setup.utils.scope._acl import set_acls
+
+from .benchmark import measure, run_command, scenarios
+from .fake_workspace import FakeWorkspace
+from .test_aad import StubAcquire
+
+
+class CommandTestCase(unittest.TestCase):
+
+    def setUp(self):
+        set_cache_enabled(False)
+        self.workspace = FakeWorkspace(clusters=5, groups=20, scopes=3).__enter__()
+        self.profile = ['--profile', self.workspace.profile]
+
+    def tearDown(self):
+        self.workspace.__exit__(None, None, None)
+        set_cache_enabled(True)
+
+
+class ClusterCommandTest(CommandTestCase):
+
+    def test_update_creates_terminated_cluster_with_groups_and_acls(self):
+        run_command(['cluster', 'update', *self.profile, '--name', 'Team-A'])
+
+        clusters = [c for c in self.workspace.clusters.values() if c['cluster_name'] == 'team-a']
+        self.assertEqual(len(clusters), 1)
+        self.assertEqual(clusters[0]['state'], 'TERMINATED')
+        self.assertEqual(clusters[0]['spark_version'], '14.0.x-scala2.12')
+        self.assertEqual(
+            self.workspace.permissions[clusters[0]['cluster_id']],
+            {
+                'cluster-team-a-manage': 'CAN_MANAGE',
+                'cluster-team-a-restart': 'CAN_RESTART',
+                'cluster-team-a-attach': 'CAN_ATTACH_TO',
+            }
+        )
+        self.assertIn('cluster-team-a-attach', self.workspace.groups)
+
+    def test_update_existing_cluster_does_not_create(self):
+        self.workspace.add_cluster('team-b', state='TERMINATED')
+        run_command(['cluster', 'update', *self.profile, '--name', 'team-b'])
+
+        self.assertEqual(self.workspace.count('/api/2.0/clusters/create'), 0)
+        self.assertEqual(self.workspace.count('/api/2.0/clusters/spark-versions'), 0)
+        self.assertEqual(len([c for c in self.workspace.clusters.values() if c['cluster_name'] == 'team-b']), 1)
+
+    def test_update_debug_prints_plan(self):
+        output = run_command(['cluster', 'update', *self.profile, '--name', 'team-p', '-d'])
+
+        self.assertIn('create_cluster', output)
+        self.assertIn('set_cluster_acls', output)
+        self.assertEqual(self.workspace.count('/api/2.0/clusters/create'), 0)
+        self.assertEqual(self.workspace.count('/api/2.0/preview/scim/v2/Bulk'), 0)
+
+    def test_cluster_names_with_spaces(self):
+        run_command(['cluster', 'delete', *self.profile, '-a', '-q', '--name', 'Cluster 3'])
+
+        self.assertNotIn('cluster 3', [c['cluster_name'] for c in self.workspace.clusters.values()])
+        self.assertEqual(len(self.workspace.clusters), 4)
+
+    def test_delete_removes_cluster_groups_and_acls(self):
+        run_command(['cluster', 'update', *self.profile, '--name', 'team-c'])
+        run_command(['cluster', 'delete', *self.profile, '-a', '-q', '--name', 'team-c'])
+
+        self.assertNotIn('team-c', [c['cluster_name'] for c in self.workspace.clusters.values()])
+        self.assertFalse([g for g in self.workspace.groups if g.startswith('cluster-team-c-')])
+
+    def test_delete_debug_does_not_delete(self):
+        self.workspace.add_cluster('team-d', state='TERMINATED')
+        run_command(['cluster', 'delete', *self.profile, '-a', '-d', '--name', 'team-d'])
+
+        self.assertIn('team-d', [c['cluster_name'] for c in self.workspace.clusters.values()])
+
+    def test_update_several_names(self):
+        run_command(['cluster', 'update', *self.profile, '--name', 'team-e', '--name', 'team-f'])
+
+        names = [c['cluster_name'] for c in self.workspace.clusters.values()]
+        self.assertIn('team-e', names)
+        self.assertIn('team-f', names)
+        self.assertEqual(self.workspace.count('/api/2.1/clusters/list'), 1)
+
+    def test_delete_pattern(self):
+        for name in ['team-g1', 'team-g2', 'other-g3']:
+            run_command(['cluster', 'update', *self.profile, '--name', name])
+        run_command(['cluster', 'delete', *self.profile, '-a', '-q', '--name', 'TEAM-G*'])
+
+        names = [c['cluster_name'] for c in self.workspace.clusters.values()]
+        self.assertNotIn('team-g1', names)
+        self.assertNotIn('team-g2', names)
+        self.assertIn('other-g3', names)
+        self.assertFalse([g for g in self.workspace.groups if g.startswith('cluster-team-g')])
+        self.assertEqual(len([g for g in self.workspace.groups if g.startswith('cluster-other-g3-')]), 3)
+
+    def permission_writes(self):
+        return [
+            method
+            for method, path
+            in self.workspace.calls
+            if path.startswith('/api/2.0/permissions/') and method != 'GET'
+        ]
+
+    def test_update_unchanged_cluster_does_not_write(self):
+        run_command(['cluster', 'update', *self.profile, '--name', 'team-h'])
+        self.workspace.reset_calls()
+        output = run_command(['cluster', 'update', *self.profile, '--name', 'team-h', '-e', '-d', '--verify'])
+        run_command(['cluster', 'update', *self.profile, '--name', 'team-h', '-e', '--verify'])
+
+        self.assertIn('Nothing to do', output)
+        self.assertEqual(self.permission_writes(), [])
+        self.assertEqual(self.workspace.count('/api/2.0/clusters/edit'), 0)
+
+    def test_update_skips_clusters_matching_their_fingerprint(self):
+        run_command(['cluster', 'update', *self.profile, '--name', 'team-k'])
+        self.workspace.reset_calls()
+        run_command(['cluster', 'update', *self.profile, '--name', 'team-k', '-e'])
+
+        # Only the clusters are listed, the spark versions are cached for the process
+        self.assertEqual(self.workspace.count(), 1)
+        self.assertEqual(self.workspace.count('/api/2.1/clusters/list'), 1)
+
+    def test_update_tags_cluster_after_its_acls(self):
+        with mock.patch('dbricks_setup.cluster._update.set_acls', side_effect=RuntimeError('acls failed')):
+            with self.assertRaises(RuntimeError):
+                run_command(['cluster', 'update', *self.profile, '--name', 'team-m'])
+        cluster_id = next(c['cluster_id'] for c in self.workspace.clusters.values() if c['cluster_name'] == 'team-m')
+        self.assertNotIn(FINGERPRINT_TAG, self.workspace.clusters[cluster_id].get('custom_tags', {}))
+
+        # The untagged cluster is compared in full, repairing its acls and tagging it
+        run_command(['cluster', 'update', *self.profile, '--name', 'team-m', '-e'])
+        self.assertEqual(len(self.workspace.permissions[cluster_id]), 3)
+        self.assertIn(FINGERPRINT_TAG, self.workspace.clusters[cluster_id]['custom_tags'])
+
+    def test_update_tags_cluster_on_edit(self):
+        cluster_id = self.workspace.add_cluster('team-l', state='TERMINATED', custom_tags={'owner': 'data'})
+        run_command(['cluster', 'update', *self.profile, '--name', 'team-l', '-e'])
+        self.workspace.reset_calls()
+        run_command(['cluster', 'update', *self.profile, '--name', 'team-l', '-e'])
+
+        self.assertEqual(self.workspace.clusters[cluster_id]['custom_tags']['owner'], 'data')
+        self.assertIn(FINGERPRINT_TAG, self.workspace.clusters[cluster_id]['custom_tags'])
+        self.assertEqual(self.workspace.count(), 1)
+
+    def test_update_adds_missing_acls_with_patch(self):
+        cluster_id = self.workspace.add_cluster('team-i', state='TERMINATED')
+        self.workspace.permissions[cluster_id] = {'cluster-team-i-manage': 'CAN_MANAGE'}
+        run_command(['cluster', 'update', *self.profile, '--name', 'team-i'])
+
+        self.assertEqual(self.permission_writes(), ['PATCH'])
+        self.assertEqual(len(self.workspace.permissions[cluster_id]), 3)
+
+    def test_update_replaces_changed_acls(self):
+        cluster_id = self.workspace.add_cluster('team-j', state='TERMINATED')
+        self.workspace.permissions[cluster_id] = {'cluster-team-j-manage': 'CAN_RESTART', 'someone': 'CAN_MANAGE'}
+        run_command(['cluster', 'update', *self.profile, '--name', 'team-j', '-e'])
+
+        self.assertEqual(self.permission_writes(), ['PUT'])
+        self.assertNotIn('someone', self.workspace.permissions[cluster_id])
+        self.assertEqual(self.workspace.count('/api/2.0/clusters/edit'), 1)
+
+
+class ScopeCommandTest(CommandTestCase):
+
+    def test_update_skips_scope_matching_its_fingerprint(self):
+        self.workspace.add_scope('vault')
+        argv = ['scope', 'update', *self.profile, '--key-vault', 'vault', '--resource-id', 'id']
+        with tempfile.TemporaryDirectory() as cache_dir, mock.patch.dict(os.environ, {CACHE_DIR_ENV_VAR: cache_dir}):
+            set_cache_enabled(True)
+            run_command(argv)
+            self.workspace.acls['vault']['stale'] = 'READ'
+            self.workspace.reset_calls()
+            run_command(argv)
+
+            # Only the scopes are listed, and they are cached
+            self.assertEqual(self.workspace.count('/api/2.0/secrets/acls'), 0)
+            self.assertIn('stale', self.workspace.acls['vault'])
+
+            run_command([*argv, '--verify'])
+            self.assertNotIn('stale', self.workspace.acls['vault'])
+
+    def test_update_sets_groups_and_acls(self):
+        self.workspace.add_scope('vault')
+        self.workspace.acls['vault']['stale'] = 'READ'
+        run_command(['scope', 'update', *self.profile, '--key-vault', 'vault', '--resource-id', 'id'])
+
+        self.assertEqual(
+            self.workspace.acls['vault'],
+            {'scope-vault-read': 'READ', 'scope-vault-write': 'WRITE', 'scope-vault-manage': 'MANAGE'}
+        )
+        self.assert_granted_before_revoked()
+
+    def test_set_acls_grants_before_revoking(self):
+        self.workspace.add_scope('vault')
+        self.workspace.acls['vault'].update({'stale': 'MANAGE', 'other': 'READ'})
+        set_acls(dict(self.workspace.acls['vault']), get_access_groups('vault'), 'vault', self.workspace.profile)
+
+        self.assertEqual(self.workspace.acls['vault'], get_access_groups('vault'))
+        self.assert_granted_before_revoked()
+
+    def assert_granted_before_revoked(self):
+        paths = [path for _, path in self.workspace.calls if path.split('/')[-1] in ('put', 'delete')]
+        self.assertIn('/api/2.0/secrets/acls/delete', paths)
+        self.assertNotIn('/api/2.0/secrets/acls/put', paths[paths.index('/api/2.0/secrets/acls/delete'):])
+
+    def test_update_overwrites_changed_acl_in_one_call(self):
+        self.workspace.add_scope('vault')
+        self.workspace.acls['vault'].update(
+            {'scope-vault-read': 'MANAGE', 'scope-vault-write': 'WRITE', 'scope-vault-manage': 'MANAGE'}
+        )
+        for group in self.workspace.acls['vault']:
+            self.workspace.add_group(group)
+        run_command(['scope', 'update', *self.profile, '--key-vault', 'vault', '--resource-id', 'id'])
+
+        self.assertEqual(self.workspace.acls['vault']['scope-vault-read'], 'READ')
+        self.assertEqual(self.workspace.count('/api/2.0/secrets/acls/put'), 1)
+        self.assertEqual(self.workspace.count('/api/2.0/secrets/acls/delete'), 0)
+
+    def test_delete_removes_scope_groups_and_acls(self):
+        self.workspace.add_scope('vault')
+        run_command(['scope', 'update', *self.profile, '--key-vault', 'vault', '--resource-id', 'id'])
+        run_command(['scope', 'delete', *self.profile, '-a', '-q', '--scope-name', 'vault'])
+
+        self.assertNotIn('vault', self.workspace.scopes)
+        self.assertFalse([g for g in self.workspace.groups if g.startswith('scope-vault-')])
+
+    def test_delete_regex(self):
+        for name in ['vault-1', 'vault-2', 'vault-x']:
+            self.workspace.add_scope(name)
+            self.workspace.acls[name]['someone'] = 'READ'
+        run_command(['scope', 'delete', *self.profile, '-a', '-q', '--scope-name', r're:vault-\d'])
+
+        self.assertEqual(sorted(self.workspace.scopes), ['scope-0', 'scope-1', 'scope-2', 'vault-x'])
+
+
+class ApplyCommandTest(CommandTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.previous_provider = _aad._provider
+        set_token_provider(AadTokenProvider(StubAcquire()))
+
+    def tearDown(self):
+        set_token_provider(self.previous_provider)
+        super().tearDown()
+
+    def write_manifest(self, content: str) -> str:
+        fd, path = tempfile.mkstemp(suffix='.yaml')
+        with os.fdopen(fd, 'w') as f:
+            f.write(content)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def test_apply_clusters_and_scopes(self):
+        # The profile of the manifest is overridden, and the last entry of a name wins
+        path = self.write_manifest(
+            'profile: missing\n'
+            'clusters:\n'
+            '  - name: Team-X\n'
+            '    run: true\n'
+            '  - name: team-x\n'
+            'scopes:\n'
+            '  - key_vault: vault\n'
+            '    resource_id: /subscriptions/fake/vaults/vault\n'
+        )
+        run_command(['apply', '-f', path, *self.profile])
+
+        clusters = [c for c in self.workspace.clusters.values() if c['cluster_name'] == 'team-x']
+        self.assertEqual(len(clusters), 1)
+        self.assertEqual(clusters[0]['state'], 'TERMINATED')
+        self.assertEqual(len(self.workspace.permissions[clusters[0]['cluster_id']]), 3)
+        self.assertEqual(self.workspace.acls['vault'], get_access_groups('vault'))
+
+    def test_apply_reports_every_failure(self):
+        path = self.write_manifest(
+            'clusters:\n'
+            '  - name: team-y\n'
+            'scopes:\n'
+            '  - key_vault: vault-1\n'
+            '    resource_id: /subscriptions/fake/vaults/vault-1\n'
+            '  - key_vault: vault-2\n'
+            '    resource_id: /subscriptions/fake/vaults/vault-2\n'
+        )
+        with mock.patch('dbricks_setup.apply._apply.update_scope', side_effect=RuntimeError('scope failed')):
+            with self.assertRaisesRegex(RuntimeError, r"2 of 3 resources .*'scope vault-1', 'scope vault-2'"):
+                run_command(['apply', '-f', path, *self.profile])
+
+        # The other resources are still reconciled
+        self.assertIn('team-y', [c['cluster_name'] for c in self.workspace.clusters.values()])
+
+    def test_bad_manifest(self):
+        for content in [
+            'clusters:\n  - run: true\n',
+            'clusters:\n  - name: team-z\n    spark_variant: gpu\n',
+            'scopes:\n  - key_vault: vault\n',
+        ]:
+            with self.subTest(content=content), self.assertRaises(ValueError):
+                load_manifest(self.write_manifest(content))
+
+        # Nothing is reconciled from a bad manifest
+        path = self.write_manifest('clusters:\n  - name: team-z\n    spark_variant: gpu\n')
+        self.workspace.reset_calls()
+        with self.assertRaisesRegex(ValueError, 'spark variant gpu'):
+            run_command(['apply', '-f', path, *self.profile])
+        self.assertEqual(self.workspace.count(), 0)
+
+
+class CommandBudgetTest(CommandTestCase):
+    """Guards the number of process spawns and http calls of every command"""
+
+    def test_budgets(self):
+        budgets = {
+            # A new cluster is tagged with its fingerprint by an edit once terminated and its acls are written
+            ('cluster', 'update'): 9,
+            ('cluster', 'delete'): 5,
+            ('scope', 'update'): 8,
+            ('scope', 'delete'): 5,
+        }
+        for argv in scenarios(self.workspace):
+            result = measure(self.workspace, argv)
+            with self.subTest(command=result['command']):
+                self.assertEqual(result['spawns'], 0)
+                self.assertLessEqual(result['http_calls'], budgets[(argv[2], argv[3])], result['calls'])
+
+
+class TimingsTest(CommandTestCase):
+
+    def tearDown(self):
+        enable_timings(False)
+        super().tearDown()
+
+    def test_timings_report(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'timings.json')
+            run_command(['--timings', path, 'cluster', 'update', *self.profile, '--name', 'team-t'])
+            with open(path) as f:
+                report = json.load(f)
+
+        self.assertIn('create_cluster', report['operations'])
+        self.assertEqual(report['spans'][0]['operation'], 'extract_clusters')
+        self.assertEqual(
+            sum(s['calls'] for s in report['spans']),
+            len(self.workspace.calls)
+        )
+        self.assertTrue(report['critical_path'])
+        self.assertLessEqual(report['critical_path_seconds'], report['wall_seconds'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+from argparse import Namespace
+
+from dbricks_setup.utils._cache import set_cache_enabled
+from dbricks_setup.utils._fanout import TaggedStream, _workspace, format_summary, run_for_profiles
+from dbricks_setup.utils._profile import list_profiles
+
+from .benchmark import run_command
+from .fake_workspace import FakeWorkspace
+
+
+class FanOutTest(unittest.TestCase):
+
+    def setUp(self):
+        set_cache_enabled(False)
+        self.workspaces = [FakeWorkspace(clusters=2).__enter__() for _ in range(3)]
+
+        # A single config file holding the profile of every workspace, plus the AAD profile
+        fd, self.config_file = tempfile.mkstemp(suffix='.databrickscfg')
+        with os.fdopen(fd, 'w') as f:
+            for workspace in self.workspaces:
+                f.write(f'[{workspace.profile}]\nhost = {workspace.host}\ntoken = fake-token\n')
+            f.write(f'[AAD]\nhost = {self.workspaces[0].host}\ntoken = fake-token\n')
+        self.previous_config_file = os.environ['DATABRICKS_CONFIG_FILE']
+        os.environ['DATABRICKS_CONFIG_FILE'] = self.config_file
+
+    def tearDown(self):
+        os.environ['DATABRICKS_CONFIG_FILE'] = self.previous_config_file
+        os.remove(self.config_file)
+        for workspace in reversed(self.workspaces):
+            workspace.__exit__(None, None, None)
+        set_cache_enabled(True)
+
+    def test_list_profiles(self):
+        self.assertEqual(list_profiles(), [workspace.profile for workspace in self.workspaces])
+
+    def test_update_every_profile(self):
+        output = run_command(['--all-profiles', 'cluster', 'update', '--name', 'team-a'])
+
+        for workspace in self.workspaces:
+            self.assertEqual(len([c for c in workspace.clusters.values() if c['cluster_name'] == 'team-a']), 1)
+            self.assertIn(f'{workspace.profile} ', output)
+        self.assertIn('3 of 3 workspaces succeeded', output)
+
+    def test_debug_output_is_tagged(self):
+        profiles = [workspace.profile for workspace in self.workspaces[:2]]
+        output = run_command(['--profiles', ','.join(profiles), 'cluster', 'update', '--name', 'team-b', '-d'])
+
+        for profile in profiles:
+            self.assertIn(f'[{profile}] Plan of', output)
+        self.assertFalse([c for w in self.workspaces for c in w.clusters.values() if c['cluster_name'] == 'team-b'])
+
+    def test_failures_are_summarized(self):
+        profiles = [self.workspaces[0].profile, 'missing']
+
+        def command(args: Namespace):
+            if args.profile == 'missing':
+                raise EnvironmentError('not configured')
+
+        results = run_for_profiles(command, Namespace(profile=None), profiles)
+
+        self.assertEqual([result['status'] for result in results], ['ok', 'failed'])
+        self.assertIn('OSError: not configured', results[1]['error'])
+        self.assertIn('1 of 2 workspaces succeeded', format_summary(results))
+
+    def test_delete_requires_quiet_or_debug(self):
+        with self.assertRaises(SystemExit):
+            run_command(['--all-profiles', 'cluster', 'delete', '-a', '--name', 'cluster 0'])
+
+        run_command(['--all-profiles', 'cluster', 'delete', '-a', '-q', '--name', 'cluster 0'])
+        for workspace in self.workspaces:
+            self.assertNotIn('cluster 0', [c['cluster_name'] for c in workspace.clusters.values()])
+
+    def test_export_requires_a_file_per_profile(self):
+        for output in ['-', 'inventory.ndjson']:
+            with self.subTest(output=output), self.assertRaises(SystemExit):
+                run_command(['--all-profiles', 'inventory', 'export', '-o', output])
+
+        with tempfile.TemporaryDirectory() as directory:
+            run_command(['--all-profiles', 'inventory', 'export', '--include', 'clusters',
+                         '-o', os.path.join(directory, '{profile}.ndjson')])
+            for workspace in self.workspaces:
+                with open(os.path.join(directory, f'{workspace.profile}.ndjson')) as f:
+                    self.assertEqual([json.loads(line)['type'] for line in f], ['cluster', 'cluster'])
+
+
+class TaggedStreamTest(unittest.TestCase):
+
+    def test_lines_are_tagged(self):
+        output = io.StringIO()
+        stream = TaggedStream(output)
+
+        stream.write('untagged\n')
+        token = _workspace.set('dev')
+        try:
+            stream.write('first ')
+            stream.write('line\nsecond line\npartial')
+            stream.flush()
+        finally:
+            _workspace.reset(token)
+
+        self.assertEqual(output.getvalue(), 'untagged\n[dev] first line\n[dev] second line\n[dev] partial')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+
+from dbricks_setup.gc import find_orphaned_groups
+from dbricks_setup.utils._cache import set_cache_enabled
+
+from .benchmark import run_command
+from .fake_workspace import FakeWorkspace
+
+
+class FindOrphanedGroupsTest(unittest.TestCase):
+
+    def test_orphans(self):
+        groups = [
+            'cluster-Live-manage', 'cluster-gone-manage', 'cluster-gone-attach', 'cluster-a-b-restart',
+            'scope-live-read', 'scope-Live-read', 'scope-gone-write', 'unrelated', 'cluster-x-other',
+        ]
+
+        orphans = find_orphaned_groups(groups, ['live', 'a-b'], ['live'])
+
+        self.assertEqual(orphans['clusters'], {'gone': ['cluster-gone-manage', 'cluster-gone-attach']})
+        self.assertEqual(orphans['scopes'], {'Live': ['scope-Live-read'], 'gone': ['scope-gone-write']})
+
+    def test_selected_kinds(self):
+        orphans = find_orphaned_groups(['cluster-gone-manage', 'scope-gone-read'], [], [], kinds=['scopes'])
+
+        self.assertEqual(orphans, {'scopes': {'gone': ['scope-gone-read']}})
+
+
+class GcTest(unittest.TestCase):
+
+    def setUp(self):
+        set_cache_enabled(False)
+        self.workspace = FakeWorkspace(groups=2, scopes=1, bulk_max_operations=10).__enter__()
+        self.workspace.add_cluster('live')
+        for access in ['manage', 'restart', 'attach']:
+            self.workspace.add_group(f'cluster-live-{access}')
+            self.workspace.add_group(f'cluster-gone-{access}')
+        for access in ['read', 'write', 'manage']:
+            self.workspace.add_group(f'scope-scope-0-{access}')
+        for i in range(25):
+            self.workspace.add_group(f'scope-old-{i}-read')
+
+    def tearDown(self):
+        self.workspace.__exit__(None, None, None)
+        set_cache_enabled(True)
+
+    def test_dry_run(self):
+        output = run_command(['gc', '--profile', self.workspace.profile, '-d'])
+
+        self.assertIn('The following 28 orphaned access groups will be deleted', output)
+        self.assertIn('Cluster gone:\n\tcluster-gone-attach', output)
+        self.assertEqual(len(self.workspace.groups), 2 + 6 + 3 + 25)
+
+    def test_delete_orphans(self):
+        run_command(['gc', '--profile', self.workspace.profile, '-q', '--workers', '2', '--batch-size', '10'])
+
+        self.assertEqual(
+            sorted(self.workspace.groups),
+            ['cluster-live-attach', 'cluster-live-manage', 'cluster-live-restart', 'group-0', 'group-1',
+             'scope-scope-0-manage', 'scope-scope-0-read', 'scope-scope-0-write']
+        )
+        self.assertEqual(self.workspace.count('/api/2.0/preview/scim/v2/Bulk'), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+import json
+import time
+import unittest
+
+from dbricks_setup.utils._cache import set_cache_enabled
+from dbricks_setup.utils._governor import Governor, count_retries, governor_report
+from dbricks_setup.utils._timing import enable_timings, span
+
+from .benchmark import run_command
+from .fake_workspace import FakeWorkspace
+
+
+class StubResponse:
+
+    def __init__(self, status_code: int, headers: dict = None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+class StubError(Exception):
+    """Error of a workspace call answered with a status code"""
+
+    def __init__(self, status_code: int, headers: dict = None):
+        super().__init__(f'{status_code}')
+        self.response = StubResponse(status_code, headers)
+
+
+class FailingCall:
+    """Fails with the supplied errors before succeeding, counting the attempts"""
+
+    def __init__(self, *errors: Exception):
+        self.errors = list(errors)
+        self.attempts = 0
+
+    def __call__(self):
+        self.attempts += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return 'done'
+
+
+class GovernorTest(unittest.TestCase):
+
+    def test_transient_failures_are_retried(self):
+        governor = Governor(base_delay=0.01)
+        call = FailingCall(StubError(429), StubError(503), StubError(502))
+
+        with count_retries() as counter:
+            self.assertEqual(governor.call(call), 'done')
+
+        self.assertEqual(call.attempts, 4)
+        self.assertEqual(counter['retries'], 3)
+        self.assertEqual(governor.stats()['retries'], 3)
+        self.assertEqual(governor.stats()['throttled'], 1)
+
+    def test_non_idempotent_calls_are_only_retried_when_rejected(self):
+        governor = Governor(base_delay=0.01)
+
+        self.assertEqual(governor.call(FailingCall(StubError(429)), idempotent=False), 'done')
+        with self.assertRaises(StubError):
+            governor.call(FailingCall(StubError(504)), idempotent=False)
+        with self.assertRaises(StubError):
+            governor.call(FailingCall(StubError(400)))
+
+        self.assertEqual(governor.stats()['failures'], 2)
+
+    def test_retries_are_limited(self):
+        governor = Governor(base_delay=0.01, max_retries=2)
+        call = FailingCall(*[StubError(503) for _ in range(3)])
+
+        with self.assertRaises(StubError):
+            governor.call(call)
+        self.assertEqual(call.attempts, 3)
+
+    def test_escaping_throttle_is_counted_once(self):
+        governor = Governor(base_delay=0.01, max_retries=2)
+        enable_timings()
+        try:
+            with self.assertRaises(StubError), span('throttled') as record:
+                governor.call(FailingCall(*[StubError(429) for _ in range(3)]))
+        finally:
+            enable_timings(False)
+
+        self.assertEqual(record['retries'], 2)
+        self.assertEqual(governor.stats()['retries'], 2)
+
+    def test_retry_after_pauses_every_caller(self):
+        governor = Governor(base_delay=0.01)
+        governor.call(FailingCall(StubError(429, {'Retry-After': '0.3'})))
+
+        start = time.perf_counter()
+        governor.call(FailingCall())
+        self.assertLess(time.perf_counter() - start, 0.1)
+
+        governor._paused_until = time.monotonic() + 0.2
+        start = time.perf_counter()
+        governor.call(FailingCall())
+        self.assertGreaterEqual(time.perf_counter() - start, 0.15)
+
+    def test_token_bucket(self):
+        governor = Governor(rate=20, burst=2)
+
+        start = time.perf_counter()
+        for _ in range(6):
+            governor.call(FailingCall())
+
+        # Two calls of the burst, then one every 50ms
+        self.assertGreaterEqual(time.perf_counter() - start, 0.18)
+        self.assertEqual(governor.stats()['calls'], 6)
+
+
+class WorkspaceRetryTest(unittest.TestCase):
+
+    def setUp(self):
+        set_cache_enabled(False)
+        self.workspace = FakeWorkspace().__enter__()
+
+    def tearDown(self):
+        self.workspace.__exit__(None, None, None)
+        set_cache_enabled(True)
+
+    def test_unavailable_workspace_is_retried(self):
+        self.workspace.unavailable = 2
+        output = run_command(['--timings', '-', 'cluster', 'update', '--profile', self.workspace.profile, '--name', 'a'])
+
+        self.assertEqual(len(self.workspace.clusters), 1)
+        report = json.loads(output[output.index('{'):])
+        self.assertEqual(report['workspaces'][self.workspace.host]['retries'], 2)
+        self.assertEqual(governor_report()[self.workspace.host]['failures'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
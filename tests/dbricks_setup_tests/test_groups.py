@@ -0,0 +1,91 @@
+import unittest
+
+from dbricks_setup.utils._cache import set_cache_enabled
+from dbricks_setup.utils._groups import GroupIndex, create_groups, delete_groups, find_groups
+
+from .fake_workspace import FakeWorkspace
+
+
+class GroupTestCase(unittest.TestCase):
+    bulk_max_operations = 100
+
+    def setUp(self):
+        set_cache_enabled(False)
+        self.workspace = FakeWorkspace(bulk_max_operations=self.bulk_max_operations, page_size=10).__enter__()
+        self.profile = self.workspace.profile
+
+    def tearDown(self):
+        self.workspace.__exit__(None, None, None)
+        set_cache_enabled(True)
+
+
+class BulkGroupTest(GroupTestCase):
+
+    def test_create_in_chunks(self):
+        groups = [f'team-{i}' for i in range(250)]
+        create_groups(groups, self.profile)
+
+        self.assertEqual(sorted(self.workspace.groups), sorted(groups))
+        self.assertEqual(self.workspace.count('/api/2.0/preview/scim/v2/Bulk'), 3)
+        self.assertEqual(self.workspace.count('/api/2.0/groups/create'), 0)
+
+    def test_create_ignores_existing_groups(self):
+        self.workspace.add_group('team-1')
+        create_groups(['team-0', 'team-1', 'team-2'], self.profile)
+
+        self.assertEqual(sorted(self.workspace.groups), ['team-0', 'team-1', 'team-2'])
+
+    def test_delete_in_bulk(self):
+        for i in range(5):
+            self.workspace.add_group(f'team-{i}')
+        delete_groups(['team-0', 'team-1', 'team-"quoted"', 'team-3'], self.profile)
+
+        self.assertEqual(sorted(self.workspace.groups), ['team-2', 'team-4'])
+        self.assertEqual(self.workspace.count('/api/2.0/preview/scim/v2/Bulk'), 1)
+        self.assertEqual(self.workspace.count('/api/2.0/groups/delete'), 0)
+
+    def test_reports_failed_operations(self):
+        with self.assertRaises(RuntimeError) as context:
+            create_groups(['team-0', '', 'team-2'], self.profile)
+
+        self.assertIn("['']", str(context.exception))
+        self.assertEqual(sorted(self.workspace.groups), ['team-0', 'team-2'])
+
+
+class FallbackGroupTest(GroupTestCase):
+    bulk_max_operations = 0
+
+    def test_create_and_delete_one_at_a_time(self):
+        create_groups(['team-0', 'team-1', 'team-2'], self.profile)
+        delete_groups(['team-0', 'team-1'], self.profile)
+
+        self.assertEqual(list(self.workspace.groups), ['team-2'])
+        self.assertEqual(self.workspace.count('/api/2.0/groups/create'), 3)
+        self.assertEqual(self.workspace.count('/api/2.0/groups/delete'), 2)
+
+
+class GroupLookupTest(GroupTestCase):
+
+    def test_index(self):
+        groups = GroupIndex(['cluster-b-manage', 'cluster-a-manage', 'scope-a-read', 'cluster-a-attach'])
+
+        self.assertIn('scope-a-read', groups)
+        self.assertNotIn('scope-a', groups)
+        self.assertEqual(groups.with_prefix('cluster-a-'), ['cluster-a-attach', 'cluster-a-manage'])
+        self.assertEqual(groups.with_prefix('cluster-c-'), [])
+
+    def test_find_filters_on_the_server(self):
+        for i in range(100):
+            self.workspace.add_group(f'group-{i}')
+        for i in range(25):
+            self.workspace.add_group(f'cluster-team-{i}')
+
+        groups = find_groups('cluster-team-', self.profile)
+
+        self.assertEqual(len(groups), 25)
+        self.assertEqual(self.workspace.count('/api/2.0/groups/list'), 0)
+        self.assertEqual(self.workspace.count('/api/2.0/preview/scim/v2/Groups'), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+
+from dbricks_setup.utils._cache import set_cache_enabled
+
+from .benchmark import run_command
+from .fake_workspace import FakeWorkspace
+
+
+class InstancePoolTest(unittest.TestCase):
+
+    def setUp(self):
+        set_cache_enabled(False)
+        self.workspace = FakeWorkspace().__enter__()
+
+    def tearDown(self):
+        self.workspace.__exit__(None, None, None)
+        set_cache_enabled(True)
+
+    def update(self, *args: str) -> str:
+        return run_command(['cluster', 'update', '--name', 'a', '--profile', self.workspace.profile, '--pool', 'p', *args])
+
+    def pool(self) -> dict:
+        return next(iter(self.workspace.pools.values()))
+
+    def test_create_pool_and_cluster(self):
+        self.update('--pool-min-idle', '2')
+
+        pool = self.pool()
+        self.assertEqual(pool['instance_pool_name'], 'p')
+        self.assertEqual(pool['min_idle_instances'], 2)
+        self.assertEqual(
+            self.workspace.permissions[pool['instance_pool_id']],
+            {'pool-p-manage': 'CAN_MANAGE', 'pool-p-attach': 'CAN_ATTACH_TO'}
+        )
+        self.assertIn('pool-p-attach', self.workspace.groups)
+
+        cluster = next(iter(self.workspace.clusters.values()))
+        self.assertEqual(cluster['instance_pool_id'], pool['instance_pool_id'])
+        self.assertEqual(cluster['driver_instance_pool_id'], pool['instance_pool_id'])
+        self.assertNotIn('node_type_id', cluster)
+
+    def test_update_pool(self):
+        self.update()
+        pool_id = self.pool()['instance_pool_id']
+
+        # Only the capacity is edited, the acls are left alone
+        calls = len(self.workspace.calls)
+        self.update('--pool-max-capacity', '20')
+        self.assertEqual(self.pool()['max_capacity'], 20)
+        self.assertEqual(list(self.workspace.pools), [pool_id])
+        paths = [path for _, path in self.workspace.calls[calls:]]
+        self.assertEqual(paths.count('/api/2.0/instance-pools/edit'), 1)
+        self.assertNotIn('/api/2.0/instance-pools/create', paths)
+        self.assertFalse([path for method, path in self.workspace.calls[calls:] if 'instance-pools/' in path and method in ('PUT', 'PATCH')])
+
+    def test_debug(self):
+        output = self.update('-d')
+
+        self.assertIn('create_pool', output)
+        self.assertFalse(self.workspace.pools)
+        self.assertFalse(self.workspace.clusters)
+
+
+if __name__ == '__main__':
+    unittest.main()
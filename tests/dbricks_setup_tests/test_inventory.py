@@ -0,0 +1,85 @@
+import json
+import os
+import tempfile
+import unittest
+
+from dbricks_setup.utils._cache import set_cache_enabled
+from dbricks_setup.utils._pool import bounded_map
+
+from .benchmark import run_command
+from .fake_workspace import FakeWorkspace
+
+
+class InventoryExportTest(unittest.TestCase):
+
+    def setUp(self):
+        set_cache_enabled(False)
+        self.workspace = FakeWorkspace(clusters=250, groups=3, scopes=2, page_size=100).__enter__()
+        self.workspace.add_secret('scope-0', 'password')
+        self.workspace.acls['scope-0']['group-0'] = 'READ'
+        self.workspace.add_member('group-1', 'someone@example.com')
+        run_command(['cluster', 'update', '--profile', self.workspace.profile, '--name', 'cluster 0'])
+
+        fd, self.path = tempfile.mkstemp(suffix='.ndjson')
+        os.close(fd)
+
+    def tearDown(self):
+        os.remove(self.path)
+        self.workspace.__exit__(None, None, None)
+        set_cache_enabled(True)
+
+    def read_records(self):
+        with open(self.path) as f:
+            return [json.loads(line) for line in f]
+
+    def test_export_every_resource(self):
+        run_command(['inventory', 'export', '--profile', self.workspace.profile, '-o', self.path, '--workers', '4'])
+        records = self.read_records()
+
+        clusters = [record for record in records if record['type'] == 'cluster']
+        self.assertEqual(len(clusters), 250)
+        self.assertEqual([cluster['name'] for cluster in clusters[:2]], ['cluster 0', 'cluster 1'])
+        self.assertEqual(
+            clusters[0]['acls'],
+            {'cluster-cluster 0-manage': 'CAN_MANAGE', 'cluster-cluster 0-restart': 'CAN_RESTART',
+             'cluster-cluster 0-attach': 'CAN_ATTACH_TO'}
+        )
+
+        scopes = {record['name']: record for record in records if record['type'] == 'scope'}
+        self.assertEqual(sorted(scopes), ['scope-0', 'scope-1'])
+        self.assertEqual([secret['key'] for secret in scopes['scope-0']['secrets']], ['password'])
+        self.assertEqual(scopes['scope-0']['acls'], {'group-0': 'READ'})
+
+        groups = {record['name']: record for record in records if record['type'] == 'group'}
+        self.assertEqual(groups['group-1']['members'], ['someone@example.com'])
+
+    def test_export_selected_types(self):
+        permission_calls = self.workspace.count('/api/2.0/permissions')
+        output = run_command(['inventory', 'export', '--profile', self.workspace.profile, '--include', 'scopes'])
+
+        records = [json.loads(line) for line in output.splitlines() if line.startswith('{')]
+        self.assertEqual([record['type'] for record in records], ['scope', 'scope'])
+        self.assertEqual(self.workspace.count('/api/2.0/permissions'), permission_calls)
+
+
+class BoundedMapTest(unittest.TestCase):
+
+    def test_order_and_window(self):
+        consumed = []
+
+        def items():
+            for i in range(50):
+                consumed.append(i)
+                yield i
+
+        results = []
+        for result in bounded_map(lambda i: i * 2, items(), max_workers=4):
+            # At most the window of items is in flight ahead of the consumer
+            self.assertLessEqual(len(consumed) - len(results), 8)
+            results.append(result)
+
+        self.assertEqual(results, [i * 2 for i in range(50)])
+
+
+if __name__ == '__main__':
+    unittest.main()
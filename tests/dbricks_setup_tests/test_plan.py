@@ -0,0 +1,74 @@
+import threading
+import time
+import unittest
+
+from dbricks_setup.utils._plan import Plan, Ref
+
+
+class PlanTest(unittest.TestCase):
+
+    def test_waves_follow_dependencies(self):
+        plan = Plan()
+        groups = plan.add('create_groups', 'a', lambda: None)
+        cluster = plan.add('create_cluster', 'a', lambda: None)
+        plan.add('set_cluster_acls', 'a', lambda: None, depends_on=[groups, cluster])
+
+        waves = [[operation.key for operation in wave] for wave in plan.waves()]
+
+        self.assertEqual(waves, [['create_groups:a', 'create_cluster:a'], ['set_cluster_acls:a']])
+        self.assertIn('Wave 2:', plan.describe())
+
+    def test_invalid_plans(self):
+        plan = Plan()
+        plan.add('a', 'x', lambda: None, depends_on=['b:x'])
+        with self.assertRaises(ValueError):
+            plan.add('a', 'x', lambda: None)
+        with self.assertRaises(ValueError):
+            plan.waves()
+
+        plan.add('b', 'x', lambda: None, depends_on=['a:x'])
+        with self.assertRaises(ValueError):
+            plan.waves()
+
+    def test_independent_operations_run_concurrently(self):
+        plan = Plan()
+        for i in range(8):
+            plan.add('sleep', str(i), time.sleep, 0.2)
+
+        start = time.perf_counter()
+        plan.execute(max_workers=8)
+
+        self.assertLess(time.perf_counter() - start, 0.8)
+
+    def test_results_are_passed_on(self):
+        plan = Plan()
+        create = plan.add('create_cluster', 'a', lambda: 'cluster-id')
+        plan.add('terminate_cluster', 'a', lambda cluster_id: f'terminated {cluster_id}', Ref(create), depends_on=[create])
+
+        self.assertEqual(plan.execute()['terminate_cluster:a'], 'terminated cluster-id')
+
+    def test_dependents_of_failures_are_skipped(self):
+        ran = []
+        lock = threading.Lock()
+
+        def record(name):
+            with lock:
+                ran.append(name)
+
+        def fail():
+            raise ValueError('failed')
+
+        plan = Plan()
+        revoke = plan.add('revoke_cluster_acls', 'a', fail)
+        plan.add('delete_groups', 'a', record, 'groups', depends_on=[revoke])
+        plan.add('delete_cluster', 'b', record, 'cluster')
+
+        with self.assertRaises(RuntimeError) as context:
+            plan.execute()
+
+        self.assertEqual(ran, ['cluster'])
+        self.assertIn('delete_groups:a', str(context.exception))
+
+
+if __name__ == '__main__':
+    unittest.main()
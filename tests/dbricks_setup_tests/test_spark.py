@@ -0,0 +1,48 @@
+import unittest
+
+from dbricks_setup.utils.cluster._spark import SparkCatalog, parse_spark_version
+
+from .fake_workspace import SPARK_VERSIONS
+
+BETA = {'key': '15.0.x-scala2.12', 'name': '15.0 Beta (includes Apache Spark 3.5.0, Scala 2.12)'}
+CUSTOM = {'key': 'apache-spark-3.4.x-scala2.12', 'name': 'Light 3.4'}
+
+
+class SparkCatalogTest(unittest.TestCase):
+
+    def setUp(self):
+        self.catalog = SparkCatalog(SPARK_VERSIONS + [BETA, CUSTOM])
+
+    def test_parse(self):
+        runtime = parse_spark_version(SPARK_VERSIONS[3])
+        self.assertEqual(runtime['version'], (13, 3))
+        self.assertEqual(runtime['variant'], 'ml')
+        self.assertTrue(runtime['lts'])
+        self.assertIsNone(parse_spark_version(CUSTOM))
+
+    def test_latest_orders_by_version(self):
+        self.assertEqual(self.catalog.select()['key'], '14.0.x-scala2.12')
+
+    def test_queries(self):
+        queries = {
+            ('lts', 'standard'): '13.3.x-scala2.12',
+            ('9.x', 'standard'): '9.1.x-scala2.12',
+            ('10.4', 'standard'): '10.4.x-scala2.12',
+            ('lts:10.x', 'standard'): '10.4.x-scala2.12',
+            ('latest', 'photon'): '13.3.x-photon-scala2.12',
+            ('lts', 'gpu-ml'): '13.3.x-gpu-ml-scala2.12',
+            ('15.0.x-scala2.12', 'standard'): '15.0.x-scala2.12',
+        }
+        for (query, variant), key in queries.items():
+            with self.subTest(query=query, variant=variant):
+                self.assertEqual(self.catalog.select(query, variant)['key'], key)
+
+    def test_unknown_queries(self):
+        for query in ['', 'newest', '12.x', 'lts:14.x']:
+            with self.subTest(query=query):
+                with self.assertRaises(ValueError):
+                    self.catalog.select(query)
+
+
+if __name__ == '__main__':
+    unittest.main()
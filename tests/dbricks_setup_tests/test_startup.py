@@ -0,0 +1,58 @@
+import json
+import subprocess
+import sys
+import unittest
+
+from dbricks_setup._cli import BACKEND_TYPES, COMMANDS, _load_command
+
+# Modules only needed once a sub command talks to a workspace
+HEAVY_MODULES = ['azure', 'databricks_cli', 'httpx', 'requests', 'yaml']
+
+# The budget in seconds for importing the cli, far above the expected time so slow machines do not fail it
+IMPORT_BUDGET = 0.25
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+from dbricks_setup import cli
+elapsed = time.perf_counter() - start
+sys.argv = ['dbricks_setup'] + json.loads(sys.argv[1])
+try:
+    cli()
+except SystemExit:
+    pass
+loaded = sorted({name.split('.')[0] for name in sys.modules})
+print(json.dumps({'elapsed': elapsed, 'loaded': loaded}), file=sys.stderr)
+"""
+
+
+def probe(argv) -> dict:
+    """Run the cli in a fresh interpreter, returning the import time and the loaded top level modules"""
+    sp = subprocess.run([sys.executable, '-c', _PROBE, json.dumps(argv)], capture_output=True, check=True)
+    return json.loads(sp.stderr.decode().strip().splitlines()[-1])
+
+
+class StartupTest(unittest.TestCase):
+
+    def test_help_does_not_load_workspace_clients(self):
+        for argv in [['--help'], ['cluster', '--help'], ['scope', 'delete', '--help'], ['apply', '--help']]:
+            with self.subTest(argv=argv):
+                loaded = probe(argv)['loaded']
+                self.assertFalse([name for name in HEAVY_MODULES if name in loaded])
+
+    def test_import_budget(self):
+        self.assertLess(probe(['--help'])['elapsed'], IMPORT_BUDGET)
+
+    def test_commands_resolve(self):
+        for which in COMMANDS:
+            with self.subTest(which=which):
+                self.assertTrue(callable(_load_command(which)))
+
+    def test_backend_types(self):
+        from dbricks_setup.utils._backend import BACKENDS
+
+        self.assertEqual(sorted(BACKEND_TYPES), sorted(BACKENDS))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+import unittest
+
+from dbricks_setup.utils._targets import match_names, run_for_targets
+
+
+class MatchNamesTest(unittest.TestCase):
+
+    def test_plain_names_are_kept(self):
+        self.assertEqual(match_names(['b', 'missing', 'b'], ['a', 'b']), ['b', 'missing'])
+
+    def test_patterns_select_existing_names(self):
+        names = ['team-a', 'team-b', 'Team-C', 'other']
+
+        self.assertEqual(match_names(['team-*'], names), ['team-a', 'team-b'])
+        self.assertEqual(match_names(['TEAM-*'], names, case_sensitive=False), ['team-a', 'team-b', 'team-c'])
+        self.assertEqual(match_names(['re:team-[ab]', 'other'], names), ['team-a', 'team-b', 'other'])
+        self.assertEqual(match_names(['re:team'], names), [])
+
+
+class RunForTargetsTest(unittest.TestCase):
+
+    def test_failures_are_reported_after_all_targets(self):
+        done = []
+
+        def update(target, suffix):
+            if target == 'b':
+                raise ValueError('failed')
+            done.append(target + suffix)
+
+        with self.assertRaises(RuntimeError) as context:
+            run_for_targets(update, ['a', 'b', 'c'], suffix='!')
+
+        self.assertEqual(sorted(done), ['a!', 'c!'])
+        self.assertIn("['b']", str(context.exception))
+
+
+if __name__ == '__main__':
+    unittest.main()
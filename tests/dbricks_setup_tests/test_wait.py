@@ -0,0 +1,68 @@
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from dbricks_setup.utils._backend import get_backend
+from dbricks_setup.utils._cache import set_cache_enabled
+from dbricks_setup.utils.cluster._wait import ClusterWaiter
+
+from .benchmark import run_command
+from .fake_workspace import FakeWorkspace
+
+
+class ClusterWaiterTest(unittest.TestCase):
+
+    def setUp(self):
+        set_cache_enabled(False)
+        self.workspace = FakeWorkspace(terminate_delay=0.3).__enter__()
+        self.waiter = ClusterWaiter(self.workspace.profile, min_interval=0.05, max_interval=0.2)
+
+    def tearDown(self):
+        self.workspace.__exit__(None, None, None)
+        set_cache_enabled(True)
+
+    def terminate(self, count: int):
+        cluster_ids = [self.workspace.add_cluster(f'wait-{i}', state='RUNNING') for i in range(count)]
+        for cluster_id in cluster_ids:
+            get_backend(self.workspace.profile).terminate_cluster(cluster_id)
+        self.workspace.reset_calls()
+        return cluster_ids
+
+    def test_single_cluster_uses_get(self):
+        cluster_id = self.terminate(1)[0]
+
+        self.assertEqual(self.waiter.wait([cluster_id], ['TERMINATED'], timeout=5), {cluster_id: 'TERMINATED'})
+        self.assertEqual(self.workspace.count('/api/2.1/clusters/list'), 0)
+        self.assertGreater(self.workspace.count('/api/2.0/clusters/get'), 0)
+
+    def test_concurrent_waits_share_polls(self):
+        cluster_ids = self.terminate(20)
+
+        with ThreadPoolExecutor(max_workers=20) as executor:
+            results = list(executor.map(lambda c: self.waiter.wait([c], ['TERMINATED'], timeout=5), cluster_ids))
+
+        self.assertEqual([state for result in results for state in result.values()], ['TERMINATED'] * 20)
+        # Exponential backoff over 0.3s is a handful of polls, far below one poll per cluster
+        self.assertLess(self.workspace.count('/api/2.'), 20)
+
+    def test_timeout(self):
+        cluster_id = self.terminate(1)[0]
+
+        with self.assertRaises(TimeoutError):
+            self.waiter.wait([cluster_id], ['TERMINATED'], timeout=0.1)
+
+    def test_missing_cluster(self):
+        with self.assertRaises(RuntimeError):
+            self.waiter.wait(['missing'], ['TERMINATED'], timeout=5)
+
+    def test_update_edits_after_termination(self):
+        cluster_id = self.workspace.add_cluster('team-w', state='RUNNING')
+        get_backend(self.workspace.profile).terminate_cluster(cluster_id)
+        run_command(['cluster', 'update', '--profile', self.workspace.profile, '--name', 'team-w', '-e'])
+
+        self.assertEqual(self.workspace.count('/api/2.0/clusters/edit'), 1)
+        self.assertEqual(self.workspace.clusters[cluster_id]['spark_version'], '14.0.x-scala2.12')
+        self.assertEqual([c['state'] for c in self.workspace.clusters.values()], ['TERMINATED'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+import os
+import tempfile
+import unittest
+
+from dbricks_setup.apply._manifest import load_manifest
+from dbricks_setup.cluster import update_cluster
+from dbricks_setup.utils import _aad
+from dbricks_setup.utils._aad import AadTokenProvider, set_token_provider
+from dbricks_setup.utils._cache import set_cache_enabled
+from dbricks_setup.utils._profile import get_profile_config
+from dbricks_setup.watch import Watcher
+
+from .benchmark import run_command
+from .fake_workspace import FakeWorkspace
+from .test_aad import StubAcquire
+
+MANIFEST = """
+clusters:
+  - name: team-a
+  - name: team-b
+scopes:
+  - key_vault: vault
+    resource_id: /subscriptions/fake/vaults/vault
+"""
+
+
+class WatchTest(unittest.TestCase):
+
+    def setUp(self):
+        set_cache_enabled(False)
+        self.workspace = FakeWorkspace().__enter__()
+        self.previous_provider = _aad._provider
+        set_token_provider(AadTokenProvider(StubAcquire()))
+
+        fd, self.path = tempfile.mkstemp(suffix='.yaml')
+        with os.fdopen(fd, 'w') as f:
+            f.write(MANIFEST)
+
+    def tearDown(self):
+        os.remove(self.path)
+        set_token_provider(self.previous_provider)
+        self.workspace.__exit__(None, None, None)
+        set_cache_enabled(True)
+
+    def cluster_id(self, name: str) -> str:
+        return next(c['cluster_id'] for c in self.workspace.clusters.values() if c['cluster_name'] == name)
+
+    def test_watch_command(self):
+        run_command(['watch', '-f', self.path, '--profile', self.workspace.profile, '--interval', '0', '--cycles', '2'])
+
+        self.assertEqual(sorted(c['cluster_name'] for c in self.workspace.clusters.values()), ['team-a', 'team-b'])
+        self.assertEqual(list(self.workspace.scopes), ['vault'])
+
+    def test_only_drifted_resources_are_reconciled(self):
+        watcher = Watcher(load_manifest(self.path), self.workspace.profile, get_profile_config(self.workspace.profile))
+        watcher.run(interval=0, cycles=1)
+
+        # Drift the acls of a cluster and of the scope, and delete the other cluster
+        self.workspace.permissions[self.cluster_id('team-a')].pop('cluster-team-a-attach')
+        self.workspace.acls['vault'].pop('scope-vault-read')
+        self.workspace.clusters.pop(self.cluster_id('team-b'))
+
+        changed = watcher.poll()
+        self.assertEqual(changed, {'clusters': ['team-a', 'team-b'], 'scopes': ['vault']})
+        watcher.reconcile(changed)
+
+        self.assertIn('cluster-team-a-attach', self.workspace.permissions[self.cluster_id('team-a')])
+        self.assertIn('scope-vault-read', self.workspace.acls['vault'])
+        self.assertEqual(sorted(c['cluster_name'] for c in self.workspace.clusters.values()), ['team-a', 'team-b'])
+
+        # A quiet cycle only reads the events and acls of the managed resources
+        self.assertEqual(watcher.poll(), {'clusters': [], 'scopes': []})
+        calls = len(self.workspace.calls)
+        self.assertEqual(watcher.poll(), {'clusters': [], 'scopes': []})
+        self.assertEqual(len(self.workspace.calls) - calls, 6)
+        self.assertFalse([path for _, path in self.workspace.calls[calls:] if 'groups' in path])
+
+    def test_started_cluster_is_not_edited(self):
+        watcher = Watcher(load_manifest(self.path), self.workspace.profile, get_profile_config(self.workspace.profile))
+        watcher.clusters['team-a']['edit'] = True
+        watcher.run(interval=0, cycles=1)
+        self.assertEqual(watcher.poll(), {'clusters': [], 'scopes': []})
+
+        # Start and edit the cluster between the cycles, the listed clusters still show it terminated
+        cluster_id = self.cluster_id('team-a')
+        self.workspace.clusters[cluster_id].update(state='RUNNING', autotermination_minutes=5)
+        self.workspace.add_event(cluster_id, 'EDITED')
+        self.workspace.reset_calls()
+
+        changed = watcher.poll()
+        self.assertEqual(changed['clusters'], ['team-a'])
+        watcher.reconcile(changed)
+
+        self.assertEqual(self.workspace.count('/api/2.0/clusters/edit'), 0)
+        self.assertEqual(self.workspace.clusters[cluster_id]['state'], 'RUNNING')
+
+    def test_reconcile_keeps_the_sizing(self):
+        watcher = Watcher(load_manifest(self.path), self.workspace.profile, get_profile_config(self.workspace.profile))
+        watcher.run(interval=0, cycles=1)
+
+        # Resize a cluster as the advise does, then reconcile its configuration
+        profile, base_config = self.workspace.profile, get_profile_config(self.workspace.profile)
+        sizing = {'min_workers': 2, 'max_workers': 4, 'node_type_id': 'Standard_DS4_v2', 'autotermination_minutes': 30}
+        update_cluster(
+            'team-a',
+            profile,
+            base_config,
+            watcher.groups,
+            watcher.existing_clusters.values(),
+            edit=True,
+            verify=True,
+            sizing=sizing
+        )
+        watcher.clusters['team-a']['edit'] = True
+        watcher._refresh_clusters()
+        watcher.reconcile({'clusters': ['team-a'], 'scopes': []})
+
+        cluster = self.workspace.clusters[self.cluster_id('team-a')]
+        self.assertEqual(cluster['autoscale'], {'min_workers': 2, 'max_workers': 4})
+        self.assertEqual(cluster['node_type_id'], 'Standard_DS4_v2')
+        self.assertEqual(cluster['autotermination_minutes'], 30)
+
+
+if __name__ == '__main__':
+    unittest.main()